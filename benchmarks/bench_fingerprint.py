@@ -0,0 +1,58 @@
+"""Time pytaxel.ebilanz.fingerprint on large generated filings.
+
+Run with ``python benchmarks/bench_fingerprint.py``. For reference the table
+also shows a plain SHA-256 over the file bytes (the lower bound) and SHA-256
+over ElementTree's C14N 2.0 output with text stripping (the stdlib route to
+the same kind of canonical form).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv, write_template  # noqa: E402
+
+from pytaxel.ebilanz import fingerprint, generate_xml_from_csv  # noqa: E402
+
+SIZES = (10_000, 50_000, 100_000)
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        template = write_template(Path(tmp) / "ebilanz.xml")
+        print(f"{'positions':>10} {'size [MB]':>10} {'sha256 [ms]':>12} {'fingerprint [ms]':>17} {'c14n [ms]':>10}")
+        for size in SIZES:
+            xml_path = Path(tmp) / f"{size}.xml"
+            generate_xml_from_csv(write_csv(Path(tmp) / f"{size}.csv", size), template, xml_path)
+            data = xml_path.read_bytes()
+            raw = _timed(lambda: hashlib.sha256(data).hexdigest())
+            canonical = _timed(lambda: fingerprint(xml_path))
+            c14n = _timed(
+                lambda: hashlib.sha256(
+                    ET.canonicalize(from_file=str(xml_path), strip_text=True).encode("utf-8")
+                ).hexdigest()
+            )
+            print(
+                f"{size:>10} {len(data) / 1e6:>10.1f} {raw * 1e3:>12.1f} "
+                f"{canonical * 1e3:>17.1f} {c14n * 1e3:>10.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Guard the CLI startup cost with ``python -X importtime``.
+
+Run with ``python benchmarks/bench_importtime.py``. Each scenario starts a
+fresh interpreter with ``-X importtime`` and sums the import time of every
+module the interpreter would not load for ``python -c pass`` anyway. The best
+of ``--repeat`` runs is reported together with the most expensive imports.
+
+The script exits non-zero when a scenario imports a module it must not touch
+(``eric_py`` and ``pytaxel.eric`` for everything except the ERiC commands;
+additionally the renderer for ``--help``) or takes longer than
+``--budget-ms``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv, write_template  # noqa: E402
+
+ERIC_MODULES = ("eric_py", "pytaxel.eric")
+DEFAULT_BUDGET_MS = 40.0
+
+
+def _env() -> Dict[str, str]:
+    paths = [str(REPO_ROOT), os.environ.get("PYTHONPATH", "")]
+    return {**os.environ, "PYTHONPATH": os.pathsep.join(path for path in paths if path)}
+
+
+def _import_times(argv: List[str]) -> Dict[str, int]:
+    """Self import time in microseconds per module for one interpreter run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], capture_output=True, text=True, env=_env(), cwd=REPO_ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{result.stderr}")
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # the header line
+        times[fields[2].strip()] = int(fields[0])
+    return times
+
+
+def _scenarios(workdir: Path) -> Dict[str, Tuple[List[str], Tuple[str, ...]]]:
+    """Command line and forbidden module prefixes per scenario."""
+    template = write_template(workdir / "ebilanz.xml")
+    csv_path = write_csv(workdir / "input.csv", 100)
+    xml_path = workdir / "output.xml"
+    cli = ["-m", "pytaxel.cli.main"]
+    generate = cli + ["generate", "--csv-file", str(csv_path), "--template-file", str(template)]
+    # Write the XML once so the extract scenario has an input.
+    subprocess.run([sys.executable, *generate, "--output-file", str(xml_path)], check=True, cwd=REPO_ROOT, env=_env())
+    return {
+        "import": (["-c", "import pytaxel.cli.main"], ERIC_MODULES + ("pytaxel.ebilanz.",)),
+        "--help": (cli + ["--help"], ERIC_MODULES + ("pytaxel.ebilanz.",)),
+        "extract": (
+            cli + ["extract", "--xml-file", str(xml_path), "--output-file", str(workdir / "out.csv")],
+            ERIC_MODULES + ("pytaxel.ebilanz.renderer", "pytaxel.ebilanz.incremental"),
+        ),
+        "generate": (
+            generate + ["--output-file", str(workdir / "generated.xml")],
+            ERIC_MODULES + ("pytaxel.ebilanz.incremental", "pytaxel.ebilanz.canonical"),
+        ),
+    }
+
+
+def _forbidden(modules, prefixes: Tuple[str, ...]) -> List[str]:
+    """Modules equal to or below one of ``prefixes`` (a trailing dot matches submodules only)."""
+
+    def matches(name: str, prefix: str) -> bool:
+        if prefix.endswith("."):
+            return name.startswith(prefix)
+        return name == prefix or name.startswith(prefix + ".")
+
+    return sorted(name for name in modules if any(matches(name, prefix) for prefix in prefixes))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreter runs per scenario (default: 5)")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Fail if a scenario's imports take longer than this (default: {DEFAULT_BUDGET_MS:g})",
+    )
+    parser.add_argument("--top", type=int, default=5, help="Most expensive imports to list per scenario")
+    args = parser.parse_args(argv)
+
+    baseline = set(_import_times(["-c", "pass"]))
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="pytaxel-importtime-") as tmp:
+        print(f"{'scenario':<10} {'modules':>8} {'imports [ms]':>13}  slowest")
+        for name, (command, forbidden) in _scenarios(Path(tmp)).items():
+            best: Optional[Dict[str, int]] = None
+            for _ in range(args.repeat):
+                times = {module: us for module, us in _import_times(command).items() if module not in baseline}
+                if best is None or sum(times.values()) < sum(best.values()):
+                    best = times
+            assert best is not None
+            total_ms = sum(best.values()) / 1e3
+            slowest = sorted(best.items(), key=lambda item: -item[1])[: args.top]
+            print(
+                f"{name:<10} {len(best):>8} {total_ms:>13.1f}  "
+                + ", ".join(f"{module} {us / 1e3:.1f}" for module, us in slowest)
+            )
+            leaked = _forbidden(best, forbidden)
+            if leaked:
+                failures.append(f"{name}: imports {', '.join(leaked)}")
+            if total_ms > args.budget_ms:
+                failures.append(f"{name}: {total_ms:.1f} ms of imports exceeds the {args.budget_ms:g} ms budget")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Compare a full render with an incremental regenerate after small edits.
+
+Run with ``python benchmarks/bench_incremental.py``. For each filing size a
+handful of values is changed and the output regenerated; the full column is
+render plus write, the incremental column is ``regenerate`` splicing the
+changes into the previous output.
+"""
+
+from __future__ import annotations
+
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv, write_template  # noqa: E402
+
+from pytaxel.ebilanz import load_template, parse_csv, regenerate, render_ebilanz  # noqa: E402
+
+SIZES = (10_000, 50_000, 200_000)
+EDITS = 10
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        template = load_template(write_template(Path(tmp) / "ebilanz.xml"))
+        print(f"{'positions':>10} {'edits':>6} {'full [ms]':>10} {'incremental [ms]':>17} {'speedup':>8}")
+        for size in SIZES:
+            model = parse_csv(write_csv(Path(tmp) / f"{size}.csv", size), columnar=True, fast=True)
+            output = Path(tmp) / f"{size}.xml"
+            regenerate(model, template, output)
+            step = len(model.positions) // EDITS
+            for i in range(0, len(model.positions), step):
+                model.positions.values[i] = "1.00"
+
+            start = time.perf_counter()
+            mode = regenerate(model, template, output)
+            incremental = time.perf_counter() - start
+            assert mode == "patched", mode
+
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            render_ebilanz(model, template).write(buffer, encoding="utf-8", xml_declaration=True)
+            output.with_suffix(".full.xml").write_bytes(buffer.getvalue())
+            full = time.perf_counter() - start
+            assert buffer.getvalue() == output.read_bytes()
+
+            print(
+                f"{size:>10} {EDITS:>6} {full * 1e3:>10.1f} {incremental * 1e3:>17.1f} {full / incremental:>8.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Compare the memory held by list-of-Position and PositionTable models.
+
+Run with ``python benchmarks/bench_memory.py``. For each size the table shows
+the memory retained by the parsed model (``tracemalloc`` current) and the peak
+while parsing, for ``parse_csv(...)`` and ``parse_csv(..., columnar=True)``.
+Filings with unique tags per row and with tags shared by two contexts are
+measured separately: the table saves the per-row objects in both cases, and
+additionally stores each repeated tag string only once in the second.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv  # noqa: E402
+
+from pytaxel.ebilanz import parse_csv  # noqa: E402
+
+SIZES = (10_000, 100_000, 500_000)
+
+
+def _measure(csv_path: Path, columnar: bool):
+    gc.collect()
+    tracemalloc.start()
+    model = parse_csv(csv_path, columnar=columnar)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del model
+    return current, peak
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"{'tags':>7} {'positions':>10} {'list [MB]':>10} {'table [MB]':>11} {'ratio':>6}"
+            f" {'list peak [MB]':>15} {'table peak [MB]':>16}"
+        )
+        for shared_tags in (False, True):
+            for size in SIZES:
+                csv_path = write_csv(Path(tmp) / f"{size}-{shared_tags}.csv", size, shared_tags=shared_tags)
+                list_current, list_peak = _measure(csv_path, columnar=False)
+                table_current, table_peak = _measure(csv_path, columnar=True)
+                print(
+                    f"{'shared' if shared_tags else 'unique':>7} {size:>10} {list_current / 1e6:>10.1f} {table_current / 1e6:>11.1f}"
+                    f" {list_current / table_current:>6.2f} {list_peak / 1e6:>15.1f} {table_peak / 1e6:>16.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
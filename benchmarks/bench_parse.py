@@ -0,0 +1,54 @@
+"""Compare the DictReader and fast parse_csv paths on multi-megabyte CSVs.
+
+Run with ``python benchmarks/bench_parse.py``. Each configuration is parsed a
+few times and the best run is reported.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv  # noqa: E402
+
+from pytaxel.ebilanz import parse_csv  # noqa: E402
+
+SIZES = (50_000, 200_000, 500_000)
+REPEAT = 3
+
+
+def _best(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"{'positions':>10} {'size [MB]':>10} {'dict [ms]':>10} {'fast [ms]':>10}"
+            f" {'fast+columnar [ms]':>19} {'speedup':>8}"
+        )
+        for size in SIZES:
+            csv_path = write_csv(Path(tmp) / f"{size}.csv", size, shared_tags=True)
+            dict_reader = _best(lambda: parse_csv(csv_path))
+            fast = _best(lambda: parse_csv(csv_path, fast=True))
+            columnar = _best(lambda: parse_csv(csv_path, columnar=True, fast=True))
+            print(
+                f"{size:>10} {csv_path.stat().st_size / 1e6:>10.1f} {dict_reader * 1e3:>10.1f}"
+                f" {fast * 1e3:>10.1f} {columnar * 1e3:>19.1f} {dict_reader / fast:>8.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Show how render_ebilanz scales with the number of positions.
+
+Run with ``python benchmarks/bench_render.py``. The time per position should
+stay roughly flat as the filing grows; quadratic placement shows up as a
+per-position cost that grows with the size column. The ``mapped`` columns
+render a two-year filing (each tag in the current and prior year) with a
+concept mapping, i.e. with contexts and units.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import YEAR_CONTEXTS, write_csv, write_mapping, write_template  # noqa: E402
+
+from pytaxel.ebilanz import load_mapping, parse_csv, render_ebilanz  # noqa: E402
+
+SIZES = (1_000, 2_000, 4_000, 8_000, 16_000)
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        template = write_template(Path(tmp) / "ebilanz.xml")
+        mapping = load_mapping(write_mapping(Path(tmp) / "mapping.csv", max(SIZES)))
+        print(
+            f"{'positions':>10} {'render [ms]':>12} {'per position [us]':>18}"
+            f" {'mapped [ms]':>12} {'per position [us]':>18}"
+        )
+        for size in SIZES:
+            model = parse_csv(write_csv(Path(tmp) / f"{size}.csv", size))
+            start = time.perf_counter()
+            render_ebilanz(model, template)
+            elapsed = time.perf_counter() - start
+            two_years = write_csv(Path(tmp) / f"{size}.years.csv", size, shared_tags=True, context_names=YEAR_CONTEXTS)
+            model = parse_csv(two_years, columnar=True)
+            start = time.perf_counter()
+            render_ebilanz(model, template, mapping)
+            mapped = time.perf_counter() - start
+            print(
+                f"{size:>10} {elapsed * 1e3:>12.1f} {elapsed / size * 1e6:>18.2f}"
+                f" {mapped * 1e3:>12.1f} {mapped / size * 1e6:>18.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
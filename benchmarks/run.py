@@ -0,0 +1,226 @@
+"""Benchmark the CSV -> model -> XML -> CSV pipeline stage by stage.
+
+Run with ``python benchmarks/run.py``. Synthetic filings (see ``synthetic.py``)
+are generated for each size, so no taxel fixtures and no ERiC are needed.
+Every stage is timed on its own:
+
+- ``parse_csv``: CSV file to ``EBilanz`` model
+- ``render_ebilanz``: model to element tree
+- ``tree_write``: element tree to XML file
+- ``extract_to_csv``: XML file back to CSV
+- ``cli_generate``: ``pytaxel.cli.main.main(["generate", ...])`` end to end
+
+Each sample runs a stage often enough to take at least ``--min-time`` seconds
+and reports the time per call; the JSON written with ``--output`` can be
+passed to ``--compare`` on a later run to flag regressions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic import write_csv, write_template  # noqa: E402
+
+from pytaxel.ebilanz import extract_to_csv, load_template, parse_csv, render_ebilanz  # noqa: E402
+
+STAGES = ("parse_csv", "render_ebilanz", "tree_write", "extract_to_csv", "cli_generate")
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+SCHEMA_VERSION = 1
+
+
+def _cli_main() -> Callable[[List[str]], int]:
+    from pytaxel.cli.main import main
+
+    return main
+
+
+def _prepare(workdir: Path, size: int, stages) -> Dict[str, Callable[[], object]]:
+    """Write the inputs for one filing size and return a callable per stage."""
+    template_path = write_template(workdir / "ebilanz.xml")
+    template = load_template(template_path)
+    csv_path = write_csv(workdir / f"{size}.csv", size)
+    xml_path = workdir / f"{size}.xml"
+    model = parse_csv(csv_path)
+    tree = render_ebilanz(model, template)
+    tree.write(xml_path, encoding="utf-8", xml_declaration=True)
+
+    written_xml = workdir / f"{size}.written.xml"
+    extracted_csv = workdir / f"{size}.extracted.csv"
+    cli_xml = workdir / f"{size}.cli.xml"
+    runners: Dict[str, Callable[[], object]] = {
+        "parse_csv": lambda: parse_csv(csv_path),
+        "render_ebilanz": lambda: render_ebilanz(model, template),
+        "tree_write": lambda: tree.write(written_xml, encoding="utf-8", xml_declaration=True),
+        "extract_to_csv": lambda: extract_to_csv(xml_path, extracted_csv),
+    }
+    if "cli_generate" in stages:
+        main = _cli_main()
+        argv = [
+            "generate",
+            "--csv-file",
+            str(csv_path),
+            "--template-file",
+            str(template_path),
+            "--output-file",
+            str(cli_xml),
+        ]
+
+        def cli_generate() -> None:
+            if main(argv) != 0:
+                raise RuntimeError("pytaxel generate failed")
+
+        runners["cli_generate"] = cli_generate
+    return {stage: runners[stage] for stage in stages}
+
+
+def _sample(fn: Callable[[], object], min_time: float) -> float:
+    """Seconds per call, looping ``fn`` until the sample takes ``min_time``."""
+    number = 1
+    while True:
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            return elapsed / number
+        number *= 10 if elapsed < min_time / 10 else 2
+
+
+def run(sizes, stages, repeat: int = 5, min_time: float = 0.05) -> dict:
+    results = []
+    skipped = set()
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="pytaxel-bench-") as tmp:
+            try:
+                runners = _prepare(Path(tmp), size, stages)
+            except ImportError as exc:
+                if "cli_generate" not in skipped:
+                    print(f"skipping cli_generate: {exc}", file=sys.stderr)
+                skipped.add("cli_generate")
+                runners = _prepare(Path(tmp), size, [s for s in stages if s != "cli_generate"])
+            for stage, fn in runners.items():
+                fn()  # warm-up: template cache, imports, page cache
+                samples = [_sample(fn, min_time) for _ in range(repeat)]
+                results.append(
+                    {
+                        "stage": stage,
+                        "positions": size,
+                        "min": min(samples),
+                        "median": statistics.median(samples),
+                        "mean": statistics.fmean(samples),
+                        "samples": samples,
+                    }
+                )
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "min_time": min_time,
+        "skipped": sorted(skipped),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return a line per stage/size whose median got slower than ``threshold`` times the baseline."""
+    previous = {(r["stage"], r["positions"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["stage"], result["positions"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > threshold:
+            regressions.append(
+                f"{result['stage']} @ {result['positions']}: {before['median'] * 1e3:.2f} ms"
+                f" -> {result['median'] * 1e3:.2f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def _print_table(report: dict, baseline: Optional[dict]) -> None:
+    previous = {(r["stage"], r["positions"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'stage':<16} {'positions':>10} {'median [ms]':>12} {'min [ms]':>10} {'per position [us]':>18}"
+    if baseline:
+        header += f" {'vs baseline':>12}"
+    print(header)
+    for result in report["results"]:
+        line = (
+            f"{result['stage']:<16} {result['positions']:>10} {result['median'] * 1e3:>12.2f}"
+            f" {result['min'] * 1e3:>10.2f} {result['median'] / result['positions'] * 1e6:>18.2f}"
+        )
+        before = previous.get((result["stage"], result["positions"]))
+        if before is not None:
+            line += f" {result['median'] / before['median']:>11.2f}x"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="Comma-separated filing sizes in positions (default: 100,1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--stages",
+        type=lambda value: value.split(","),
+        default=list(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)})",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per stage and size (default: 5)")
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="Minimum seconds per sample (default: 0.05)"
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="With --compare, exit non-zero if a median is slower than this factor (default: 1.25)",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+
+    report = run(args.sizes, args.stages, repeat=args.repeat, min_time=args.min_time)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(report, baseline)
+        if args.output:
+            Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
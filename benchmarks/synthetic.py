@@ -0,0 +1,78 @@
+"""Synthetic eBilanz filings for benchmarks (no taxel fixtures required)."""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+TEMPLATE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<Elster xmlns="http://www.elster.de/elsterxml/schema/v11">
+  <TransferHeader version="11">
+    <Verfahren>ElsterBilanz</Verfahren>
+    <DatenArt>Bilanz</DatenArt>
+    <Vorgang>send-Auth</Vorgang>
+    <Testmerker>700000004</Testmerker>
+    <HerstellerID>00000</HerstellerID>
+  </TransferHeader>
+  <DatenTeil>
+    <Nutzdatenblock>
+      <NutzdatenHeader version="11">
+        <NutzdatenTicket>1</NutzdatenTicket>
+      </NutzdatenHeader>
+      <Nutzdaten>
+        <ebilanz:EBilanz xmlns:ebilanz="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema" version="000001">
+          <ebilanz:stichtag>20000101</ebilanz:stichtag>
+        </ebilanz:EBilanz>
+      </Nutzdaten>
+    </Nutzdatenblock>
+  </DatenTeil>
+</Elster>
+"""
+
+
+# Context names understood by mapping-driven rendering (current/prior year).
+YEAR_CONTEXTS = ("AJ", "VJ")
+
+
+def synthetic_rows(positions: int, contexts: int = 2, shared_tags: bool = False, context_names=None):
+    """Yield ``(tag, value, context)`` rows for a filing with ``positions`` entries.
+
+    With ``shared_tags`` each tag is reported once per context (as current and
+    prior-year values are) instead of every row having a tag of its own.
+    ``context_names`` replaces the default ``context1``, ``context2``, ...
+    """
+    names = context_names or [f"context{n + 1}" for n in range(contexts)]
+    yield ("ebilanz:stichtag", "20231231", "")
+    yield ("identifier", "synthetic", "")
+    yield ("unit", "EUR", "")
+    for i in range(positions):
+        tag_no = i // contexts if shared_tags else i
+        yield (f"ebilanz:position{tag_no:06d}", f"{i * 7 % 100000}.{i % 100:02d}", names[i % contexts])
+
+
+def write_template(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(TEMPLATE_XML, encoding="utf-8")
+    return path
+
+
+def write_csv(
+    path: Path, positions: int, contexts: int = 2, shared_tags: bool = False, context_names=None
+) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["tag", "value", "context"])
+        writer.writerows(synthetic_rows(positions, contexts, shared_tags, context_names))
+    return path
+
+
+def write_mapping(path: Path, positions: int) -> Path:
+    """Concept mapping covering every tag ``synthetic_rows`` can produce for ``positions``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["tag", "period", "unit"])
+        for i in range(positions):
+            writer.writerow([f"ebilanz:position{i:06d}", "instant" if i % 2 else "duration", "monetary"])
+    return path
@@ -1,19 +1,34 @@
-"""Command-line interface for pytaxel."""
+"""Command-line interface for pytaxel.
+
+Command implementations import what they need when they run: ``extract`` and
+``generate`` never load ``eric_py``, and ``--help`` loads neither the ERiC
+bindings nor the eBilanz renderer. Keep new imports of ``eric_py`` or heavy
+modules inside the ``cmd_*`` functions (see ``benchmarks/bench_importtime.py``).
+"""
 
 from __future__ import annotations
 
 import argparse
+import contextlib
 import sys
 from pathlib import Path
 
-from pytaxel.ebilanz import extract_to_csv, generate_xml_from_csv
-from eric_py.errors import EricError
-from eric_py.loader import EricLibraryLoadError, eric_plugin_path, load_ericapi, load_erictoolkit
+from pytaxel import profiling
+from pytaxel.profiling import span
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="pytaxel", description="Python eBilanz tooling using ERiC")
     parser.add_argument("--verbose", "--debug", action="store_true", help="Enable debug output")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-phase timing and memory-peak table to stderr when the command finishes",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="Also write the profile: cProfile stats for *.prof, a speedscope profile for *.json",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -35,6 +50,47 @@ def build_parser() -> argparse.ArgumentParser:
         required=False,
         help="Where to write the generated XML (defaults to current directory)",
     )
+    gen.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the XML incrementally instead of building the full tree in memory",
+    )
+    gen.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only patch positions changed since the last --incremental run (keeps <output>.state.json)",
+    )
+    gen.add_argument(
+        "--mapping",
+        help="Concept mapping CSV (tag,period,unit): write positions as facts with contexts and units",
+    )
+    gen.add_argument("--taxonomy", help="Taxonomy schema file or directory: reject tags it does not define")
+
+    # check
+    tax = subparsers.add_parser("check", help="Check CSV tags against the taxonomy without running ERiC")
+    tax.add_argument("--csv-file", help="Path to input CSV file")
+    tax.add_argument("--taxonomy", required=True, help="Taxonomy schema file (.xsd) or directory of schemas")
+    tax.add_argument("--complete", metavar="PREFIX", help="List the taxonomy tags starting with PREFIX")
+    tax.add_argument("--limit", type=int, default=20, help="Maximum number of completions (default: 20)")
+    tax.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Taxonomy index directory (default $PYTAXEL_CACHE_DIR or ~/.cache/pytaxel)",
+    )
+
+    # generate-batch
+    gbt = subparsers.add_parser(
+        "generate-batch", help="Generate eBilanz XML for many CSV files in parallel"
+    )
+    gbt.add_argument("inputs", nargs="*", help="CSV files, directories or glob patterns")
+    gbt.add_argument("--manifest", help="Text file listing one CSV path per line")
+    gbt.add_argument("--template-file", required=True, help="Path to eBilanz XML template")
+    gbt.add_argument(
+        "--output-dir",
+        required=False,
+        help="Directory for the generated XML files (defaults to current directory)",
+    )
+    gbt.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
 
     # validate
     val = subparsers.add_parser("validate", help="Validate eBilanz XML with ERiC")
@@ -44,6 +100,44 @@ def build_parser() -> argparse.ArgumentParser:
     val.add_argument("--log-dir", help="Directory for ERiC logs", default=None)
     val.add_argument("--eric-home", help="Override ERiC home (default ERiC/Linux-x86_64)")
     val.add_argument("--print", dest="pdf_name", help="Optional PDF output path for print/preview")
+    val.add_argument("--no-cache", action="store_true", help="Always run ERiC, bypassing the result cache")
+    val.add_argument(
+        "--summary",
+        action="store_true",
+        help="Print the outcome as compact JSON (code, error/hint counts, findings with field paths)",
+    )
+    val.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Validation cache directory (default $PYTAXEL_CACHE_DIR or ~/.cache/pytaxel)",
+    )
+
+    # validate-batch
+    vbt = subparsers.add_parser(
+        "validate-batch", help="Validate many eBilanz XML files, loading ERiC only once"
+    )
+    vbt.add_argument("inputs", nargs="*", help="XML files, directories or glob patterns")
+    vbt.add_argument("--manifest", help="Text file listing one XML path per line")
+    vbt.add_argument("--tax-type", default="Bilanz", help="Tax type (default: Bilanz)")
+    vbt.add_argument("--tax-version", default="6.5", help="Tax version (e.g., 6.5)")
+    vbt.add_argument(
+        "--log-dir",
+        default=None,
+        help="Directory for per-file logs and summary.json (defaults to current directory)",
+    )
+    vbt.add_argument("--eric-home", help="Override ERiC home (default ERIC_HOME)")
+    vbt.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="ERiC worker processes; 1 validates in this process (default: 1)",
+    )
+    vbt.add_argument("--no-cache", action="store_true", help="Always run ERiC, bypassing the result cache")
+    vbt.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Validation cache directory (default $PYTAXEL_CACHE_DIR or ~/.cache/pytaxel)",
+    )
 
     # send
     snd = subparsers.add_parser("send", help="Send eBilanz XML via ERiC with certificate")
@@ -73,24 +167,36 @@ def _default_output_path(path: str | None, suffix: str) -> Path:
     return Path.cwd() / f"output{suffix}"
 
 
-def _log_response(log_path: Path, result) -> None:
+def _log_response(
+    log_path: Path, result, xml_text: str, operation: str, dav: str, quiet: bool = False, fingerprint=None
+) -> None:
+    from pytaxel.eric.logs import log_sink
+
     log_path.mkdir(parents=True, exist_ok=True)
-    val_path = log_path / "validation_response.xml"
-    srv_path = log_path / "server_response.xml"
+    run_dir = log_sink(log_path).write(
+        result.validation_response or "",
+        result.server_response or "",
+        xml_text=xml_text,
+        operation=operation,
+        code=result.code,
+        datenart_version=dav,
+        fingerprint=fingerprint,
+    )
+    if quiet:
+        return
     if result.validation_response:
-        print(f"Logging validation result to '{val_path}'")
-        val_path.write_text(result.validation_response, encoding="utf-8")
-    else:
-        val_path.write_text("", encoding="utf-8")
+        print(f"Logging validation result to '{log_path / 'validation_response.xml'}'")
     if result.server_response:
-        print(f"Logging server reponse to '{srv_path}'")
-        srv_path.write_text(result.server_response, encoding="utf-8")
-    else:
-        srv_path.write_text("", encoding="utf-8")
+        print(f"Logging server reponse to '{log_path / 'server_response.xml'}'")
+    print(f"Archived responses in '{run_dir}'")
 
 
 def _handle_eric_import_error(exc: Exception) -> int:
     """Print a clear setup error if EricClient could not be imported."""
+    try:
+        from eric_py.loader import EricLibraryLoadError
+    except ImportError:
+        EricLibraryLoadError = ()  # eric-py itself is missing; nothing to match
     if isinstance(exc, EricLibraryLoadError):
         print(
             "ERiC could not be initialized.\n\n"
@@ -117,6 +223,11 @@ def _handle_eric_import_error(exc: Exception) -> int:
 
 def cmd_eric_check(args: argparse.Namespace) -> int:
     """Check ERiC/ERIC_HOME configuration and report status."""
+    try:
+        from eric_py.loader import EricLibraryLoadError, eric_plugin_path, load_ericapi, load_erictoolkit
+    except ImportError as exc:
+        return _handle_eric_import_error(exc)
+
     try:
         home = eric_plugin_path(args.eric_home)
     except EricLibraryLoadError as exc:
@@ -176,6 +287,8 @@ def cmd_eric_check(args: argparse.Namespace) -> int:
 
 
 def cmd_extract(args: argparse.Namespace) -> int:
+    from pytaxel.ebilanz import extract_to_csv
+
     output = _default_output_path(args.output_file, ".csv")
     try:
         extract_to_csv(Path(args.xml_file), output)
@@ -188,32 +301,147 @@ def cmd_extract(args: argparse.Namespace) -> int:
 
 
 def cmd_generate(args: argparse.Namespace) -> int:
+    from pytaxel.ebilanz import generate_xml_from_csv, template_cache_info
+
     output = _default_output_path(args.output_file, ".xml")
     if args.verbose:
         print(f"[debug] generating XML from {args.csv_file} using template {args.template_file} -> {output}")
-    generate_xml_from_csv(args.csv_file, args.template_file, output)
+    if args.incremental and args.stream:
+        print("--incremental cannot be combined with --stream", file=sys.stderr)
+        return 1
+    if args.mapping and (args.incremental or args.stream):
+        print("--mapping cannot be combined with --stream or --incremental", file=sys.stderr)
+        return 1
+    unknown_tag_error: tuple = ()
+    if args.taxonomy:
+        from pytaxel.ebilanz.taxonomy import UnknownTagError
+
+        unknown_tag_error = (UnknownTagError,)
+    try:
+        generate_xml_from_csv(
+            args.csv_file,
+            args.template_file,
+            output,
+            stream=args.stream,
+            incremental=args.incremental,
+            mapping=args.mapping,
+            taxonomy=args.taxonomy,
+        )
+    except unknown_tag_error as exc:
+        print(f"Generate failed: {exc}", file=sys.stderr)
+        return 1
     if args.verbose:
+        if args.incremental:
+            from pytaxel.ebilanz.incremental import state_path_for
+
+            print(f"[debug] incremental state: {state_path_for(output)}")
+        if not args.stream:
+            info = template_cache_info()
+            print(f"[debug] template cache: {info.hits} hits, {info.misses} misses")
         print(f"[debug] wrote {output}")
     return 0
 
 
+def cmd_check(args: argparse.Namespace) -> int:
+    from pytaxel.ebilanz import parse_csv
+    from pytaxel.ebilanz.taxonomy import UnknownTagError, load_taxonomy
+
+    if not args.csv_file and args.complete is None:
+        print("check needs --csv-file and/or --complete", file=sys.stderr)
+        return 1
+    try:
+        index = load_taxonomy(args.taxonomy, args.cache_dir)
+    except Exception as exc:  # noqa: BLE001
+        print(f"Loading taxonomy failed: {exc}", file=sys.stderr)
+        return 1
+    if args.verbose:
+        print(f"[debug] taxonomy {index.source}: {len(index)} tags")
+
+    if args.complete is not None:
+        for tag in index.complete(args.complete, args.limit):
+            print(tag)
+        if not args.csv_file:
+            return 0
+
+    try:
+        model = parse_csv(Path(args.csv_file), columnar=True, fast=True, taxonomy=index)
+    except UnknownTagError as exc:
+        for tag, close in exc.suggestions().items():
+            print(f"UNKNOWN  {tag}" + (f" (did you mean {', '.join(close)}?)" if close else ""))
+        print(f"{len(exc.tags)} unknown tag(s) in {args.csv_file}")
+        return 1
+    except Exception as exc:  # noqa: BLE001
+        print(f"Check failed: {exc}", file=sys.stderr)
+        return 1
+    print(f"OK    {args.csv_file}: {len(model.positions)} positions, all tags known")
+    return 0
+
+
+def cmd_generate_batch(args: argparse.Namespace) -> int:
+    from pytaxel.ebilanz.batch import collect_inputs, generate_batch
+
+    try:
+        csv_files = collect_inputs(args.inputs, "*.csv", args.manifest)
+        if not csv_files:
+            print("No CSV files to generate.", file=sys.stderr)
+            return 1
+        output_dir = Path(args.output_dir) if args.output_dir else Path.cwd()
+        results = generate_batch(csv_files, args.template_file, output_dir, jobs=args.jobs)
+    except Exception as exc:  # noqa: BLE001
+        print(f"Batch generate failed: {exc}", file=sys.stderr)
+        return 1
+
+    failed = [result for result in results if not result.ok]
+    for result in results:
+        if result.ok:
+            print(f"OK    {result.source} -> {result.output} ({result.duration:.2f}s)")
+        else:
+            print(f"FAIL  {result.source}: {result.error}")
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+    return 1 if failed else 0
+
+
 def cmd_validate(args: argparse.Namespace) -> int:
+    try:
+        from eric_py.errors import EricError
+        from eric_py.loader import EricLibraryLoadError
+    except ImportError as exc:
+        return _handle_eric_import_error(exc)
+
     xml_path = Path(args.xml_file)
     xml_text = xml_path.read_text(encoding="utf-8")
     dav = _taxonomy_version(args.tax_type, args.tax_version)
     try:
         log_dir = Path(args.log_dir) if args.log_dir else Path.cwd()
-        if args.eric_home:
-            import os
+        from pytaxel.eric.cache import ValidationCache, content_fingerprint, validate_with_cache
 
-            os.environ["ERIC_HOME"] = args.eric_home
-        from eric_py.facade import EricClient
+        def run():
+            from eric_py.facade import EricClient
 
-        with EricClient(eric_home=args.eric_home, log_dir=log_dir) as client:
-            result = client.validate_xml(xml_text, dav, pdf_path=args.pdf_name)
-        _log_response(log_dir, result)
-        print(f"Response code: {result.code}")
+            with span("eric"), contextlib.ExitStack() as stack:
+                with span("eric_init"):
+                    client = stack.enter_context(EricClient(eric_home=args.eric_home, log_dir=log_dir))
+                with span("eric_validate"):
+                    return client.validate_xml(xml_text, dav, pdf_path=args.pdf_name)
+
+        cache = None if args.no_cache else ValidationCache(args.cache_dir)
+        fingerprint = content_fingerprint(xml_text)  # for both the cache key and the run history
+        result, cache_hit = validate_with_cache(
+            cache, xml_text, dav, args.eric_home, run, args.pdf_name, fingerprint=fingerprint
+        )
+        _log_response(log_dir, result, xml_text, "validate", dav, quiet=args.summary, fingerprint=fingerprint)
+        if args.summary:
+            import json
+
+            from pytaxel.eric.report import ValidationReport
+
+            summary = ValidationReport.from_result(result, cache_hit).summary()
+            print(json.dumps(summary, indent=2, ensure_ascii=False))
+        else:
+            print(f"Response code: {result.code}")
         if args.verbose:
+            if cache_hit:
+                print(f"[debug] answered from validation cache {cache.root}")
             print(f"[debug] ERiC return code: {result.code}")
             print(f"[debug] Validation response:\n{result.validation_response}")
             if result.server_response:
@@ -229,27 +457,80 @@ def cmd_validate(args: argparse.Namespace) -> int:
         return 2
 
 
+def cmd_validate_batch(args: argparse.Namespace) -> int:
+    # eric-py is only needed once a file misses the cache.
+    try:
+        from eric_py.loader import EricLibraryLoadError
+
+        fatal: tuple = (ImportError, EricLibraryLoadError)
+    except ImportError:
+        fatal = (ImportError,)
+    from pytaxel.ebilanz.batch import collect_inputs
+    from pytaxel.eric.batch import SUMMARY_FILE, validate_batch
+    from pytaxel.eric.cache import ValidationCache
+
+    try:
+        xml_files = collect_inputs(args.inputs, "*.xml", args.manifest)
+        if not xml_files:
+            print("No XML files to validate.", file=sys.stderr)
+            return 1
+        log_dir = Path(args.log_dir) if args.log_dir else Path.cwd()
+        results = validate_batch(
+            xml_files,
+            _taxonomy_version(args.tax_type, args.tax_version),
+            log_dir,
+            eric_home=args.eric_home,
+            jobs=args.jobs,
+            cache=None if args.no_cache else ValidationCache(args.cache_dir),
+            fatal=fatal,
+        )
+    except fatal as exc:
+        return _handle_eric_import_error(exc)
+    except Exception as exc:  # noqa: BLE001
+        print(f"Batch validate failed: {exc}", file=sys.stderr)
+        return 2
+
+    failed = [result for result in results if not result.ok]
+    for result in results:
+        cached = ", cached" if result.cached else ""
+        if result.ok:
+            print(f"OK    {result.source} -> {result.log_dir} ({result.duration:.2f}s{cached})")
+        elif result.error is None:
+            print(f"FAIL  {result.source}: response code {result.code} ({result.log_dir})")
+        else:
+            print(f"FAIL  {result.source}: {result.error}")
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if args.verbose:
+        print(f"[debug] summary written to {log_dir / SUMMARY_FILE}")
+    return 1 if failed else 0
+
+
 def cmd_send(args: argparse.Namespace) -> int:
+    try:
+        from eric_py.errors import EricError
+        from eric_py.loader import EricLibraryLoadError
+    except ImportError as exc:
+        return _handle_eric_import_error(exc)
+
     xml_path = Path(args.xml_file)
     xml_text = xml_path.read_text(encoding="utf-8")
     dav = _taxonomy_version(args.tax_type, args.tax_version)
     try:
         log_dir = Path(args.log_dir) if args.log_dir else Path.cwd()
-        if args.eric_home:
-            import os
-
-            os.environ["ERIC_HOME"] = args.eric_home
         from eric_py.facade import EricClient
 
-        with EricClient(eric_home=args.eric_home, log_dir=log_dir) as client:
-            result = client.send_xml(
-                xml_text,
-                datenart_version=dav,
-                certificate_path=args.certificate,
-                pin=args.pin,
-                pdf_path=args.pdf_name,
-            )
-        _log_response(log_dir, result)
+        with span("eric"), contextlib.ExitStack() as stack:
+            with span("eric_init"):
+                client = stack.enter_context(EricClient(eric_home=args.eric_home, log_dir=log_dir))
+            with span("eric_send"):
+                result = client.send_xml(
+                    xml_text,
+                    datenart_version=dav,
+                    certificate_path=args.certificate,
+                    pin=args.pin,
+                    pdf_path=args.pdf_name,
+                )
+        _log_response(log_dir, result, xml_text, "send", dav)
         print(f"Response code: {result.code}")
         if args.verbose:
             print(f"[debug] ERiC return code: {result.code}")
@@ -271,12 +552,38 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    if not (args.profile or args.profile_output):
+        return _run_command(parser, args)
+
+    # Only the --profile table shows memory peaks; tracing allocations would slow down (and skew) a .prof run.
+    profiler = profiling.enable(
+        memory=args.profile,
+        cprofile=bool(args.profile_output) and not args.profile_output.endswith(".json"),
+    )
+    try:
+        with span(f"pytaxel {args.command}"):
+            return _run_command(parser, args)
+    finally:
+        profiling.disable()
+        if args.profile:
+            print(profiler.report(), file=sys.stderr)
+        if args.profile_output:
+            print(f"profile written to {profiler.write(args.profile_output)}", file=sys.stderr)
+
+
+def _run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     if args.command == "extract":
         return cmd_extract(args)
     if args.command == "generate":
         return cmd_generate(args)
+    if args.command == "check":
+        return cmd_check(args)
+    if args.command == "generate-batch":
+        return cmd_generate_batch(args)
     if args.command == "validate":
         return cmd_validate(args)
+    if args.command == "validate-batch":
+        return cmd_validate_batch(args)
     if args.command == "send":
         return cmd_send(args)
     if args.command == "eric-check":
@@ -1,23 +1,134 @@
-"""eBilanz data handling and transformation logic."""
+"""eBilanz data handling and transformation logic.
 
+Submodules are imported on first use (PEP 562), so ``pytaxel extract`` does
+not pay for the renderer, the incremental state handling or the fingerprint
+code, and importing the package stays cheap for short CLI runs.
+"""
+
+from __future__ import annotations
+
+import importlib
+import io
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, BinaryIO, TextIO, Union
+
+from pytaxel.profiling import span
+
+if TYPE_CHECKING:
+    from .canonical import fingerprint
+    from .extract import extract_to_csv, iter_extracted_rows
+    from .incremental import regenerate
+    from .mapping import CompiledMapping, load_mapping
+    from .model import EBilanz, MasterData, Position, PositionTable
+    from .parser import parse_csv
+    from .renderer import render_ebilanz
+    from .stream import stream_ebilanz, stream_xml_to_file
+    from .taxonomy import TaxonomyIndex, UnknownTagError, load_taxonomy
+    from .templates import CompiledTemplate, clear_template_cache, load_template, template_cache_info
+
+# Public name -> submodule that defines it.
+_LAZY_EXPORTS = {
+    "EBilanz": "model",
+    "MasterData": "model",
+    "Position": "model",
+    "PositionTable": "model",
+    "fingerprint": "canonical",
+    "extract_to_csv": "extract",
+    "iter_extracted_rows": "extract",
+    "regenerate": "incremental",
+    "CompiledMapping": "mapping",
+    "load_mapping": "mapping",
+    "parse_csv": "parser",
+    "render_ebilanz": "renderer",
+    "stream_ebilanz": "stream",
+    "stream_xml_to_file": "stream",
+    "TaxonomyIndex": "taxonomy",
+    "UnknownTagError": "taxonomy",
+    "load_taxonomy": "taxonomy",
+    "CompiledTemplate": "templates",
+    "clear_template_cache": "templates",
+    "load_template": "templates",
+    "template_cache_info": "templates",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
-from .model import EBilanz, MasterData, Position
-from .extract import extract_to_csv
-from .parser import parse_csv
-from .renderer import render_ebilanz
 
 PathLike = Union[str, Path]
 
 
-def generate_xml_from_csv(csv_file: PathLike | None, template_file: PathLike, output_file: PathLike) -> Path:
-    """Parse a CSV and render an eBilanz XML using the provided template."""
-    model = parse_csv(Path(csv_file)) if csv_file else EBilanz(master=MasterData(stichtag="", identifier=""))
-    tree = render_ebilanz(model, Path(template_file))
+def generate_xml_from_csv(
+    csv_file: Union[PathLike, TextIO, None],
+    template_file: Union[PathLike, CompiledTemplate],
+    output_file: Union[PathLike, BinaryIO],
+    stream: bool = False,
+    incremental: bool = False,
+    mapping: Union[PathLike, CompiledMapping, None] = None,
+    taxonomy: Union[PathLike, TaxonomyIndex, None] = None,
+) -> Union[Path, BinaryIO]:
+    """Parse a CSV and render an eBilanz XML using the provided template.
+
+    ``csv_file`` may be a path or a text stream, ``output_file`` a path or a
+    binary stream such as ``BytesIO``; the output is returned. With
+    ``stream=True`` the XML is written incrementally while the template is
+    read, without building the output tree in memory. With
+    ``incremental=True`` only the elements changed since the last incremental
+    run are patched into the existing output (see :func:`regenerate`).
+    A ``mapping`` renders positions as facts with contexts and units (see
+    :func:`render_ebilanz`); it needs the default, non-streaming mode.
+    With a ``taxonomy`` unknown tags are rejected while the CSV is parsed
+    (see :func:`parse_csv`).
+    """
+    from .model import EBilanz, MasterData
+    from .parser import parse_csv
+    from .renderer import render_ebilanz
+    from .templates import CompiledTemplate, load_template
+
+    if csv_file:
+        source = csv_file if hasattr(csv_file, "read") else Path(csv_file)
+        model = parse_csv(source, columnar=True, fast=True, taxonomy=taxonomy)
+    else:
+        model = EBilanz(master=MasterData(stichtag="", identifier=""))
+    if mapping is not None and (stream or incremental):
+        raise ValueError("A mapping cannot be combined with stream or incremental generation")
+    if incremental:
+        if stream or hasattr(output_file, "write"):
+            raise ValueError("Incremental generation needs an output file path and cannot stream")
+        from .incremental import regenerate
+
+        regenerate(model, template_file, output_file)
+        return Path(output_file)
+    if stream:
+        from .stream import stream_ebilanz, stream_xml_to_file
+
+        if hasattr(output_file, "write"):
+            text = io.TextIOWrapper(output_file, encoding="utf-8", errors="xmlcharrefreplace")
+            stream_ebilanz(model, template_file, text)
+            text.flush()
+            text.detach()
+            return output_file
+        return stream_xml_to_file(model, template_file, output_file)
+    template = template_file if isinstance(template_file, CompiledTemplate) else load_template(template_file)
+    tree = render_ebilanz(model, template, mapping)
+    if hasattr(output_file, "write"):
+        with span("serialize"):
+            tree.write(output_file, encoding="utf-8", xml_declaration=True)
+        return output_file
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    tree.write(output_path, encoding="utf-8", xml_declaration=True)
+    with span("serialize"):
+        tree.write(output_path, encoding="utf-8", xml_declaration=True)
     return output_path
 
 
@@ -25,8 +136,22 @@ __all__ = [
     "EBilanz",
     "MasterData",
     "Position",
+    "PositionTable",
     "parse_csv",
     "render_ebilanz",
     "generate_xml_from_csv",
     "extract_to_csv",
+    "iter_extracted_rows",
+    "regenerate",
+    "CompiledMapping",
+    "load_mapping",
+    "TaxonomyIndex",
+    "UnknownTagError",
+    "load_taxonomy",
+    "fingerprint",
+    "stream_ebilanz",
+    "CompiledTemplate",
+    "load_template",
+    "template_cache_info",
+    "clear_template_cache",
 ]
@@ -0,0 +1,117 @@
+"""Render many CSV filings to eBilanz XML across a process pool."""
+
+from __future__ import annotations
+
+import glob
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from .templates import load_template
+
+PathLike = Union[str, Path]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of rendering a single input file in a batch."""
+
+    source: Path
+    output: Path
+    ok: bool
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+def collect_inputs(
+    sources: Iterable[str],
+    pattern: str = "*.csv",
+    manifest: Optional[PathLike] = None,
+) -> List[Path]:
+    """Resolve files, directories, glob patterns and a manifest into input paths.
+
+    Directories contribute their entries matching ``pattern``; the manifest lists
+    one path per line (blank lines and ``#`` comments are skipped), relative to
+    the manifest's directory. Duplicates are dropped, first occurrence wins.
+    """
+    found: List[Path] = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            found.extend(sorted(p for p in path.glob(pattern) if p.is_file()))
+        elif path.is_file():
+            found.append(path)
+        else:
+            matches = sorted(glob.glob(source))
+            if not matches:
+                raise FileNotFoundError(f"No input files match '{source}'")
+            found.extend(Path(match) for match in matches)
+    if manifest is not None:
+        manifest_path = Path(manifest)
+        for line in manifest_path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                found.append(manifest_path.parent / line)
+
+    unique: List[Path] = []
+    seen = set()
+    for path in found:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def _init_worker(template_file: str) -> None:
+    # Parse the template once per worker; later renders hit the template cache.
+    load_template(template_file)
+
+
+def _generate_one(csv_file: str, template_file: str, output_file: str) -> BatchResult:
+    from . import generate_xml_from_csv
+
+    start = time.perf_counter()
+    try:
+        generate_xml_from_csv(csv_file, load_template(template_file), output_file)
+    except Exception as exc:  # noqa: BLE001
+        return BatchResult(Path(csv_file), Path(output_file), False, str(exc), time.perf_counter() - start)
+    return BatchResult(Path(csv_file), Path(output_file), True, None, time.perf_counter() - start)
+
+
+def generate_batch(
+    csv_files: Iterable[PathLike],
+    template_file: PathLike,
+    output_dir: PathLike,
+    jobs: Optional[int] = None,
+) -> List[BatchResult]:
+    """Render each CSV to ``output_dir/<stem>.xml`` and return results in input order.
+
+    ``jobs`` is the number of worker processes (default: CPU count); ``jobs=1``
+    renders in the current process.
+    """
+    csv_paths = [Path(p) for p in csv_files]
+    output_root = Path(output_dir)
+    outputs = [output_root / f"{path.stem}.xml" for path in csv_paths]
+    duplicates = sorted(out.name for out, count in Counter(outputs).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Several inputs would write the same output file: {', '.join(duplicates)}")
+
+    template = str(template_file)
+    # Fail fast on a broken template instead of in every worker.
+    load_template(template)
+    tasks = [(str(csv), template, str(out)) for csv, out in zip(csv_paths, outputs)]
+    if jobs == 1:
+        return [_generate_one(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(template,)) as pool:
+        futures = [pool.submit(_generate_one, *task) for task in tasks]
+        results = []
+        for (csv, _, out), future in zip(tasks, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # noqa: BLE001 - e.g. BrokenProcessPool after a worker was killed
+                results.append(BatchResult(Path(csv), Path(out), False, f"{type(exc).__name__}: {exc}", 0.0))
+        return results
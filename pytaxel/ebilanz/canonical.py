@@ -0,0 +1,132 @@
+"""Canonical hashing of eBilanz XML.
+
+Two documents get the same fingerprint when they differ only in insignificant
+whitespace (whitespace-only text such as indentation), attribute order,
+namespace prefixes, comments or the XML declaration. Other text is hashed
+verbatim: ``" 100 "`` and ``"100"`` are different values. Names are normalised
+through the ``NS`` map of the renderer, so ``ebilanz:stichtag`` hashes the same
+whichever prefix the document used for the eBilanz namespace.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import IO, Dict, List, Union
+
+from pytaxel.profiling import traced
+
+from .renderer import NS
+
+XmlSource = Union[str, bytes, Path, IO[bytes], ET.Element, ET.ElementTree]
+
+_URI_TO_PREFIX = {uri: prefix for prefix, uri in NS.items()}
+
+# Token markers; these control characters cannot occur in XML 1.0 content.
+_START = "\x01"
+_ATTR = "\x02"
+_VALUE = "\x03"
+_TEXT = "\x04"
+_END = "\x05"
+
+_CHUNK = 64 * 1024
+_FLUSH_PARTS = 4096
+
+
+class _Canonicalizer:
+    """Parser target turning parse events into a hashed token stream (no tree is built)."""
+
+    def __init__(self) -> None:
+        self._hash = hashlib.sha256()
+        self._parts: List[str] = []
+        self._data: List[str] = []
+        self._names: Dict[str, str] = {}
+
+    def _name(self, qname: str) -> str:
+        name = self._names.get(qname)
+        if name is None:
+            name = qname
+            if qname[:1] == "{":
+                uri, local = qname[1:].split("}", 1)
+                prefix = _URI_TO_PREFIX.get(uri)
+                if prefix is not None:
+                    name = f"{prefix}:{local}"
+            self._names[qname] = name
+        return name
+
+    def _flush_data(self) -> None:
+        if self._data:
+            text = "".join(self._data)
+            self._data.clear()
+            if text.strip():
+                self._parts.append(_TEXT + text)
+
+    def _emit(self) -> None:
+        if len(self._parts) >= _FLUSH_PARTS:
+            self._hash.update("".join(self._parts).encode("utf-8"))
+            self._parts.clear()
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self._flush_data()
+        self._parts.append(_START + self._name(tag))
+        if attrib:
+            for name, value in sorted((self._name(k), v) for k, v in attrib.items()):
+                self._parts.append(f"{_ATTR}{name}{_VALUE}{value}")
+        self._emit()
+
+    def end(self, tag: str) -> None:
+        self._flush_data()
+        self._parts.append(_END)
+        self._emit()
+
+    def data(self, text: str) -> None:
+        self._data.append(text)
+
+    def close(self) -> str:
+        self._flush_data()
+        self._hash.update("".join(self._parts).encode("utf-8"))
+        self._parts.clear()
+        return self._hash.hexdigest()
+
+
+def _walk(target: _Canonicalizer, elem: ET.Element) -> None:
+    target.start(elem.tag, elem.attrib)
+    if elem.text:
+        target.data(elem.text)
+    for child in elem:
+        if not isinstance(child.tag, str):
+            continue  # comments / processing instructions
+        _walk(target, child)
+        if child.tail:
+            target.data(child.tail)
+    target.end(elem.tag)
+
+
+@traced("fingerprint")
+def fingerprint(xml: XmlSource) -> str:
+    """Return a hex SHA-256 over the canonical form of ``xml``.
+
+    ``xml`` may be XML text (``str``/``bytes``), a ``Path``, a binary file
+    object, or an already parsed ``Element``/``ElementTree``.
+    """
+    target = _Canonicalizer()
+    if isinstance(xml, ET.ElementTree):
+        xml = xml.getroot()
+    if isinstance(xml, ET.Element):
+        _walk(target, xml)
+        return target.close()
+
+    parser = ET.XMLParser(target=target)
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    if isinstance(xml, bytes):
+        parser.feed(xml)
+    elif isinstance(xml, Path):
+        with xml.open("rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                parser.feed(chunk)
+    else:
+        for chunk in iter(lambda: xml.read(_CHUNK), b""):
+            parser.feed(chunk)
+    return parser.close()
@@ -2,16 +2,24 @@
 
 from __future__ import annotations
 
+import contextlib
 import csv
+import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Dict
+from typing import IO, Dict, Iterator, TextIO, Union
+
+from pytaxel.profiling import traced
 
 NS_TO_PREFIX: Dict[str, str] = {
     "http://www.elster.de/elsterxml/schema/v11": "",
     "http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema": "ebilanz",
 }
 
+# Context and unit definitions written by mapping-driven rendering; the facts
+# refer to them through ``contextRef``, which becomes the ``context`` column.
+_XBRLI_PREFIX = "{http://www.xbrl.org/2003/instance}"
+
 
 def _prefixed(tag: str) -> str:
     if tag.startswith("{"):
@@ -21,18 +29,66 @@ def _prefixed(tag: str) -> str:
     return tag
 
 
-def extract_to_csv(xml_path: Path, output_path: Path) -> None:
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    rows = []
-    for elem in root.iter():
-        if elem.text and elem.text.strip():
-            tag = _prefixed(elem.tag)
-            rows.append({"tag": tag, "value": elem.text.strip(), "context": ""})
+def _row(elem: ET.Element) -> Dict[str, str]:
+    return {"tag": _prefixed(elem.tag), "value": elem.text.strip(), "context": elem.get("contextRef", "")}
+
+
+def iter_extracted_rows(xml_source: Union[Path, IO[bytes]]) -> Iterator[Dict[str, str]]:
+    """Yield a ``tag``/``value``/``context`` row for every element carrying text.
+
+    ``context`` is the element's ``contextRef`` (empty without one);
+    ``xbrli`` context and unit definitions produce no rows. The document is
+    read with ``iterparse`` and rows come out in document order; finished
+    elements are released so memory stays bounded by the nesting depth.
+    """
+    stack = []  # [element, row already emitted]
+    source = str(xml_source) if isinstance(xml_source, Path) else xml_source
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            # A parent's text is complete once its first child starts.
+            if stack and not stack[-1][1]:
+                parent = stack[-1][0]
+                stack[-1][1] = True
+                if parent.text and parent.text.strip() and not parent.tag.startswith(_XBRLI_PREFIX):
+                    yield _row(parent)
+            stack.append([elem, False])
+            continue
 
+        _, emitted = stack.pop()
+        if not emitted and elem.text and elem.text.strip() and not elem.tag.startswith(_XBRLI_PREFIX):
+            yield _row(elem)
+        elem.clear()
+        if stack:
+            stack[-1][0].remove(elem)
+
+
+@contextlib.contextmanager
+def _open_output(output: Union[Path, TextIO]) -> Iterator[TextIO]:
+    """The stream to write to; a path is written via a temp file and replaced only on success.
+
+    Rows are written while the XML is still being parsed, so a malformed
+    document must not leave a partial CSV behind.
+    """
+    if hasattr(output, "write"):
+        yield output  # type: ignore[misc]
+        return
+    output_path = Path(output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="", encoding="utf-8") as csvfile:
+    tmp = output_path.with_name(f".{output_path.name}.{os.urandom(4).hex()}.tmp")
+    try:
+        with tmp.open("x", newline="", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp, output_path)
+    except BaseException:
+        tmp.unlink()
+        raise
+
+
+@traced("extract")
+def extract_to_csv(xml_path: Union[Path, IO[bytes]], output_path: Union[Path, TextIO]) -> None:
+    """Write the rows of :func:`iter_extracted_rows` as CSV to a path or text stream."""
+    with _open_output(output_path) as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=["tag", "value", "context"])
         writer.writeheader()
-        for row in rows:
+        for row in iter_extracted_rows(xml_path):
             writer.writerow(row)
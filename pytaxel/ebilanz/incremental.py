@@ -0,0 +1,380 @@
+"""Incremental regeneration of eBilanz XML backed by a sidecar state file.
+
+A render in incremental mode also writes ``<output>.state.json``. It records
+hashes of the template and the output, the value assigned to every EBilanz
+child and the byte span of each patchable child in the output. The next run
+diffs the new model against that state and splices only the changed elements
+into the previous output.
+
+Whenever a splice could not reproduce ``render_ebilanz`` byte for byte, the
+file is rendered in full instead. That covers a different template, an output
+edited by hand, appended positions whose order changed, and a changed
+template element with attributes or children.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import io
+import json
+import threading
+import weakref
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from pytaxel.profiling import traced
+
+from .model import EBilanz, PositionTable
+from .renderer import NS, _ns_tag, render_ebilanz
+from .stream import _escape_text
+from .templates import EBILANZ_TAG, CompiledTemplate, load_template
+
+PathLike = Union[str, Path]
+
+STATE_VERSION = 1
+
+UNCHANGED = "unchanged"
+PATCHED = "patched"
+FULL = "full"
+
+STICHTAG = "ebilanz:stichtag"
+
+_PREFIXES = {uri: prefix for prefix, uri in NS.items()}
+
+# Template children by CSV-style tag: (plain leaf that can be patched, template text).
+_Children = Dict[str, Tuple[bool, Optional[str]]]
+# (start, end, replacement, tag written or None for a removal) in bytes of the old output.
+_Edit = Tuple[int, int, bytes, Optional[str]]
+
+
+def state_path_for(output_path: PathLike) -> Path:
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + ".state.json")
+
+
+def _csv_tag(tag: str) -> Optional[str]:
+    """Inverse of ``_ns_tag``; None for namespaces a CSV cannot address."""
+    if tag[:1] != "{":
+        return tag
+    uri, local = tag[1:].split("}", 1)
+    prefix = _PREFIXES.get(uri)
+    return None if prefix is None else f"{prefix}:{local}"
+
+
+def _assignments(model: EBilanz) -> Dict[str, str]:
+    """Final text per EBilanz child in first-assignment order, as ``render_ebilanz`` applies them.
+
+    Keyed by the tag as written in the CSV, which maps one to one to the
+    element tag and keeps the state file small.
+    """
+    values = {STICHTAG: model.master.stichtag}
+    positions = model.positions
+    if isinstance(positions, PositionTable):
+        values.update(zip(map(positions.tags.__getitem__, positions.tag_ids), positions.values))
+    else:
+        for position in positions:
+            values[position.tag] = position.value
+    return values
+
+
+def _template_children(template: CompiledTemplate) -> _Children:
+    # Read from the shared tree, which is not modified, rather than a copy.
+    children: _Children = {}
+    for node in template.anchor:
+        csv_tag = _csv_tag(node.tag)
+        if csv_tag is not None and csv_tag not in children:
+            children[csv_tag] = (not len(node) and not node.attrib, node.text)
+    return children
+
+
+# Compiled template -> (digest, children). Compiled templates come from the
+# template cache and are replaced when the file changes, so both are derived
+# once per template version.
+_derived: "weakref.WeakKeyDictionary[CompiledTemplate, Tuple[str, _Children]]" = weakref.WeakKeyDictionary()
+_derived_lock = threading.Lock()
+
+
+def _template_state(template: CompiledTemplate) -> Tuple[str, _Children]:
+    with _derived_lock:
+        derived = _derived.get(template)
+    if derived is None:
+        derived = (hashlib.sha256(ET.tostring(template.root)).hexdigest(), _template_children(template))
+        with _derived_lock:
+            _derived[template] = derived
+    return derived
+
+
+def _qname(tag: str, namespaces: Dict[str, str]) -> Optional[str]:
+    """Name of the CSV-style ``tag`` in the output, or None if its namespace is not declared."""
+    return _qname_of(_ns_tag(tag), namespaces)
+
+
+def _qname_of(tag: str, namespaces: Dict[str, str]) -> Optional[str]:
+    if tag[:1] != "{":
+        return tag
+    uri, local = tag[1:].split("}", 1)
+    prefix = namespaces.get(uri)
+    if prefix is None:
+        return None
+    return f"{prefix}:{local}" if prefix else local
+
+
+def _leaf(qname: str, text: Optional[str]) -> bytes:
+    if text:
+        return f"<{qname}>{_escape_text(text)}</{qname}>".encode("utf-8", "xmlcharrefreplace")
+    return f"<{qname} />".encode("utf-8")
+
+
+def _scan(data: bytes, tags) -> Tuple[Dict[str, str], Dict[str, Tuple[int, int]], int]:
+    """Locate the EBilanz children ``tags`` (CSV-style) in rendered output.
+
+    Returns the declared namespaces (uri -> prefix), the byte span of the first
+    child per tag and the offset of the EBilanz end tag. Elements are matched
+    by their serialised name: an unqualified tag written inside the default
+    namespace would otherwise resolve to a different element name.
+    """
+    parser = xml.parsers.expat.ParserCreate()
+    namespaces: Dict[str, str] = {}
+    spans: Dict[str, Tuple[int, int]] = {}
+    state = {"depth": 0, "anchor": None, "close": None, "open": None, "names": None}
+
+    def start(name, attrs):
+        depth = state["depth"] = state["depth"] + 1
+        if state["anchor"] is None:
+            for key, value in attrs.items():
+                if key == "xmlns" or key.startswith("xmlns:"):
+                    namespaces.setdefault(value, key[6:])
+            if depth > 1 and name == _qname_of(EBILANZ_TAG, namespaces):
+                state["anchor"] = depth
+                names: Dict[str, Optional[str]] = {}
+                for tag in tags:
+                    qname = _qname(tag, namespaces)
+                    # Two tags serialised alike cannot be told apart; patch neither.
+                    names[qname] = None if qname in names else tag
+                state["names"] = names
+        elif depth == state["anchor"] + 1 and state["close"] is None:
+            tag = state["names"].get(name)
+            if tag is not None and tag not in spans:
+                state["open"] = (tag, parser.CurrentByteIndex)
+
+    def end(_name):
+        depth = state["depth"]
+        state["depth"] = depth - 1
+        if state["anchor"] is None or state["close"] is not None:
+            return
+        index = parser.CurrentByteIndex
+        if depth == state["anchor"]:
+            state["close"] = index
+        elif depth == state["anchor"] + 1 and state["open"] is not None:
+            tag, begin = state["open"]
+            state["open"] = None
+            # expat reports the end of an empty-element tag, else the start of the end tag.
+            start_tag_end = data.index(b">", begin)
+            if data[start_tag_end - 1 : start_tag_end] == b"/":
+                spans[tag] = (begin, start_tag_end + 1)
+            else:
+                spans[tag] = (begin, data.index(b">", index) + 1)
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.Parse(data, True)
+    if state["close"] is None:
+        raise ValueError("Rendered output is missing EBilanz element")
+    return namespaces, spans, state["close"]
+
+
+def _load_state(state_path: Path) -> Optional[dict]:
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def _all_tags(values: Dict[str, str], children: _Children) -> List[str]:
+    """State tag order: assigned tags, then unassigned patchable template children."""
+    return list(values) + [tag for tag, (is_leaf, _text) in children.items() if is_leaf and tag not in values]
+
+
+def _plan(state: dict, values: Dict[str, str], children: _Children) -> Optional[List[_Edit]]:
+    """Byte edits turning the previous output into the new one, or None if a full render is needed."""
+    tags: List[str] = state["tags"]
+    texts: List[str] = state["texts"]
+    starts: List[int] = state["starts"]
+    ends: List[int] = state["ends"]
+    namespaces: Dict[str, str] = state["namespaces"]
+    edits: List[_Edit] = []
+
+    def replace(i: int, tag: str, text: Optional[str]) -> bool:
+        qname = _qname(tag, namespaces)
+        if starts[i] < 0 or qname is None:
+            return False
+        edits.append((starts[i], ends[i], _leaf(qname, text), tag))
+        return True
+
+    if len(texts) == len(values) and tags[: len(texts)] == list(values):
+        # Same tags in the same order: only values changed (the usual small edit).
+        for i, (before, after) in enumerate(zip(texts, values.values())):
+            if before != after and not replace(i, tags[i], after):
+                return None
+        return edits
+
+    index = dict(zip(tags, range(len(tags))))
+    old = dict(zip(tags, texts))
+    for tag, (_is_leaf, default) in children.items():
+        before, after = old.get(tag, default), values.get(tag, default)
+        if before != after:
+            i = index.get(tag)
+            if i is None or not replace(i, tag, after):
+                return None
+
+    old_appended = [tag for tag in old if tag not in children]
+    new_appended = [tag for tag in values if tag not in children]
+    kept = [tag for tag in old_appended if tag in values]
+    if new_appended[: len(kept)] != kept:
+        return None  # appended elements would come out in a different order
+    for tag in old_appended:
+        i = index[tag]
+        if tag not in values:
+            if starts[i] < 0:
+                return None  # its span was not found, e.g. an unprefixed tag matching a template child
+            edits.append((starts[i], ends[i], b"", None))
+        elif old[tag] != values[tag] and not replace(i, tag, values[tag]):
+            return None
+    close = state["close"]
+    for tag in new_appended[len(kept) :]:
+        qname = _qname(tag, namespaces)
+        if qname is None:
+            return None
+        edits.append((close, close, _leaf(qname, values[tag]), tag))
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    return edits
+
+
+def _apply(
+    data: bytes, state: dict, edits: List[_Edit], values: Dict[str, str], children: _Children
+) -> Tuple[bytes, dict]:
+    """Splice ``edits`` into ``data`` and return the new bytes and state."""
+    pieces = []
+    position = 0
+    shift = 0
+    edit_ends: List[int] = []
+    shifts = [0]
+    written: Dict[str, Tuple[int, int]] = {}
+    for start, end, replacement, tag in edits:
+        pieces.append(data[position:start])
+        pieces.append(replacement)
+        position = end
+        if tag is not None:
+            written[tag] = (start + shift, start + shift + len(replacement))
+        shift += len(replacement) - (end - start)
+        edit_ends.append(end)
+        shifts.append(shift)
+    pieces.append(data[position:])
+
+    # Unedited spans keep their length and move by the edits ending at or before their start.
+    bisect_right = bisect.bisect_right
+    tags: List[str] = state["tags"]
+    moved_starts = [start + shifts[bisect_right(edit_ends, start)] for start in state["starts"]]
+    moved_ends = [end - start + moved for start, end, moved in zip(state["starts"], state["ends"], moved_starts)]
+    new_tags = _all_tags(values, children)
+    if new_tags == tags:
+        starts, ends = moved_starts, moved_ends
+    else:
+        old_index = dict(zip(tags, range(len(tags))))
+        starts = [moved_starts[old_index[tag]] if tag in old_index else -1 for tag in new_tags]
+        ends = [moved_ends[old_index[tag]] if tag in old_index else -1 for tag in new_tags]
+    if written:
+        new_index = dict(zip(new_tags, range(len(new_tags))))
+        for tag, (start, end) in written.items():
+            starts[new_index[tag]] = start
+            ends[new_index[tag]] = end
+
+    new_state = dict(
+        state,
+        tags=new_tags,
+        texts=list(values.values()),
+        starts=starts,
+        ends=ends,
+        close=state["close"] + shift,
+    )
+    return b"".join(pieces), new_state
+
+
+def _render_full(
+    model: EBilanz, template: CompiledTemplate, values: Dict[str, str], children: _Children
+) -> Tuple[bytes, dict]:
+    buffer = io.BytesIO()
+    render_ebilanz(model, template).write(buffer, encoding="utf-8", xml_declaration=True)
+    data = buffer.getvalue()
+    tags = _all_tags(values, children)
+    patchable = {tag for tag in tags if children.get(tag, (True, None))[0]}
+    namespaces, spans, close = _scan(data, patchable)
+    missing = (-1, -1)
+    state = {
+        "namespaces": namespaces,
+        "close": close,
+        "tags": tags,
+        "texts": list(values.values()),
+        "starts": [spans.get(tag, missing)[0] for tag in tags],
+        "ends": [spans.get(tag, missing)[1] for tag in tags],
+    }
+    return data, state
+
+
+def _write_state(state_path: Path, state: dict) -> None:
+    state_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+
+
+@traced("regenerate")
+def regenerate(
+    model: EBilanz,
+    template: Union[PathLike, CompiledTemplate],
+    output_file: PathLike,
+) -> str:
+    """Bring ``output_file`` up to date with ``model`` and return what was done.
+
+    Returns ``"unchanged"`` (output left alone), ``"patched"`` (changed
+    elements spliced into the previous output) or ``"full"`` (rendered from
+    scratch). The output is identical to a full render in every case.
+    """
+    if not isinstance(template, CompiledTemplate):
+        template = load_template(template)
+    output_path = Path(output_file)
+    state_path = state_path_for(output_path)
+    values = _assignments(model)
+    template_digest, children = _template_state(template)
+
+    state = _load_state(state_path)
+    data: Optional[bytes] = None
+    if state is not None and state.get("template") == template_digest:
+        try:
+            previous = output_path.read_bytes()
+        except OSError:
+            previous = None
+        if previous is not None and hashlib.sha256(previous).hexdigest() == state.get("output"):
+            edits = _plan(state, values, children)
+            if edits is not None:
+                if not edits and state["tags"] == _all_tags(values, children):
+                    return UNCHANGED
+                data, state = _apply(previous, state, edits, values, children)
+                if not edits:
+                    # Same bytes, but e.g. a template default is now set explicitly.
+                    _write_state(state_path, state)
+                    return UNCHANGED
+                mode = PATCHED
+
+    if data is None:
+        data, state = _render_full(model, template, values, children)
+        mode = FULL
+
+    state.update(version=STATE_VERSION, template=template_digest, output=hashlib.sha256(data).hexdigest())
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(data)
+    _write_state(state_path, state)
+    return mode
@@ -0,0 +1,183 @@
+"""Concept mappings: the period type and unit of every tag in a taxonomy.
+
+A mapping is a CSV file with the columns ``tag``, ``period`` (``instant`` or
+``duration``), ``unit`` and an optional ``decimals``. ``unit`` is
+``monetary`` for amounts in the filing currency (``MasterData.unit``),
+another unit id such as ``pure``, or empty for non-numeric concepts.
+
+Rendering with a mapping turns each position into a fact with ``contextRef``
+and ``unitRef``. The position's ``context`` names the fiscal year relative to
+the stichtag: ``AJ`` (or empty) for the current year, ``VJ`` for the
+previous one and ``VVJ`` for the year before that. Full context ids such as
+``I-VJ``, as written by :func:`~pytaxel.ebilanz.extract_to_csv`, are accepted
+too. Compiled mappings are cached per file like templates, so the lookup
+tables are built once per taxonomy.
+"""
+
+from __future__ import annotations
+
+import csv
+import xml.etree.ElementTree as ET
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from .templates import CacheInfo, _FileCache
+
+XBRLI_NS = "http://www.xbrl.org/2003/instance"
+ISO4217_NS = "http://www.xbrl.org/2003/iso4217"
+IDENTIFIER_SCHEME = "http://www.rzf-nrw.de/Steuernummer"
+
+ET.register_namespace("xbrli", XBRLI_NS)
+ET.register_namespace("iso4217", ISO4217_NS)
+
+MONETARY = "monetary"
+PERIOD_CODES = {"instant": "I", "duration": "D"}
+# Context name -> years before the stichtag.
+YEAR_OFFSETS = {"AJ": 0, "VJ": 1, "VVJ": 2}
+
+
+class Concept(NamedTuple):
+    period: str  # "I" (instant) or "D" (duration)
+    unit: Optional[str]  # MONETARY, another unit id, or None for non-numeric facts
+    decimals: Optional[str]
+
+
+class CompiledMapping:
+    """Lookup table from CSV-style tag (``ebilanz:bilanz.pos0``) to :class:`Concept`."""
+
+    def __init__(self, concepts: Dict[str, Concept], source: Optional[Path] = None):
+        self.concepts = concepts
+        self.source = source
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "CompiledMapping":
+        path = Path(path)
+        concepts: Dict[str, Concept] = {}
+        with path.open(newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            missing = {"tag", "period"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"Mapping {path} is missing column(s): {', '.join(sorted(missing))}")
+            for line, row in enumerate(reader, start=2):
+                tag = (row.get("tag") or "").strip()
+                if not tag:
+                    continue
+                period = (row.get("period") or "").strip().lower()
+                if period not in PERIOD_CODES:
+                    raise ValueError(f"{path}:{line}: period must be 'instant' or 'duration', got '{period}'")
+                unit = (row.get("unit") or "").strip() or None
+                decimals = (row.get("decimals") or "").strip() or ("2" if unit == MONETARY else None)
+                concepts[tag] = Concept(PERIOD_CODES[period], unit, decimals)
+        return cls(concepts, source=path)
+
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self.concepts
+
+    def concept(self, tag: str) -> Concept:
+        try:
+            return self.concepts[tag]
+        except KeyError:
+            raise ValueError(f"Tag '{tag}' is not in mapping {self.source or ''}".rstrip()) from None
+
+
+def context_year(context: Optional[str]) -> str:
+    """Year key (``AJ``/``VJ``/``VVJ``) of a position's context column."""
+    if not context:
+        return "AJ"
+    key = context
+    if len(context) > 2 and context[1] == "-" and context[0] in "ID":
+        key = context[2:]
+    if key not in YEAR_OFFSETS:
+        raise ValueError(f"Unknown context '{context}' (expected one of {', '.join(YEAR_OFFSETS)})")
+    return key
+
+
+def _parse_stichtag(stichtag: str) -> date:
+    digits = stichtag.replace("-", "")
+    if len(digits) != 8 or not digits.isdigit():
+        raise ValueError(f"Cannot derive context periods from stichtag '{stichtag}' (expected YYYYMMDD)")
+    return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def context_element(context_id: str, stichtag: str, identifier: str) -> ET.Element:
+    """``xbrli:context`` for ids like ``I-AJ`` or ``D-VJ`` relative to ``stichtag``."""
+    end = _years_before(_parse_stichtag(stichtag), YEAR_OFFSETS[context_id[2:]])
+    context = ET.Element(f"{{{XBRLI_NS}}}context", {"id": context_id})
+    entity = ET.SubElement(context, f"{{{XBRLI_NS}}}entity")
+    ET.SubElement(entity, f"{{{XBRLI_NS}}}identifier", {"scheme": IDENTIFIER_SCHEME}).text = identifier
+    period = ET.SubElement(context, f"{{{XBRLI_NS}}}period")
+    if context_id[0] == "I":
+        ET.SubElement(period, f"{{{XBRLI_NS}}}instant").text = end.isoformat()
+    else:
+        start = _years_before(end, 1) + timedelta(days=1)
+        ET.SubElement(period, f"{{{XBRLI_NS}}}startDate").text = start.isoformat()
+        ET.SubElement(period, f"{{{XBRLI_NS}}}endDate").text = end.isoformat()
+    return context
+
+
+class _PrefixedText(str, ET.QName):
+    """Element text ``prefix:local`` whose namespace ElementTree declares on write.
+
+    ElementTree only declares namespaces it finds in tags, attribute keys and
+    :class:`~xml.etree.ElementTree.QName` values. This one is a QName for the
+    declaration and a plain string for everything else, including output.
+    """
+
+    def __new__(cls, prefix: str, uri: str, local: str) -> "_PrefixedText":
+        return str.__new__(cls, f"{prefix}:{local}")
+
+    def __init__(self, prefix: str, uri: str, local: str):
+        ET.QName.__init__(self, uri, local)
+        self._args = (prefix, uri, local)
+
+    def __reduce__(self):  # copy.deepcopy and pickle
+        return (type(self), self._args)
+
+
+def unit_element(unit_id: str) -> ET.Element:
+    """``xbrli:unit``; three-letter upper-case ids are ISO 4217 currencies."""
+    unit = ET.Element(f"{{{XBRLI_NS}}}unit", {"id": unit_id})
+    if len(unit_id) == 3 and unit_id.isalpha() and unit_id.isupper():
+        measure = _PrefixedText("iso4217", ISO4217_NS, unit_id)
+    elif unit_id == "pure":
+        measure = "xbrli:pure"
+    else:
+        measure = unit_id
+    ET.SubElement(unit, f"{{{XBRLI_NS}}}measure").text = measure
+    return unit
+
+
+_cache = _FileCache(CompiledMapping.from_path)
+
+
+def load_mapping(path: Union[str, Path]) -> CompiledMapping:
+    """Return the compiled mapping for ``path``, reading it only when it changed."""
+    return _cache.get(path)
+
+
+def mapping_cache_info() -> CacheInfo:
+    return _cache.info()
+
+
+def clear_mapping_cache() -> None:
+    _cache.clear()
+
+
+def fact_attributes(
+    mapping: CompiledMapping, tag: str, context: Optional[str], unit: str
+) -> Tuple[str, Optional[str], Optional[str]]:
+    """``(contextRef, unitRef, decimals)`` of a position; ``unit`` is the filing currency."""
+    concept = mapping.concept(tag)
+    unit_ref = unit if concept.unit == MONETARY else concept.unit
+    return f"{concept.period}-{context_year(context)}", unit_ref, concept.decimals
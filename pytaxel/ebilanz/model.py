@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import sys
+from array import array
+from collections.abc import Sequence
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, overload
+
+PositionRow = Tuple[str, str, Optional[str]]
 
 
 @dataclass
@@ -15,7 +20,13 @@ class MasterData:
     unit: str = "EUR"
 
 
-@dataclass
+# Filings hold thousands of positions, and an instance ``__dict__`` per entry
+# adds up; ``dataclass(slots=True)`` needs Python 3.10, older versions get a
+# regular dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class Position:
     """Single eBilanz position/value entry."""
 
@@ -24,9 +35,97 @@ class Position:
     context: Optional[str] = None
 
 
+class PositionTable(Sequence):
+    """Columnar store of positions: parallel arrays of tag IDs, values and context IDs.
+
+    Tags and contexts repeat across a filing, so each distinct string is
+    interned once in ``tags``/``contexts`` and rows refer to it by index
+    (``-1`` meaning no context). The table reads like a list of ``Position``;
+    indexing builds the ``Position`` on demand, while ``iter_rows`` avoids
+    creating objects at all.
+    """
+
+    def __init__(self, positions: Iterable[Union[Position, PositionRow]] = ()):
+        self.tags: List[str] = []
+        self.contexts: List[str] = []
+        self.tag_ids = array("i")
+        self.context_ids = array("i")
+        self.values: List[str] = []
+        self._tag_ids: Dict[str, int] = {}
+        self._context_ids: Dict[str, int] = {}
+        for position in positions:
+            if isinstance(position, Position):
+                self.append(position.tag, position.value, position.context)
+            else:
+                self.append(*position)
+
+    def append(self, tag: str, value: str, context: Optional[str] = None) -> None:
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tags)
+            self.tags.append(sys.intern(tag))
+        if context is None:
+            context_id = -1
+        else:
+            context_id = self._context_ids.get(context)
+            if context_id is None:
+                context_id = self._context_ids[context] = len(self.contexts)
+                self.contexts.append(sys.intern(context))
+        self.tag_ids.append(tag_id)
+        self.context_ids.append(context_id)
+        self.values.append(value)
+
+    def _row(self, i: int) -> PositionRow:
+        context_id = self.context_ids[i]
+        return (
+            self.tags[self.tag_ids[i]],
+            self.values[i],
+            self.contexts[context_id] if context_id >= 0 else None,
+        )
+
+    def iter_rows(self) -> Iterator[PositionRow]:
+        """Yield ``(tag, value, context)`` tuples in insertion order."""
+        tags, contexts = self.tags, self.contexts
+        for tag_id, value, context_id in zip(self.tag_ids, self.values, self.context_ids):
+            yield tags[tag_id], value, contexts[context_id] if context_id >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @overload
+    def __getitem__(self, i: int) -> Position: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Position]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [Position(*self._row(j)) for j in range(*i.indices(len(self)))]
+        return Position(*self._row(range(len(self))[i]))
+
+    def __iter__(self) -> Iterator[Position]:
+        for row in self.iter_rows():
+            yield Position(*row)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PositionTable):
+            return list(self.iter_rows()) == list(other.iter_rows())
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PositionTable({len(self)} positions, {len(self.tags)} tags, {len(self.contexts)} contexts)"
+
+
+Positions = Union[List[Position], PositionTable]
+
+
 @dataclass
 class EBilanz:
     """Aggregate eBilanz data model containing metadata and values."""
 
     master: MasterData
-    positions: List[Position] = field(default_factory=list)
+    positions: Positions = field(default_factory=list)
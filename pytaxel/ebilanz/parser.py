@@ -2,45 +2,148 @@
 
 from __future__ import annotations
 
+import contextlib
 import csv
+import sys
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Callable, Dict, Optional, TextIO, Union
 
-from .model import EBilanz, MasterData, Position
+from pytaxel.profiling import traced
 
+from .model import EBilanz, MasterData, Position, Positions, PositionTable
 
-def parse_csv(path: Path) -> EBilanz:
-    """Read a CSV file and return an EBilanz model.
+if TYPE_CHECKING:
+    from .taxonomy import TaxonomyIndex
+
+
+# Rows carrying master data instead of a position: tag -> MasterData field.
+_MASTER_FIELDS = {"ebilanz:stichtag": "stichtag", "identifier": "identifier", "unit": "unit"}
+
+_READ_BUFFER = 1024 * 1024
+
+
+def _open_csv(source: Union[Path, TextIO]):
+    if hasattr(source, "read"):
+        return contextlib.nullcontext(source)
+    return Path(source).open(newline="", encoding="utf-8", buffering=_READ_BUFFER)
+
+
+def _read_rows(
+    csvfile: TextIO,
+    master_data_kwargs: Dict[str, Optional[str]],
+    add: Callable[[str, str, Optional[str]], None],
+) -> None:
+    reader = csv.DictReader(csvfile)
+    for row in reader:
+        tag = (row.get("tag") or "").strip()
+        value = (row.get("value") or "").strip()
+        context = (row.get("context") or "").strip() or None
+
+        if not tag:
+            continue
+
+        if tag == "ebilanz:stichtag":
+            master_data_kwargs["stichtag"] = value
+            continue
+        if tag == "identifier":
+            master_data_kwargs["identifier"] = value
+            continue
+        if tag == "unit":
+            master_data_kwargs["unit"] = value
+            continue
+
+        add(tag, value, context)
+
+
+def _read_rows_fast(
+    csvfile: TextIO,
+    master_data_kwargs: Dict[str, Optional[str]],
+    add: Callable[[str, str, Optional[str]], None],
+) -> None:
+    """``csv.reader`` counterpart of ``_read_rows``.
+
+    Columns are looked up by index from the header (the last of duplicate
+    names wins and short rows read as empty, as with ``DictReader``). Tags and
+    contexts repeat across a filing and are interned.
+    """
+    reader = csv.reader(csvfile)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = {name: i for i, name in enumerate(header)}
+    tag_i = columns.get("tag")
+    if tag_i is None:
+        return
+    value_i = columns.get("value", -1)
+    context_i = columns.get("context", -1)
+    master_fields = _MASTER_FIELDS
+    intern = sys.intern
+
+    for row in reader:
+        n = len(row)
+        if tag_i >= n:
+            continue
+        tag = row[tag_i].strip()
+        if not tag:
+            continue
+        value = row[value_i].strip() if 0 <= value_i < n else ""
+        field = master_fields.get(tag)
+        if field is not None:
+            master_data_kwargs[field] = value
+            continue
+        context = row[context_i].strip() if 0 <= context_i < n else ""
+        add(intern(tag), value, intern(context) if context else None)
+
+
+@traced("parse_csv")
+def parse_csv(
+    source: Union[Path, TextIO],
+    columnar: bool = False,
+    fast: bool = False,
+    taxonomy: Union[Path, "TaxonomyIndex", None] = None,
+) -> EBilanz:
+    """Read a CSV file or text stream and return an EBilanz model.
+
+    With ``columnar=True`` the positions are collected in a ``PositionTable``
+    instead of a list of ``Position`` objects, which is much smaller for large
+    filings. ``fast=True`` reads rows with ``csv.reader`` and header-index
+    lookup instead of ``csv.DictReader``; the resulting model is the same.
+    With a ``taxonomy`` (a schema path or a loaded
+    :class:`~pytaxel.ebilanz.taxonomy.TaxonomyIndex`) every position tag is
+    checked against it and :class:`~pytaxel.ebilanz.taxonomy.UnknownTagError`
+    lists the tags it does not define.
 
     Expected columns:
     - tag: XML tag (e.g., ebilanz:stichtag, ebilanz:bilanz.summeAktiva)
     - value: stringified value
     - context (optional): context identifier (e.g., context1/context2)
     """
-    positions: List[Position] = []
+    positions: Positions = PositionTable() if columnar else []
     master_data_kwargs = {"stichtag": None, "identifier": None, "unit": "EUR"}
 
-    with path.open(newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            tag = (row.get("tag") or "").strip()
-            value = (row.get("value") or "").strip()
-            context = (row.get("context") or "").strip() or None
-
-            if not tag:
-                continue
-
-            if tag == "ebilanz:stichtag":
-                master_data_kwargs["stichtag"] = value
-                continue
-            if tag == "identifier":
-                master_data_kwargs["identifier"] = value
-                continue
-            if tag == "unit":
-                master_data_kwargs["unit"] = value
-                continue
-
-            positions.append(Position(tag=tag, value=value, context=context))
+    if columnar:
+        add = positions.append
+    else:
+        def add(tag: str, value: str, context: Optional[str]) -> None:
+            positions.append(Position(tag, value, context))
+
+    if taxonomy is not None:
+        from .taxonomy import TaxonomyIndex, UnknownTagError, load_taxonomy
+
+        index = taxonomy if isinstance(taxonomy, TaxonomyIndex) else load_taxonomy(taxonomy)
+        unknown: Dict[str, None] = {}
+        add_position = add
+
+        def add(tag: str, value: str, context: Optional[str]) -> None:
+            if tag not in index:
+                unknown[tag] = None
+            add_position(tag, value, context)
+
+    read_rows = _read_rows_fast if fast else _read_rows
+    with _open_csv(source) as csvfile:
+        read_rows(csvfile, master_data_kwargs, add)
+    if taxonomy is not None and unknown:
+        raise UnknownTagError(list(unknown), index)
 
     if master_data_kwargs["stichtag"] is None:
         master_data_kwargs["stichtag"] = ""
@@ -4,8 +4,13 @@ from __future__ import annotations
 
 import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from .model import EBilanz, Position
+from pytaxel.profiling import traced
+
+from .mapping import CompiledMapping, context_element, fact_attributes, load_mapping, unit_element
+from .model import EBilanz, PositionRow, Positions, PositionTable
+from .templates import STICHTAG_TAG, CompiledTemplate, load_template
 
 NS = {
     "elster": "http://www.elster.de/elsterxml/schema/v11",
@@ -27,31 +32,125 @@ def _ns_tag(tag: str) -> str:
     return f"{{{uri}}}{local}"
 
 
-def render_ebilanz(model: EBilanz, template_path: Path) -> ET.ElementTree:
-    """Load the template XML and populate it with model data."""
-    tree = ET.parse(template_path)
-    root = tree.getroot()
+@traced("render")
+def render_ebilanz(
+    model: EBilanz,
+    template: Union[Path, CompiledTemplate],
+    mapping: Union[Path, CompiledMapping, None] = None,
+) -> ET.ElementTree:
+    """Populate a copy of the template XML with model data.
 
-    ebilanz_node = root.find(".//{http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema}EBilanz")
-    if ebilanz_node is None:
-        raise ValueError("Template is missing EBilanz element")
+    ``template`` is either a path, resolved through the compiled-template cache,
+    or an already compiled template. Without a ``mapping`` each tag is written
+    once, ignoring contexts and the unit. With one (a path or a
+    :class:`~pytaxel.ebilanz.mapping.CompiledMapping`) every position becomes
+    a fact carrying ``contextRef``/``unitRef``, one element per tag and
+    context, and the used ``xbrli:context``/``xbrli:unit`` definitions are
+    inserted after the stichtag.
+    """
+    if not isinstance(template, CompiledTemplate):
+        template = load_template(template)
+    if mapping is not None and not isinstance(mapping, CompiledMapping):
+        mapping = load_mapping(mapping)
+    # The index of the EBilanz node's children lets each position be placed in O(1).
+    tree, ebilanz_node, index = template.instantiate()
 
     # Set stichtag
-    stichtag_node = ebilanz_node.find(_ns_tag("ebilanz:stichtag"))
-    if stichtag_node is None:
-        stichtag_node = ET.SubElement(ebilanz_node, _ns_tag("ebilanz:stichtag"))
-    stichtag_node.text = model.master.stichtag
+    _set_child_text(ebilanz_node, index, STICHTAG_TAG, model.master.stichtag)
 
     # Attach positions
-    for pos in model.positions:
-        _add_position(ebilanz_node, pos)
+    if mapping is None:
+        for tag, value in _qualified_values(model.positions):
+            _set_child_text(ebilanz_node, index, tag, value)
+    else:
+        _place_facts(ebilanz_node, index, model, mapping)
 
     return tree
 
 
-def _add_position(parent: ET.Element, position: Position) -> None:
-    tag = _ns_tag(position.tag)
-    node = parent.find(tag)
+def _qualified_values(positions: Positions) -> Iterator[Tuple[str, str]]:
+    """Yield ``(Clark-notation tag, value)`` for a position list or table."""
+    if isinstance(positions, PositionTable):
+        # Resolve each distinct tag once instead of once per row.
+        tags = [_ns_tag(tag) for tag in positions.tags]
+        for tag_id, value in zip(positions.tag_ids, positions.values):
+            yield tags[tag_id], value
+    else:
+        for position in positions:
+            yield _ns_tag(position.tag), position.value
+
+
+def _rows(positions: Positions) -> Iterable[PositionRow]:
+    if isinstance(positions, PositionTable):
+        return positions.iter_rows()
+    return ((position.tag, position.value, position.context) for position in positions)
+
+
+def _place_facts(node: ET.Element, index: Dict[str, ET.Element], model: EBilanz, mapping: CompiledMapping) -> None:
+    """Write positions as facts, one element per tag and context.
+
+    Tag/context pairs repeat across a filing, so each is resolved against the
+    mapping once; the template's own element for a tag holds its first context
+    and the facts for further contexts follow it, keeping taxonomy order.
+    """
+    unit = model.master.unit
+    resolved: Dict[Tuple[str, Optional[str]], Tuple[str, str, Dict[str, str]]] = {}
+    facts: Dict[Tuple[str, str], ET.Element] = {}
+    first: Dict[str, ET.Element] = {}  # tag -> its first fact
+    following: Dict[ET.Element, List[ET.Element]] = {}  # first fact -> facts for further contexts
+    for tag, value, context in _rows(model.positions):
+        entry = resolved.get((tag, context))
+        if entry is None:
+            context_ref, unit_ref, decimals = fact_attributes(mapping, tag, context, unit)
+            attrib = {"contextRef": context_ref}
+            if unit_ref:
+                attrib["unitRef"] = unit_ref
+            if decimals:
+                attrib["decimals"] = decimals
+            entry = resolved[(tag, context)] = (_ns_tag(tag), context_ref, attrib)
+        qualified, context_ref, attrib = entry
+        element = facts.get((qualified, context_ref))
+        if element is None:
+            head = first.get(qualified)
+            if head is not None:
+                element = ET.Element(qualified)
+                following.setdefault(head, []).append(element)
+            else:
+                element = index.pop(qualified, None)
+                if element is None:
+                    element = ET.SubElement(node, qualified)
+                first[qualified] = element
+            element.attrib.update(attrib)
+            facts[(qualified, context_ref)] = element
+        element.text = value
+    if following:
+        # Rebuilt once; inserting each fact at its position would be quadratic.
+        children: List[ET.Element] = []
+        for child in node:
+            children.append(child)
+            children.extend(following.get(child, ()))
+        node[:] = children
+
+    # Declared in document order, so re-rendering extracted facts gives the same document.
+    contexts: Dict[str, None] = {}  # insertion-ordered sets
+    units: Dict[str, None] = {}
+    for element in node:
+        if "contextRef" in element.attrib:
+            contexts[element.get("contextRef")] = None
+            if "unitRef" in element.attrib:
+                units[element.get("unitRef")] = None
+    definitions = [context_element(ref, model.master.stichtag, model.master.identifier) for ref in contexts]
+    definitions += [unit_element(unit_id) for unit_id in units]
+    if not definitions:
+        return
+    stichtag = index.get(STICHTAG_TAG)
+    position = list(node).index(stichtag) + 1 if stichtag is not None else 0
+    node[position:position] = definitions
+
+
+def _set_child_text(parent: ET.Element, index: Dict[str, ET.Element], tag: str, text: str) -> None:
+    node = index.get(tag)
     if node is None:
         node = ET.SubElement(parent, tag)
-    node.text = position.value
+        index[tag] = node
+    node.text = text
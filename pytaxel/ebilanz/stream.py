@@ -0,0 +1,224 @@
+"""Streaming renderer that writes eBilanz XML without building the output tree.
+
+The compiled template (from the same cache as :func:`render_ebilanz`) is
+serialised directly; it is never copied or modified, and positions are
+written straight to the output instead of becoming elements. The
+serialisation mirrors ``ElementTree.write`` so the result is byte-identical to
+``render_ebilanz(...).write(...)``.
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Optional, TextIO, Union
+
+from pytaxel.profiling import traced
+
+from .mapping import XBRLI_NS
+from .model import EBilanz
+from .renderer import NS, _qualified_values
+from .templates import STICHTAG_TAG, CompiledTemplate, load_template
+
+PathLike = Union[str, Path]
+
+# Namespace -> prefix, as ``ElementTree.write`` assigns them: the namespaces
+# registered by the renderer and mapping modules plus ElementTree's defaults
+# that can appear in templates. Others get ``ns0``, ``ns1``, ...
+PREFIXES: Dict[str, str] = {uri: "" if prefix == "elster" else prefix for prefix, uri in NS.items()}
+PREFIXES.update(
+    {
+        XBRLI_NS: "xbrli",
+        "http://www.w3.org/XML/1998/namespace": "xml",
+        "http://www.w3.org/2001/XMLSchema": "xs",
+        "http://www.w3.org/2001/XMLSchema-instance": "xsi",
+    }
+)
+
+
+def _escape_text(text: str) -> str:
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attrib(text: str) -> str:
+    text = _escape_text(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+class _QNames:
+    """Clark-notation → prefixed name mapping, assigned like ``ElementTree.write``."""
+
+    def __init__(self) -> None:
+        self.qnames: Dict[str, str] = {}
+        self.namespaces: Dict[str, str] = {}
+
+    def add(self, qname: str) -> None:
+        if qname in self.qnames:
+            return
+        if qname[:1] != "{":
+            self.qnames[qname] = qname
+            return
+        uri, local = qname[1:].rsplit("}", 1)
+        prefix = self.namespaces.get(uri)
+        if prefix is None:
+            prefix = PREFIXES.get(uri)
+            if prefix is None:
+                prefix = f"ns{len(self.namespaces)}"
+            if prefix != "xml":
+                self.namespaces[uri] = prefix
+        self.qnames[qname] = f"{prefix}:{local}" if prefix else local
+
+    def __getitem__(self, qname: str) -> str:
+        return self.qnames[qname]
+
+    def declarations(self) -> str:
+        parts = []
+        for uri, prefix in sorted(self.namespaces.items(), key=lambda item: item[1]):
+            name = f"xmlns:{prefix}" if prefix else "xmlns"
+            parts.append(f' {name}="{_escape_attrib(uri)}"')
+        return "".join(parts)
+
+
+def _collect_qnames(model: EBilanz, template: CompiledTemplate) -> _QNames:
+    """Collect all names up front so namespace declarations can go on the root start tag."""
+    qnames = _QNames()
+    for elem in template.root.iter():
+        qnames.add(elem.tag)
+        for key in elem.keys():
+            qnames.add(key)
+    qnames.add(STICHTAG_TAG)
+    for tag, _value in _qualified_values(model.positions):
+        qnames.add(tag)
+    return qnames
+
+
+class _StreamWriter:
+    def __init__(self, write, qnames: _QNames):
+        self.write = write
+        self.qnames = qnames
+        self._declared = False
+
+    def start_tag(self, elem: ET.Element, close: str = ">") -> None:
+        parts = ["<", self.qnames[elem.tag]]
+        if not self._declared:
+            parts.append(self.qnames.declarations())
+            self._declared = True
+        for key, value in elem.items():
+            parts.append(f' {self.qnames[key]}="{_escape_attrib(value)}"')
+        parts.append(close)
+        self.write("".join(parts))
+
+    def end_tag(self, tag: str) -> None:
+        self.write(f"</{self.qnames[tag]}>")
+
+    def leaf(self, tag: str, text: Optional[str]) -> None:
+        name = self.qnames[tag]
+        if text:
+            self.write(f"<{name}>{_escape_text(text)}</{name}>")
+        else:
+            self.write(f"<{name} />")
+
+    def text(self, text: Optional[str]) -> None:
+        if text:
+            self.write(_escape_text(text))
+
+    def subtree(self, elem: ET.Element, text: Optional[str] = None) -> None:
+        """Write ``elem`` and its children; ``text`` replaces the element's own text if given."""
+        if text is None:
+            text = elem.text
+        if text or len(elem):
+            self.start_tag(elem)
+            self.text(text)
+            for child in elem:
+                self.subtree(child)
+                self.text(child.tail)
+            self.end_tag(elem.tag)
+        else:
+            self.start_tag(elem, close=" />")
+
+
+def _write_ebilanz(writer: _StreamWriter, anchor: ET.Element, model: EBilanz) -> None:
+    """Write the EBilanz element with the model applied, streaming new positions.
+
+    The template element is left untouched: values for its children are kept
+    aside and written in place of their text.
+    """
+    index: Dict[str, ET.Element] = {}
+    for child in anchor:
+        index.setdefault(child.tag, child)
+    texts: Dict[ET.Element, str] = {}
+    # Tags missing from the template become new elements in first-seen order,
+    # each carrying the last value assigned to it (as render_ebilanz does).
+    appended: Dict[str, str] = {}
+
+    def assign(tag: str, value: str) -> None:
+        node = index.get(tag)
+        if node is not None:
+            texts[node] = value
+        else:
+            appended[tag] = value
+
+    assign(STICHTAG_TAG, model.master.stichtag)
+    for tag, value in _qualified_values(model.positions):
+        assign(tag, value)
+
+    writer.start_tag(anchor)
+    writer.text(anchor.text)
+    for child in anchor:
+        writer.subtree(child, texts.get(child))
+        writer.text(child.tail)
+    for tag, value in appended.items():
+        writer.leaf(tag, value)
+    writer.end_tag(anchor.tag)
+
+
+def _write_tree(writer: _StreamWriter, elem: ET.Element, anchor: ET.Element, model: EBilanz) -> None:
+    if elem is anchor:
+        _write_ebilanz(writer, elem, model)
+    elif elem.text or len(elem):
+        writer.start_tag(elem)
+        writer.text(elem.text)
+        for child in elem:
+            _write_tree(writer, child, anchor, model)
+            writer.text(child.tail)
+        writer.end_tag(elem.tag)
+    else:
+        writer.start_tag(elem, close=" />")
+
+
+@traced("render_stream")
+def stream_ebilanz(model: EBilanz, template: Union[PathLike, CompiledTemplate], output: TextIO) -> None:
+    """Render ``model`` into ``template`` and write the XML to ``output`` incrementally.
+
+    ``template`` is a path, resolved through the compiled-template cache, or
+    an already compiled template.
+    """
+    if not isinstance(template, CompiledTemplate):
+        template = load_template(template)
+    writer = _StreamWriter(output.write, _collect_qnames(model, template))
+    writer.write("<?xml version='1.0' encoding='utf-8'?>\n")
+    _write_tree(writer, template.root, template.anchor, model)
+
+
+def stream_xml_to_file(
+    model: EBilanz, template: Union[PathLike, CompiledTemplate], output_file: PathLike
+) -> Path:
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8", errors="xmlcharrefreplace") as output:
+        stream_ebilanz(model, template, output)
+    return output_path
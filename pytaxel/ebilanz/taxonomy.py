@@ -0,0 +1,219 @@
+"""Precompiled index of the element names a taxonomy defines.
+
+The index is built from the taxonomy's schema files (a single ``.xsd`` or a
+directory searched recursively): every global ``xs:element`` becomes a CSV
+style tag such as ``ebilanz:bilanz.summeAktiva``. It is stored on disk as a
+sorted table (a JSON header line followed by one tag per line) under
+``$PYTAXEL_CACHE_DIR/taxonomy`` or ``~/.cache/pytaxel/taxonomy`` and rebuilt
+only when a schema file's size or mtime changes. Membership checks are set
+lookups; prefix completion bisects the sorted table.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pytaxel.profiling import span, traced
+
+from .extract import NS_TO_PREFIX
+
+PathLike = Union[str, Path]
+
+XS_NS = "http://www.w3.org/2001/XMLSchema"
+# Bump when the on-disk layout or the way tags are derived changes.
+INDEX_FORMAT = 1
+
+Signature = List[Tuple[str, int, int]]
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("PYTAXEL_CACHE_DIR")
+    if env:
+        return Path(env) / "taxonomy"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pytaxel" / "taxonomy"
+
+
+class UnknownTagError(ValueError):
+    """Raised when positions use tags the taxonomy does not define.
+
+    Close matches are only looked up when the message or
+    :meth:`suggestions` is asked for, since callers may just count the tags.
+    """
+
+    def __init__(self, tags: Sequence[str], index: "TaxonomyIndex"):
+        self.tags = list(tags)
+        self.index = index
+        self._suggestions: Optional[Dict[str, List[str]]] = None
+        super().__init__(self.tags, index)
+
+    def suggestions(self) -> Dict[str, List[str]]:
+        """Close known tags for each unknown tag, computed once."""
+        if self._suggestions is None:
+            self._suggestions = {tag: self.index.suggest(tag) for tag in self.tags}
+        return self._suggestions
+
+    def __str__(self) -> str:
+        details = [
+            f"{tag} (did you mean {', '.join(close)}?)" if close else tag for tag, close in self.suggestions().items()
+        ]
+        return f"Unknown tag(s) in taxonomy {self.index.source}: " + "; ".join(details)
+
+
+class TaxonomyIndex:
+    """Sorted, de-duplicated tags of a taxonomy."""
+
+    def __init__(self, tags: Iterable[str], source: Optional[Path] = None):
+        self.tags: Tuple[str, ...] = tuple(sorted(set(tags)))
+        self.source = source
+        self._members = frozenset(self.tags)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, tag: object) -> bool:
+        return tag in self._members
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """Up to ``limit`` tags starting with ``prefix``, in sorted order."""
+        start = bisect.bisect_left(self.tags, prefix)
+        matches = []
+        for tag in self.tags[start:]:
+            if not tag.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(tag)
+        return matches
+
+    def suggest(self, tag: str, limit: int = 3) -> List[str]:
+        """Closest known tags for a misspelt ``tag`` (for error messages)."""
+        return difflib.get_close_matches(tag, self.tags, n=limit, cutoff=0.8)
+
+
+def _schema_files(source: Path) -> List[Path]:
+    if source.is_dir():
+        return sorted(source.rglob("*.xsd"))
+    return [source]
+
+
+def _signature(source: Path, files: List[Path]) -> Signature:
+    signature = []
+    for path in files:
+        stat = path.stat()
+        name = path.relative_to(source).as_posix() if source.is_dir() else path.name
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def _schema_tags(path: Path) -> List[str]:
+    """CSV-style tags of the global element declarations in one schema file."""
+    declared: Dict[str, str] = {}  # namespace -> first prefix declared for it
+    depth = 0
+    root: Optional[ET.Element] = None
+    names: List[str] = []
+    for event, item in ET.iterparse(str(path), events=("start-ns", "start", "end")):
+        if event == "start-ns":
+            prefix, uri = item
+            if prefix:
+                declared.setdefault(uri, prefix)
+            continue
+        if event == "start":
+            if root is None:
+                root = item
+            elif depth == 1 and item.tag == f"{{{XS_NS}}}element" and item.get("name"):
+                names.append(item.get("name"))
+            depth += 1
+            continue
+        depth -= 1
+        if depth:
+            item.clear()
+    if root is None or root.tag != f"{{{XS_NS}}}schema":
+        raise ValueError(f"{path} is not an XML schema")
+    namespace = root.get("targetNamespace", "")
+    prefix = NS_TO_PREFIX.get(namespace) or declared.get(namespace, "")
+    return [f"{prefix}:{name}" if prefix else name for name in names]
+
+
+@traced("taxonomy_build")
+def build_index(source: PathLike) -> TaxonomyIndex:
+    """Parse the schema file(s) at ``source`` into an index (no caching)."""
+    source = Path(source)
+    files = _schema_files(source)
+    if not files:
+        raise ValueError(f"No .xsd files found in {source}")
+    tags: List[str] = []
+    for path in files:
+        tags.extend(_schema_tags(path))
+    return TaxonomyIndex(tags, source=source)
+
+
+def _index_path(cache_dir: Path, source: Path) -> Path:
+    digest = hashlib.sha256(str(source).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"{source.name}-{digest}.tags"
+
+
+def _read_index(path: Path, source: Path, signature: Signature) -> Optional[TaxonomyIndex]:
+    try:
+        header, _, body = path.read_text(encoding="utf-8").partition("\n")
+        meta = json.loads(header)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != INDEX_FORMAT or [tuple(entry) for entry in meta.get("signature", ())] != signature:
+        return None
+    return TaxonomyIndex(body.splitlines(), source=source)
+
+
+def _write_index(path: Path, index: TaxonomyIndex, signature: Signature) -> None:
+    header = json.dumps({"format": INDEX_FORMAT, "source": str(index.source), "signature": signature})
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(header + "\n" + "\n".join(index.tags))
+        os.replace(tmp, path)
+    except OSError:
+        pass  # a read-only cache only costs a rebuild next time
+
+
+_loaded: Dict[Tuple[str, str], Tuple[Signature, TaxonomyIndex]] = {}
+_lock = threading.Lock()
+
+
+def load_taxonomy(source: PathLike, cache_dir: Optional[PathLike] = None) -> TaxonomyIndex:
+    """Return the index for the taxonomy at ``source``, building it only when it changed.
+
+    Indexes are kept per process and on disk in ``cache_dir`` (default
+    :func:`default_cache_dir`); either is reused as long as the schema files'
+    names, sizes and mtimes are unchanged.
+    """
+    source = Path(source).resolve()
+    cache_root = Path(cache_dir) if cache_dir else default_cache_dir()
+    with span("taxonomy_lookup"):
+        signature = _signature(source, _schema_files(source))
+        key = (str(source), str(cache_root))
+        with _lock:
+            entry = _loaded.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        path = _index_path(cache_root, source)
+        index = _read_index(path, source, signature)
+    if index is None:
+        index = build_index(source)
+        _write_index(path, index, signature)
+    with _lock:
+        _loaded[key] = (signature, index)
+    return index
+
+
+def clear_taxonomy_cache() -> None:
+    """Forget the indexes loaded in this process (the on-disk tables stay)."""
+    with _lock:
+        _loaded.clear()
@@ -1,3 +1,134 @@
 """Template and mapping helpers bridging CSV to eBilanz XML."""
 
-# TODO: Implement in M2/M3
+from __future__ import annotations
+
+import copy
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from pytaxel.profiling import traced
+
+EBILANZ_TAG = "{http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema}EBilanz"
+STICHTAG_TAG = "{http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema}stichtag"
+
+DEFAULT_CACHE_SIZE = 16
+
+
+class CompiledTemplate:
+    """A parsed eBilanz template with the EBilanz anchor resolved up front.
+
+    The parsed tree must not be modified; :meth:`instantiate` returns a deep
+    copy so renders cannot leak into each other. ``anchor`` is the EBilanz
+    element of the shared tree, for readers such as the streaming renderer.
+    """
+
+    def __init__(self, root: ET.Element, source: Optional[Path] = None):
+        self.root = root
+        self.source = source
+        self._anchor_path = _element_path(root, EBILANZ_TAG)
+        if self._anchor_path is None:
+            raise ValueError("Template is missing EBilanz element")
+        anchor = self.anchor = self._walk(root)
+        # Positions of the first child per tag (stichtag included), mirroring
+        # ``anchor.find(tag)``.
+        self._child_positions: Dict[str, int] = {}
+        for position, child in enumerate(anchor):
+            self._child_positions.setdefault(child.tag, position)
+
+    @classmethod
+    @traced("template_parse")
+    def from_path(cls, path: Union[str, Path]) -> "CompiledTemplate":
+        path = Path(path)
+        return cls(ET.parse(path).getroot(), source=path)
+
+    def _walk(self, root: ET.Element) -> ET.Element:
+        node = root
+        for position in self._anchor_path:
+            node = node[position]
+        return node
+
+    def instantiate(self) -> Tuple[ET.ElementTree, ET.Element, Dict[str, ET.Element]]:
+        """Return a fresh tree, its EBilanz node and a tag index of that node's children."""
+        root = copy.deepcopy(self.root)
+        anchor = self._walk(root)
+        index = {tag: anchor[position] for tag, position in self._child_positions.items()}
+        return ET.ElementTree(root), anchor, index
+
+
+def _element_path(node: ET.Element, tag: str) -> Optional[Tuple[int, ...]]:
+    """Child-index path to the first descendant with ``tag`` in document order."""
+    for position, child in enumerate(node):
+        if child.tag == tag:
+            return (position,)
+        found = _element_path(child, tag)
+        if found is not None:
+            return (position,) + found
+    return None
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _FileCache:
+    """Thread-safe LRU of files compiled by ``loader``, keyed by resolved path and mtime."""
+
+    def __init__(self, loader: Callable[[Path], Any], maxsize: int = DEFAULT_CACHE_SIZE):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Union[str, Path]) -> Any:
+        resolved = Path(path).resolve()
+        key = (str(resolved), resolved.stat().st_mtime_ns)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = self.loader(resolved)
+        with self._lock:
+            # Drop stale entries for the same file before inserting the new mtime.
+            for stale in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[stale]
+            self._entries[key] = compiled
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = _FileCache(CompiledTemplate.from_path)
+
+
+def load_template(path: Union[str, Path]) -> CompiledTemplate:
+    """Return the compiled template for ``path``, parsing it only when it changed."""
+    return _cache.get(path)
+
+
+def template_cache_info() -> CacheInfo:
+    return _cache.info()
+
+
+def clear_template_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,19 @@
+"""Process-level helpers around the eric-py ERiC bindings."""
+
+from .batch import ValidationBatchResult, validate_batch
+from .cache import CachedValidation, ValidationCache, cache_key
+from .pool import EricJobResult, EricWorkerCrashed, EricWorkerPool
+from .report import Finding, ValidationReport
+
+__all__ = [
+    "CachedValidation",
+    "EricJobResult",
+    "EricWorkerCrashed",
+    "EricWorkerPool",
+    "Finding",
+    "ValidationBatchResult",
+    "ValidationCache",
+    "ValidationReport",
+    "cache_key",
+    "validate_batch",
+]
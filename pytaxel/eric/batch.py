@@ -0,0 +1,197 @@
+"""Validate many eBilanz XML files with ERiC loaded once.
+
+With ``jobs=1`` a single client is opened in the current process and every
+file is validated in that ERiC session. With ``jobs > 1`` the files are spread
+over an :class:`~pytaxel.eric.pool.EricWorkerPool`, whose isolated worker
+processes each load ERiC once; a crashing worker only fails its own file.
+Every file gets its own log subdirectory and the run is summarised in
+``summary.json``.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type, Union
+
+from pytaxel.profiling import span
+
+from .cache import ValidationCache, validate_with_cache
+from .pool import DEFAULT_CLIENT, ClientFactory, EricWorkerPool, _resolve_factory
+
+PathLike = Union[str, Path]
+
+SUMMARY_FILE = "summary.json"
+# ERiC's own session log (eric.log) is written here; per-file responses go next to it.
+SESSION_LOG_DIR = "eric"
+
+
+@dataclass
+class ValidationBatchResult:
+    """Outcome of validating a single file in a batch."""
+
+    source: Path
+    log_dir: Path
+    ok: bool
+    code: Optional[int] = None
+    cached: bool = False
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+def _log_names(paths: List[Path]) -> List[str]:
+    """Per-file log directory names: the file stem, numbered when stems repeat."""
+    totals = Counter(path.stem for path in paths)
+    seen: Counter = Counter()
+    names = []
+    for path in paths:
+        stem = path.stem
+        seen[stem] += 1
+        unique = totals[stem] == 1 and stem != SESSION_LOG_DIR
+        names.append(stem if unique else f"{stem}-{seen[stem]}")
+    return names
+
+
+def _write_logs(log_dir: Path, validation_response: str, server_response: str) -> None:
+    log_dir.mkdir(parents=True, exist_ok=True)
+    (log_dir / "validation_response.xml").write_text(validation_response or "", encoding="utf-8")
+    (log_dir / "server_response.xml").write_text(server_response or "", encoding="utf-8")
+
+
+def _validate_one(
+    source: Path,
+    log_dir: Path,
+    datenart_version: str,
+    eric_home: Optional[str],
+    cache: Optional[ValidationCache],
+    validate: Callable[[str], Any],
+    fatal: Tuple[Type[BaseException], ...],
+) -> ValidationBatchResult:
+    start = time.perf_counter()
+    try:
+        xml_text = source.read_text(encoding="utf-8")
+        result, cached = validate_with_cache(
+            cache, xml_text, datenart_version, eric_home, lambda: validate(xml_text)
+        )
+        _write_logs(log_dir, result.validation_response, result.server_response)
+    except fatal:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        return ValidationBatchResult(
+            source, log_dir, False, getattr(exc, "code", None), False, str(exc), time.perf_counter() - start
+        )
+    return ValidationBatchResult(
+        source, log_dir, result.code == 0, result.code, cached, None, time.perf_counter() - start
+    )
+
+
+def validate_batch(
+    xml_files: Iterable[PathLike],
+    datenart_version: str,
+    log_dir: PathLike,
+    eric_home: Optional[str] = None,
+    jobs: int = 1,
+    cache: Optional[ValidationCache] = None,
+    client_factory: Optional[ClientFactory] = None,
+    fatal: Tuple[Type[BaseException], ...] = (ImportError,),
+) -> List[ValidationBatchResult]:
+    """Validate each file and return the results in input order.
+
+    Responses are written to ``log_dir/<stem>/`` and a summary of codes and
+    durations to ``log_dir/summary.json``. A file counts as ok when ERiC
+    returned code 0. Exceptions of the ``fatal`` types (ERiC cannot be
+    loaded at all) abort the batch instead of failing every file. Cached
+    results never start ERiC, so a fully cached batch does not load it.
+    """
+    paths = [Path(p) for p in xml_files]
+    log_root = Path(log_dir)
+    session_log = log_root / SESSION_LOG_DIR
+    log_dirs = [log_root / name for name in _log_names(paths)]
+    factory = client_factory or DEFAULT_CLIENT
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+
+    if jobs <= 1:
+        client = None
+
+        def validate(xml_text: str) -> Any:
+            nonlocal client
+            if client is None:
+                session_log.mkdir(parents=True, exist_ok=True)
+                with span("eric_init"):
+                    opened = _resolve_factory(factory)(eric_home=eric_home, log_dir=session_log)
+                    opened.__enter__()
+                client = opened
+            with span("eric_validate"):
+                return client.validate_xml(xml_text, datenart_version)
+
+        try:
+            results = [
+                _validate_one(path, out, datenart_version, eric_home, cache, validate, fatal)
+                for path, out in zip(paths, log_dirs)
+            ]
+        finally:
+            if client is not None:
+                client.__exit__(None, None, None)
+    else:
+        with EricWorkerPool(
+            size=jobs, eric_home=eric_home, log_dir=session_log, client_factory=factory
+        ) as pool, ThreadPoolExecutor(max_workers=jobs) as executor:
+
+            def validate(xml_text: str) -> Any:
+                return pool.validate(xml_text, datenart_version)
+
+            futures = [
+                executor.submit(_validate_one, path, out, datenart_version, eric_home, cache, validate, fatal)
+                for path, out in zip(paths, log_dirs)
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    duration = time.perf_counter() - start
+    _write_summary(log_root / SUMMARY_FILE, results, datenart_version, eric_home, jobs, started, duration)
+    return results
+
+
+def _write_summary(
+    path: Path,
+    results: List[ValidationBatchResult],
+    datenart_version: str,
+    eric_home: Optional[str],
+    jobs: int,
+    started: datetime,
+    duration: float,
+) -> Path:
+    failed = sum(1 for result in results if not result.ok)
+    codes = Counter(result.code for result in results if result.code is not None)
+    files = []
+    for result in results:
+        entry = asdict(result)
+        entry["source"] = str(result.source)
+        entry["log_dir"] = str(result.log_dir)
+        files.append(entry)
+    summary = {
+        "datenart_version": datenart_version,
+        "eric_home": eric_home,
+        "jobs": jobs,
+        "started": started.isoformat(timespec="seconds"),
+        "duration": duration,
+        "total": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "cached": sum(1 for result in results if result.cached),
+        "codes": {str(code): count for code, count in sorted(codes.items())},
+        "files": files,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    return path
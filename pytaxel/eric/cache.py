@@ -0,0 +1,256 @@
+"""Content-addressed on-disk cache of ERiC validation results.
+
+Entries are keyed by the canonical fingerprint of the XML (so cosmetic
+differences hit the same entry), the datenart version and the ERiC version.
+They hold the return code, the validation and server responses and the print
+PDF if one was produced. The cache is evicted least-recently-used first
+once it grows past ``max_bytes``. Only validation results belong here; sending
+has side effects and must never be answered from a cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+from pytaxel.ebilanz.canonical import fingerprint
+from pytaxel.profiling import span
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+PathLike = Union[str, Path]
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("PYTAXEL_CACHE_DIR")
+    if env:
+        return Path(env) / "validation"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pytaxel" / "validation"
+
+
+def detect_installed_eric_version(eric_home: Optional[str]) -> Optional[str]:
+    """ERiC version of the installation at ``eric_home`` (or ``ERIC_HOME``), if known."""
+    try:
+        from eric_py.loader import eric_plugin_path
+        from eric_py.versioning import detect_eric_version
+
+        return detect_eric_version(eric_plugin_path(eric_home))
+    except Exception:  # noqa: BLE001
+        return None
+
+
+# sha256 of uploaded bytes -> content fingerprint of the XML decoded from them.
+_FINGERPRINT_MEMO_SIZE = 256
+_fingerprints: "OrderedDict[str, str]" = OrderedDict()
+_fingerprints_lock = threading.Lock()
+
+
+def _content_fingerprint(xml: Union[str, bytes]) -> str:
+    try:
+        return fingerprint(xml)
+    except ET.ParseError:
+        # Not well-formed: ERiC will reject it, and only identical bytes can match.
+        data = xml.encode("utf-8") if isinstance(xml, str) else xml
+        return "raw:" + hashlib.sha256(data).hexdigest()
+
+
+def content_fingerprint(xml: Union[str, bytes], digest: Optional[str] = None) -> str:
+    """Canonical fingerprint of ``xml``, or ``raw:<sha256>`` of its bytes if it is not well-formed.
+
+    ``digest`` is the sha256 of the bytes ``xml`` was read from (as hashed
+    while uploading); with it, repeated inputs skip canonicalisation.
+    """
+    if digest is None:
+        return _content_fingerprint(xml)
+    with _fingerprints_lock:
+        known = _fingerprints.get(digest)
+        if known is not None:
+            _fingerprints.move_to_end(digest)
+            return known
+    content = _content_fingerprint(xml)
+    with _fingerprints_lock:
+        _fingerprints[digest] = content
+        if len(_fingerprints) > _FINGERPRINT_MEMO_SIZE:
+            _fingerprints.popitem(last=False)
+    return content
+
+
+def cache_key(
+    xml: Union[str, bytes],
+    datenart_version: str,
+    eric_version: Optional[str],
+    source_digest: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> str:
+    """``fingerprint`` is ``content_fingerprint(xml, source_digest)`` if the caller already has it."""
+    content = fingerprint or content_fingerprint(xml, source_digest)
+    digest = hashlib.sha256()
+    digest.update(f"{datenart_version}\0{eric_version or 'unknown'}\0{content}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedValidation:
+    code: int
+    validation_response: str
+    server_response: str
+    pdf_path: Optional[Path] = None
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+class ValidationCache:
+    """Validation results stored as ``<root>/<key[:2]>/<key>.json`` (+ ``.pdf``)."""
+
+    def __init__(self, root: Optional[PathLike] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Bytes in the cache as this process sees it: counted once, then kept up to date
+        # by put() and re-counted by each eviction scan (other processes may write too).
+        self._total: Optional[int] = None
+
+    def _paths(self, key: str):
+        folder = self.root / key[:2]
+        return folder / f"{key}.json", folder / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[CachedValidation]:
+        entry_path, pdf_path = self._paths(key)
+        try:
+            data = json.loads(entry_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        has_pdf = data.get("pdf", False)
+        if has_pdf and not pdf_path.exists():
+            return None
+        # The modification time doubles as the LRU timestamp.
+        for path in (entry_path, pdf_path) if has_pdf else (entry_path,):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return CachedValidation(
+            code=data["code"],
+            validation_response=data["validation_response"],
+            server_response=data["server_response"],
+            pdf_path=pdf_path if has_pdf else None,
+        )
+
+    def put(
+        self,
+        key: str,
+        code: int,
+        validation_response: str,
+        server_response: str,
+        pdf_path: Optional[PathLike] = None,
+    ) -> None:
+        entry_path, cached_pdf = self._paths(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        has_pdf = bool(pdf_path) and Path(pdf_path).exists()
+        replaced = _file_size(entry_path) + (_file_size(cached_pdf) if has_pdf else 0)
+        if has_pdf:
+            shutil.copyfile(pdf_path, cached_pdf)
+        payload = {
+            "code": code,
+            "validation_response": validation_response or "",
+            "server_response": server_response or "",
+            "pdf": has_pdf,
+        }
+        # Write-then-rename so concurrent readers never see a partial entry.
+        fd, tmp_name = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_name, entry_path)
+        added = _file_size(entry_path) + (_file_size(cached_pdf) if has_pdf else 0) - replaced
+        with self._lock:
+            if self._total is None:
+                self._total = self.size()
+            else:
+                self._total += added
+            full = self._total > self.max_bytes
+        # Only scanning the cache once it looks full keeps a put O(1).
+        if full:
+            self.evict()
+
+    def size(self) -> int:
+        """Bytes stored in the cache (a full scan)."""
+        return sum(_file_size(path) for path in self.root.glob("*/*"))
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = {}  # key -> [last use, size, files]
+            for path in self.root.glob("*/*"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entry = entries.setdefault(path.name.split(".")[0], [0.0, 0, []])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                entry[2].append(path)
+            total = sum(size for _, size, _ in entries.values())
+            for _, size, paths in sorted(entries.values(), key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                for path in paths:
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+            self._total = total
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        with self._lock:
+            self._total = None
+
+
+def validate_with_cache(
+    cache: Optional[ValidationCache],
+    xml_text: str,
+    datenart_version: str,
+    eric_home: Optional[str],
+    run: Callable[[], Any],
+    pdf_path: Optional[PathLike] = None,
+    source_digest: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> Tuple[Any, bool]:
+    """Answer a validation from ``cache`` or call ``run()`` and store its result.
+
+    Returns ``(result, cache_hit)``. A cached entry without a PDF does not
+    satisfy a request for one. With ``cache=None`` this just calls ``run()``.
+    ``source_digest`` is passed on to :func:`content_fingerprint`; a caller
+    that needs the fingerprint anyway (to log the run) passes it as
+    ``fingerprint`` so the document is not canonicalised twice.
+    """
+    if cache is None:
+        return run(), False
+    with span("cache_lookup"):
+        eric_version = detect_installed_eric_version(eric_home)
+        key = cache_key(xml_text, datenart_version, eric_version, source_digest, fingerprint)
+        cached = cache.get(key)
+    if cached is not None and (not pdf_path or cached.pdf_path):
+        if pdf_path:
+            shutil.copyfile(cached.pdf_path, pdf_path)
+        return cached, True
+    result = run()
+    with span("cache_store"):
+        cache.put(key, result.code, result.validation_response, result.server_response, pdf_path)
+    return result, False
@@ -0,0 +1,260 @@
+"""Rotated, compressed history of ERiC responses.
+
+Every validate or send run gets its own directory under ``<log_dir>/eric-runs``
+named ``<UTC timestamp>-<fingerprint prefix>``, holding the gzip-compressed
+``validation_response.xml.gz`` and ``server_response.xml.gz``. One JSON line
+per run is appended to ``eric-runs/index.jsonl`` (time, operation, code,
+datenart, XML fingerprint, compressed size), so past responses can be found
+without walking the directories. After each write, runs older than
+``max_age`` seconds and the oldest runs beyond ``max_bytes`` are removed.
+The responses of the latest run are also written uncompressed to
+``<log_dir>/validation_response.xml`` and ``server_response.xml``, as before
+(:func:`write_latest` writes only these, for throwaway log directories).
+
+Several processes may share a log directory: the index is appended to and
+rewritten under an exclusive lock on ``eric-runs/index.lock`` (POSIX only),
+and a sink re-reads it whenever its size or inode shows another process
+changed it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are serialised within the process only
+    fcntl = None  # type: ignore[assignment]
+
+from pytaxel.profiling import span
+
+from .cache import content_fingerprint
+
+PathLike = Union[str, Path]
+
+RUNS_DIR = "eric-runs"
+INDEX_FILE = "index.jsonl"
+LOCK_FILE = "index.lock"
+RESPONSE_FILES = ("validation_response.xml", "server_response.xml")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600.0
+
+
+def write_latest(root: PathLike, validation_response: str, server_response: str) -> None:
+    """Write the plain ``validation_response.xml`` and ``server_response.xml`` into ``root``."""
+    for filename, text in zip(RESPONSE_FILES, (validation_response or "", server_response or "")):
+        (Path(root) / filename).write_bytes(text.encode("utf-8"))
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``path`` (created if missing) across processes."""
+    if fcntl is None:
+        yield
+        return
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class LogSink:
+    """Writes ERiC responses into per-run directories under ``root`` and enforces retention.
+
+    ``max_bytes`` and ``max_age`` (seconds) may be ``None`` to disable that
+    limit; ``compress=False`` stores plain ``.xml`` files. The index is kept
+    in memory and only re-read when another process changed it, so a sink
+    should be long-lived (see :func:`log_sink`).
+    """
+
+    def __init__(
+        self,
+        root: PathLike,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        compress: bool = True,
+    ):
+        self.root = Path(root)
+        self.runs = self.root / RUNS_DIR
+        self.index_path = self.runs / INDEX_FILE
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self._entries: Optional[Deque[Dict[str, Any]]] = None
+        self._total = 0
+        self._index_stamp: Optional[Tuple[int, int]] = None  # (inode, size) of the index _entries reflect
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, root: PathLike) -> "LogSink":
+        """Sink configured by ``PYTAXEL_LOG_MAX_MB``, ``PYTAXEL_LOG_MAX_DAYS`` and ``PYTAXEL_LOG_COMPRESS``.
+
+        A limit of 0 disables it.
+        """
+        max_mb = float(os.environ.get("PYTAXEL_LOG_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+        max_days = float(os.environ.get("PYTAXEL_LOG_MAX_DAYS", DEFAULT_MAX_AGE / 24 / 3600))
+        return cls(
+            root,
+            max_bytes=int(max_mb * 1024 * 1024) or None,
+            max_age=max_days * 24 * 3600 or None,
+            compress=os.environ.get("PYTAXEL_LOG_COMPRESS", "1") != "0",
+        )
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Appends change the index's size, rewrites (``os.replace``) its inode."""
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _load(self) -> Deque[Dict[str, Any]]:
+        """The index entries, re-read if another process changed the file since."""
+        stamp = self._stamp()
+        if self._entries is not None and stamp == self._index_stamp:
+            return self._entries
+        entries: Deque[Dict[str, Any]] = deque()
+        try:
+            with self.index_path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # a torn line from an interrupted write
+        except FileNotFoundError:
+            pass
+        self._entries = entries
+        self._index_stamp = stamp
+        self._total = sum(entry.get("bytes", 0) for entry in entries)
+        return entries
+
+    def write(
+        self,
+        validation_response: str,
+        server_response: str,
+        xml_text: Optional[str] = None,
+        operation: str = "validate",
+        code: Optional[int] = None,
+        datenart_version: Optional[str] = None,
+        source_digest: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> Path:
+        """Store one run's responses and return its directory.
+
+        ``fingerprint`` is the XML's :func:`~pytaxel.eric.cache.content_fingerprint`
+        if the caller already computed it; otherwise it is computed here, with
+        ``source_digest`` passed on.
+        """
+        with span("log_write"):
+            now = datetime.now(timezone.utc)
+            if fingerprint is None and xml_text is not None:
+                fingerprint = content_fingerprint(xml_text, source_digest)
+            suffix = fingerprint.split(":")[-1][:12] if fingerprint else operation
+            name = f"{now:%Y%m%dT%H%M%S%fZ}-{suffix}"
+            run_dir = self.runs / name
+            run_dir.mkdir(parents=True, exist_ok=True)
+            size = 0
+            write_latest(self.root, validation_response, server_response)
+            for filename, text in zip(RESPONSE_FILES, (validation_response or "", server_response or "")):
+                data = text.encode("utf-8")
+                if self.compress:
+                    path = run_dir / f"{filename}.gz"
+                    path.write_bytes(gzip.compress(data, compresslevel=6))
+                else:
+                    path = run_dir / filename
+                    path.write_bytes(data)
+                size += path.stat().st_size
+            entry = {
+                "run": name,
+                "time": now.isoformat(timespec="seconds"),
+                "operation": operation,
+                "code": code,
+                "datenart_version": datenart_version,
+                "fingerprint": fingerprint,
+                "bytes": size,
+            }
+            with self._lock, _locked(self.runs / LOCK_FILE):
+                entries = self._load()
+                with self.index_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+                self._index_stamp = self._stamp()
+                entries.append(entry)
+                self._total += size
+                self._prune(now)
+        return run_dir
+
+    def _prune(self, now: datetime) -> None:
+        """Drop expired and over-budget runs, oldest first (caller holds both locks)."""
+        entries = self._load()
+        cutoff = now.timestamp() - self.max_age if self.max_age else None
+        removed = False
+        # Keep at least the run just written.
+        while len(entries) > 1:
+            oldest = entries[0]
+            expired = cutoff is not None and datetime.fromisoformat(oldest["time"]).timestamp() < cutoff
+            too_big = self.max_bytes is not None and self._total > self.max_bytes
+            if not (expired or too_big):
+                break
+            entries.popleft()
+            self._total -= oldest.get("bytes", 0)
+            shutil.rmtree(self.runs / oldest["run"], ignore_errors=True)
+            removed = True
+        if removed:
+            fd, tmp = tempfile.mkstemp(dir=self.runs, prefix=INDEX_FILE, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            os.replace(tmp, self.index_path)
+            self._index_stamp = self._stamp()
+
+    def find(
+        self, fingerprint: Optional[str] = None, operation: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Index entries, newest first, optionally filtered by XML fingerprint and operation."""
+        with self._lock:
+            entries = list(self._load())
+        matches = [
+            entry
+            for entry in reversed(entries)
+            if (fingerprint is None or entry.get("fingerprint") == fingerprint)
+            and (operation is None or entry.get("operation") == operation)
+        ]
+        return matches[:limit] if limit is not None else matches
+
+    def read(self, run: str, filename: str = RESPONSE_FILES[0]) -> str:
+        """Text of ``filename`` (e.g. ``server_response.xml``) from the run named ``run``."""
+        path = self.runs / run / filename
+        if path.exists():
+            return path.read_text(encoding="utf-8")
+        return gzip.decompress((self.runs / run / f"{filename}.gz").read_bytes()).decode("utf-8")
+
+
+# Bounded, since clients choose the web app's log directories.
+_SINKS_MAXSIZE = 32
+_sinks: "OrderedDict[str, LogSink]" = OrderedDict()
+_sinks_lock = threading.Lock()
+
+
+def log_sink(root: PathLike) -> LogSink:
+    """Shared :meth:`LogSink.from_env` sink for ``root``, so the index is read once per process."""
+    key = str(Path(root).resolve())
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None:
+            sink = _sinks[key] = LogSink.from_env(root)
+            if len(_sinks) > _SINKS_MAXSIZE:
+                _sinks.popitem(last=False)
+        else:
+            _sinks.move_to_end(key)
+        return sink
@@ -0,0 +1,339 @@
+"""Pool of long-lived ERiC worker processes.
+
+Loading ``libericapi.so`` and initialising its plugins dominates the cost of a
+single validation, so each worker process keeps one ``EricClient`` open and
+serves validate/send jobs from a queue. ERiC is not reentrant: a worker runs
+one job at a time and is replaced after ``max_jobs`` jobs or when it crashes.
+
+ERiC writes its session log (``eric.log``) into the directory it was
+initialised with, so every worker gets its own ``worker-<n>`` directory under
+the pool's ``log_dir``. A job submitted with a ``log_dir`` also gets the part
+of the session log written while it ran, appended to the same file name
+there.
+"""
+
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import pickle
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+DEFAULT_CLIENT = "eric_py.facade:EricClient"
+
+ClientFactory = Union[str, Callable[..., Any]]
+
+
+@dataclass
+class EricJobResult:
+    """Picklable copy of an ``eric_py`` validate/send result."""
+
+    code: int
+    validation_response: str
+    server_response: str
+    transfer_handle: Optional[Any] = None
+
+
+class EricWorkerCrashed(RuntimeError):
+    """The worker process died while handling a job."""
+
+
+def _resolve_factory(factory: ClientFactory) -> Callable[..., Any]:
+    if not isinstance(factory, str):
+        return factory
+    module_name, _, attr = factory.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _portable(exc: BaseException) -> BaseException:
+    """Return ``exc`` if it survives pickling, otherwise a plain RuntimeError."""
+    try:
+        return pickle.loads(pickle.dumps(exc))
+    except Exception:  # noqa: BLE001
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _eric_error_details(exc: BaseException) -> Optional[Tuple[Any, str]]:
+    """``(code, message)`` if ``exc`` is an ``eric_py`` EricError.
+
+    EricError does not survive pickling (its constructor takes the code), so
+    it crosses the pipe as these two values and is rebuilt by the parent.
+    """
+    try:
+        from eric_py.errors import EricError
+    except ImportError:
+        return None
+    if not isinstance(exc, EricError):
+        return None
+    return exc.code, getattr(exc, "message", None) or str(exc)
+
+
+def _eric_error(code: Any, message: str) -> BaseException:
+    from eric_py.errors import EricError
+
+    return EricError(code, message)
+
+
+def _log_offsets(log_dir: Path) -> Dict[str, int]:
+    return {path.name: path.stat().st_size for path in log_dir.glob("*.log")}
+
+
+def _copy_log_tail(log_dir: Path, offsets: Dict[str, int], target: Path) -> None:
+    """Append what was written to ``log_dir``'s log files since ``offsets`` to the same files in ``target``."""
+    try:
+        for path in log_dir.glob("*.log"):
+            start = offsets.get(path.name, 0)
+            size = path.stat().st_size
+            if size < start:
+                start = 0  # truncated or replaced meanwhile
+            if size == start:
+                continue
+            target.mkdir(parents=True, exist_ok=True)
+            with path.open("rb") as src, (target / path.name).open("ab") as dst:
+                src.seek(start)
+                shutil.copyfileobj(src, dst)
+    except OSError:
+        pass  # the job's result matters more than its log excerpt
+
+
+def _worker_main(conn, factory: ClientFactory, eric_home: Optional[str], log_dir: str) -> None:
+    session_log = Path(log_dir)
+    try:
+        client = _resolve_factory(factory)(eric_home=eric_home, log_dir=session_log)
+        client.__enter__()
+    except BaseException as exc:  # noqa: BLE001
+        conn.send(("init-error", _portable(exc)))
+        return
+    conn.send(("ready", os.getpid()))
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            kind, xml_text, kwargs, job_log_dir = job
+            offsets = _log_offsets(session_log) if job_log_dir else {}
+            try:
+                if kind == "validate":
+                    result = client.validate_xml(xml_text, **kwargs)
+                else:
+                    result = client.send_xml(xml_text, **kwargs)
+                reply = (
+                    "ok",
+                    EricJobResult(
+                        code=result.code,
+                        validation_response=result.validation_response,
+                        server_response=result.server_response,
+                        transfer_handle=getattr(result, "transfer_handle", None),
+                    ),
+                )
+            except Exception as exc:  # noqa: BLE001
+                details = _eric_error_details(exc)
+                reply = ("eric-error", details) if details is not None else ("error", _portable(exc))
+            if job_log_dir:
+                # Before replying, so the log is complete when the caller gets the result.
+                _copy_log_tail(session_log, offsets, Path(job_log_dir))
+            conn.send(reply)
+    finally:
+        client.__exit__(None, None, None)
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ctx, factory: ClientFactory, eric_home: Optional[str], log_dir: Path):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, factory, eric_home, str(log_dir)),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        try:
+            status, payload = self._recv()
+        except EricWorkerCrashed:
+            self.stop()
+            raise
+        if status == "init-error":
+            self.stop()
+            raise payload
+        self.pid = payload
+
+    def _recv(self):
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=1)
+            raise EricWorkerCrashed(
+                f"ERiC worker exited unexpectedly (exit code {self.process.exitcode})"
+            ) from None
+
+    def run(self, kind: str, xml_text: str, kwargs: dict, log_dir: Optional[Path] = None) -> EricJobResult:
+        self.jobs += 1
+        try:
+            self.conn.send((kind, xml_text, kwargs, str(log_dir) if log_dir else None))
+        except OSError:
+            raise EricWorkerCrashed("ERiC worker is no longer running") from None
+        status, payload = self._recv()
+        if status == "error":
+            raise payload
+        if status == "eric-error":
+            raise _eric_error(*payload)
+        return payload
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+class EricWorkerPool:
+    """Dispatch validate/send jobs to ``size`` warm ERiC worker processes.
+
+    ``client_factory`` is a callable or ``"module:attr"`` path building the
+    client inside the worker (default ``eric_py.facade:EricClient``). It is
+    called as ``factory(eric_home=..., log_dir=...)`` and used as a context
+    manager for the worker's lifetime.
+
+    ``log_dir`` holds the workers' session logs (``log_dir/worker-<n>``).
+    Without one the pool logs to a temporary directory that :meth:`close`
+    removes.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_jobs: int = 100,
+        eric_home: Optional[str] = None,
+        log_dir: Optional[Path] = None,
+        client_factory: Optional[ClientFactory] = None,
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.max_jobs = max_jobs
+        self.eric_home = eric_home
+        self._owns_log_dir = not log_dir
+        self.log_dir = Path(log_dir) if log_dir else Path(tempfile.mkdtemp(prefix="eric-pool-"))
+        self.client_factory = client_factory or DEFAULT_CLIENT
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._serve, args=(i,), name=f"eric-pool-{i}", daemon=True) for i in range(size)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _start_worker(self, slot: int) -> _Worker:
+        session_log = self.log_dir / f"worker-{slot}"
+        session_log.mkdir(parents=True, exist_ok=True)
+        return _Worker(self._ctx, self.client_factory, self.eric_home, session_log)
+
+    def _restart(self, worker: _Worker, slot: int) -> Optional[_Worker]:
+        """Replace a retired worker right away so the next job finds a warm one."""
+        worker.stop()
+        try:
+            return self._start_worker(slot)
+        except BaseException:  # noqa: BLE001
+            # Start-up errors are reported to the job that next needs a worker.
+            return None
+
+    def _serve(self, slot: int) -> None:
+        worker: Optional[_Worker] = None
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            future, kind, xml_text, kwargs, log_dir = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None:
+                    worker = self._start_worker(slot)
+                future.set_result(worker.run(kind, xml_text, kwargs, log_dir))
+            except EricWorkerCrashed as exc:
+                future.set_exception(exc)
+                if worker is not None:
+                    worker = self._restart(worker, slot)
+                continue
+            except BaseException as exc:  # noqa: BLE001
+                future.set_exception(exc)
+            if worker is not None and worker.jobs >= self.max_jobs:
+                worker = self._restart(worker, slot)
+        if worker is not None:
+            worker.stop()
+
+    def submit(
+        self, kind: str, xml_text: str, log_dir: Optional[Path] = None, **kwargs: Any
+    ) -> "Future[EricJobResult]":
+        """Queue a ``validate`` or ``send`` job; ``kwargs`` go to the client method.
+
+        ``log_dir`` receives the job's part of the ERiC session log.
+        """
+        if kind not in ("validate", "send"):
+            raise ValueError(f"Unknown ERiC job kind '{kind}'")
+        if self._closed:
+            raise RuntimeError("EricWorkerPool is closed")
+        future: "Future[EricJobResult]" = Future()
+        self._jobs.put((future, kind, xml_text, kwargs, log_dir))
+        return future
+
+    def validate(self, xml_text: str, datenart_version: str, pdf_path=None, log_dir=None) -> EricJobResult:
+        return self.submit(
+            "validate", xml_text, log_dir, datenart_version=datenart_version, pdf_path=pdf_path
+        ).result()
+
+    def send(
+        self,
+        xml_text: str,
+        datenart_version: str,
+        certificate_path,
+        pin: str,
+        pdf_path=None,
+        log_dir=None,
+    ) -> EricJobResult:
+        return self.submit(
+            "send",
+            xml_text,
+            log_dir,
+            datenart_version=datenart_version,
+            certificate_path=certificate_path,
+            pin=pin,
+            pdf_path=pdf_path,
+        ).result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._owns_log_dir:
+            shutil.rmtree(self.log_dir, ignore_errors=True)
+
+    def __enter__(self) -> "EricWorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,128 @@
+"""Registry of ERiC installations, each served by its own warm worker pool.
+
+An installation is identified by its resolved plugin path
+(``eric_py.loader.eric_plugin_path``) and detected version
+(``eric_py.versioning.detect_eric_version``). Requests pick one by
+``eric_home`` or by version; every installation gets a dedicated
+:class:`~pytaxel.eric.pool.EricWorkerPool`, so different ERiC versions are
+loaded in different processes and run side by side. The process environment
+is never modified: the home is passed to the worker processes explicitly.
+"""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .pool import ClientFactory, EricWorkerPool
+
+
+class EricInstallation(NamedTuple):
+    path: Optional[Path]  # None: eric-py is not installed (stand-in clients only)
+    version: Optional[str]
+
+
+def locate_installation(eric_home: Optional[str] = None) -> EricInstallation:
+    """Resolve ``eric_home`` (or ``ERIC_HOME``) to an installation.
+
+    Raises ``EricLibraryLoadError`` when eric-py cannot find ERiC there.
+    """
+    try:
+        from eric_py.loader import eric_plugin_path
+    except ImportError:
+        return EricInstallation(Path(eric_home).resolve() if eric_home else None, None)
+    path = Path(eric_plugin_path(eric_home)).resolve()
+    try:
+        from eric_py.versioning import detect_eric_version
+
+        version = detect_eric_version(path)
+    except Exception:  # noqa: BLE001
+        version = None
+    return EricInstallation(path, version)
+
+
+class EricRegistry:
+    """Known ERiC installations and one worker pool per installation.
+
+    ``homes`` are registered on first use, so they can be selected by
+    version. Other homes are resolved and get a pool when a request names
+    them. Pools are created with ``size``, ``max_jobs`` and
+    ``client_factory`` as for :class:`EricWorkerPool`.
+    """
+
+    def __init__(
+        self,
+        homes: Iterable[str] = (),
+        size: int = 1,
+        max_jobs: int = 100,
+        client_factory: Optional[ClientFactory] = None,
+    ):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.client_factory = client_factory
+        self._pending_homes = list(homes)
+        self._by_home: Dict[Optional[str], EricInstallation] = {}
+        self._pools: Dict[Optional[Path], EricWorkerPool] = {}
+        self._lock = threading.Lock()
+
+    def _register_pending(self) -> None:
+        with self._lock:
+            homes, self._pending_homes = self._pending_homes, []
+        for home in homes:
+            self.register(home)
+
+    def register(self, eric_home: Optional[str]) -> EricInstallation:
+        """Resolve ``eric_home`` once and remember it."""
+        with self._lock:
+            installation = self._by_home.get(eric_home)
+        if installation is None:
+            installation = locate_installation(eric_home)
+            with self._lock:
+                installation = self._by_home.setdefault(eric_home, installation)
+        return installation
+
+    def installations(self) -> List[EricInstallation]:
+        """Distinct installations registered or resolved so far."""
+        self._register_pending()
+        with self._lock:
+            return list(dict.fromkeys(self._by_home.values()))
+
+    def resolve(self, eric_home: Optional[str] = None, version: Optional[str] = None) -> EricInstallation:
+        """The installation at ``eric_home``, or the registered one with ``version``.
+
+        Raises ``LookupError`` when no registered installation has ``version``
+        or ``eric_home`` holds a different one.
+        """
+        if version is None or eric_home is not None:
+            installation = self.register(eric_home)
+            if version is not None and installation.version != version:
+                raise LookupError(f"ERiC at {installation.path} is version {installation.version}, not {version}")
+            return installation
+        for installation in self.installations():
+            if installation.version == version:
+                return installation
+        known = ", ".join(sorted({str(i.version) for i in self.installations()})) or "none"
+        raise LookupError(f"No registered ERiC installation has version {version} (registered: {known})")
+
+    def pool(self, eric_home: Optional[str] = None, version: Optional[str] = None) -> EricWorkerPool:
+        """The warm worker pool of the installation selected as in :meth:`resolve`."""
+        installation = self.resolve(eric_home, version)
+        with self._lock:
+            pool = self._pools.get(installation.path)
+            if pool is None:
+                pool = EricWorkerPool(
+                    size=self.size,
+                    max_jobs=self.max_jobs,
+                    eric_home=str(installation.path) if installation.path else None,
+                    client_factory=self.client_factory,
+                )
+                self._pools[installation.path] = pool
+            return pool
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,130 @@
+"""Structured view of ERiC validation results.
+
+ERiC answers a validation with an ``EricBearbeiteVorgang`` document listing
+rule violations (``FehlerRegelpruefung``) and hints (``Hinweis``), each with
+the field it refers to. The documents can run to hundreds of kilobytes;
+:class:`ValidationReport` keeps them as text and parses them only when the
+findings are first asked for, so callers that just need the return code or
+the raw XML pay nothing extra. :meth:`ValidationReport.summary` is the compact
+JSON form used by ``/validate?format=summary`` and ``pytaxel validate
+--summary``.
+"""
+
+from __future__ import annotations
+
+import io
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from pytaxel.profiling import span
+
+DEFAULT_SUMMARY_LIMIT = 100
+
+# Finding element -> kind, and child element -> Finding field. Matched by local
+# name, since the response namespace changes between ERiC versions.
+_FINDING_KINDS = {"FehlerRegelpruefung": "error", "Hinweis": "hint"}
+_FINDING_FIELDS = {
+    "Text": "text",
+    "Feldidentifikator": "field",
+    "FachlicheFehlerId": "rule_id",
+    "FachlicheHinweisId": "rule_id",
+    "Nutzdatenticket": "ticket",
+    "Mehrfachzeilenindex": "row",
+}
+
+
+@dataclass
+class Finding:
+    """One rule violation or hint from the validation response."""
+
+    kind: str  # "error" or "hint"
+    text: str = ""
+    field: Optional[str] = None  # Feldidentifikator, the path of the offending field
+    rule_id: Optional[str] = None
+    ticket: Optional[str] = None
+    row: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, str]:
+        return {key: value for key, value in asdict(self).items() if value}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_findings(response: str) -> List[Finding]:
+    """Errors and hints of an ``EricBearbeiteVorgang`` response in document order.
+
+    Anything else in the response is skipped; an empty or malformed response
+    yields the findings read up to that point.
+    """
+    findings: List[Finding] = []
+    if not response or not response.strip():
+        return findings
+    current: Optional[Dict[str, str]] = None
+    try:
+        for event, elem in ET.iterparse(io.BytesIO(response.encode("utf-8")), events=("start", "end")):
+            name = _local(elem.tag)
+            if event == "start":
+                if current is None and name in _FINDING_KINDS:
+                    current = {"kind": _FINDING_KINDS[name]}
+                continue
+            if current is None:
+                continue
+            if name in _FINDING_KINDS:
+                findings.append(Finding(**current))
+                current = None
+                elem.clear()
+            elif name in _FINDING_FIELDS and elem.text and elem.text.strip():
+                current.setdefault(_FINDING_FIELDS[name], elem.text.strip())
+    except ET.ParseError:
+        pass
+    return findings
+
+
+class ValidationReport:
+    """ERiC return code and responses; the findings are parsed on first access."""
+
+    def __init__(self, code: int, validation_response: str = "", server_response: str = "", cached: bool = False):
+        self.code = code
+        self.validation_response = validation_response or ""
+        self.server_response = server_response or ""
+        self.cached = cached
+
+    @classmethod
+    def from_result(cls, result: Any, cached: bool = False) -> "ValidationReport":
+        """Wrap an ``eric_py`` result, pool result or cache entry."""
+        return cls(result.code, result.validation_response, result.server_response, cached)
+
+    @property
+    def ok(self) -> bool:
+        return self.code == 0
+
+    @cached_property
+    def findings(self) -> List[Finding]:
+        with span("report_parse"):
+            return parse_findings(self.validation_response)
+
+    @property
+    def errors(self) -> List[Finding]:
+        return [finding for finding in self.findings if finding.kind == "error"]
+
+    @property
+    def hints(self) -> List[Finding]:
+        return [finding for finding in self.findings if finding.kind == "hint"]
+
+    def summary(self, limit: Optional[int] = DEFAULT_SUMMARY_LIMIT) -> Dict[str, Any]:
+        """Compact JSON-ready outcome: counts plus the first ``limit`` findings, errors first."""
+        ordered = self.errors + self.hints
+        shown = ordered if limit is None else ordered[:limit]
+        return {
+            "code": self.code,
+            "ok": self.ok,
+            "cached": self.cached,
+            "errors": len(ordered) - len(self.hints),
+            "hints": len(self.hints),
+            "findings": [finding.to_dict() for finding in shown],
+            "omitted": len(ordered) - len(shown),
+        }
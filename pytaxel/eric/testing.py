@@ -0,0 +1,86 @@
+"""Stand-in for ``eric_py.facade.EricClient`` that needs no ERiC installation.
+
+Select it for worker pools with ``client_factory="pytaxel.eric.testing:FakeEricClient"``.
+It is deliberately not selectable from the environment: its ``send_xml``
+reports success without transmitting anything.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+CRASH_MARKER = "<!-- fake-eric: crash -->"
+ERROR_MARKER = "<!-- fake-eric: error -->"
+ERIC_ERROR_MARKER = "<!-- fake-eric: eric-error -->"
+# Code of the EricError raised for ERIC_ERROR_MARKER (ERIC_GLOBAL_UNKNOWN).
+ERIC_ERROR_CODE = 610001001
+
+
+@dataclass
+class FakeEricResult:
+    code: int
+    validation_response: str
+    server_response: str
+    transfer_handle: Optional[int] = None
+
+
+class FakeEricClient:
+    """Answer validate/send calls with canned responses.
+
+    XML containing :data:`CRASH_MARKER` kills the process, XML containing
+    :data:`ERROR_MARKER` raises a RuntimeError, :data:`ERIC_ERROR_MARKER` an
+    ``eric_py`` EricError; anything else succeeds with code 0. The response
+    names the serving process and ERiC home so tests can observe worker
+    recycling and routing. Every call adds a line to ``log_dir/eric.log``,
+    like ERiC's session log.
+    """
+
+    def __init__(self, eric_home: Optional[str] = None, log_dir: Optional[Path] = None):
+        self.eric_home = eric_home
+        self.log_dir = log_dir
+
+    def __enter__(self) -> "FakeEricClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def _answer(self, xml_text: str, pdf_path) -> FakeEricResult:
+        if self.log_dir is not None:
+            with (Path(self.log_dir) / "eric.log").open("a", encoding="utf-8") as log:
+                log.write(f"fake ERiC worker {os.getpid()}: {len(xml_text)} characters\n")
+        if CRASH_MARKER in xml_text:
+            os._exit(70)
+        if ERROR_MARKER in xml_text:
+            raise RuntimeError("fake ERiC error")
+        if ERIC_ERROR_MARKER in xml_text:
+            from eric_py.errors import EricError
+
+            raise EricError(ERIC_ERROR_CODE, "fake ERiC rule failure")
+        if pdf_path:
+            Path(pdf_path).write_bytes(b"%PDF-1.4\n% fake ERiC print\n")
+        response = (
+            '<EricBearbeiteVorgang xmlns="http://www.elster.de/EricXML/1.0/EricBearbeiteVorgang">'
+            f"<Hinweis><Text>fake ERiC worker {os.getpid()}</Text></Hinweis>"
+            f"<Hinweis><Text>fake ERiC home {self.eric_home}</Text></Hinweis>"
+            "</EricBearbeiteVorgang>"
+        )
+        return FakeEricResult(code=0, validation_response=response, server_response="")
+
+    def validate_xml(self, xml_text: str, datenart_version: str, pdf_path=None) -> FakeEricResult:
+        return self._answer(xml_text, pdf_path)
+
+    def send_xml(
+        self,
+        xml_text: str,
+        datenart_version: str,
+        certificate_path=None,
+        pin=None,
+        pdf_path=None,
+    ) -> FakeEricResult:
+        result = self._answer(xml_text, pdf_path)
+        result.transfer_handle = 1
+        return result
@@ -0,0 +1,224 @@
+"""Lightweight phase timing for pytaxel (``pytaxel --profile``).
+
+Code marks phases with ``with span("render"):`` or the ``@traced("render")``
+decorator. Until :func:`enable` is called both cost a single global lookup,
+so instrumentation can stay in hot paths. Once enabled, each phase records
+its wall time and, with ``memory=True``, the tracemalloc peak above the memory
+already in use when the phase started. ``tracemalloc`` and ``cProfile`` are
+only imported (and tracemalloc only started) when a profiler needs them,
+keeping CLI startup and unprofiled allocations unaffected.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NULL_SPAN = contextlib.nullcontext()
+
+_profiler: Optional["Profiler"] = None
+
+
+class _Phase:
+    __slots__ = ("path", "calls", "seconds", "peak")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak: Optional[int] = None
+
+
+class Profiler:
+    """Collects nested phase timings (and memory peaks) while enabled."""
+
+    def __init__(self, memory: bool = True, cprofile: bool = False):
+        self.memory = memory
+        self._tracemalloc: Any = None
+        self._phases: Dict[Tuple[str, ...], _Phase] = {}
+        self._frames: Dict[str, int] = {}
+        self._events: List[Tuple[str, int, float]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if memory:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+        self._start = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def _stack(self) -> List[list]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        tracemalloc = self._tracemalloc
+        stack = self._stack()
+        path = (stack[-1][0] + (name,)) if stack else (name,)
+        # Entry: [path, memory at entry, highest peak seen so far].
+        entry: list = [path, 0, 0]
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][2] = max(stack[-1][2], peak)
+            entry[1] = entry[2] = current
+            _reset_peak(tracemalloc)
+        with self._lock:
+            phase = self._phases.get(path)
+            if phase is None:
+                phase = self._phases[path] = _Phase(path)
+        stack.append(entry)
+        self._event("O", name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._event("C", name)
+            stack.pop()
+            peak_bytes = None
+            if self.memory:
+                _current, peak = tracemalloc.get_traced_memory()
+                highest = max(entry[2], peak)
+                peak_bytes = highest - entry[1]
+                if stack:
+                    stack[-1][2] = max(stack[-1][2], highest)
+            with self._lock:
+                phase.calls += 1
+                phase.seconds += elapsed
+                if peak_bytes is not None:
+                    phase.peak = max(phase.peak or 0, peak_bytes)
+
+    def _event(self, kind: str, name: str) -> None:
+        with self._lock:
+            frame = self._frames.setdefault(name, len(self._frames))
+            self._events.append((kind, frame, time.perf_counter() - self._start))
+
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._started_tracemalloc:
+            self._tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def phases(self) -> List[_Phase]:
+        """Recorded phases in the order they were first entered (parents before children)."""
+        with self._lock:
+            phases = list(self._phases.values())
+        first_seen = {phase.path: i for i, phase in enumerate(phases)}
+        return sorted(phases, key=lambda phase: [first_seen[phase.path[:i]] for i in range(1, len(phase.path) + 1)])
+
+    def report(self) -> str:
+        lines = [f"{'phase':<36} {'calls':>6} {'total [ms]':>11} {'peak [MiB]':>11}"]
+        for phase in self.phases():
+            name = "  " * (len(phase.path) - 1) + phase.path[-1]
+            peak = f"{phase.peak / (1024 * 1024):>11.2f}" if phase.peak is not None else f"{'-':>11}"
+            lines.append(f"{name:<36} {phase.calls:>6} {phase.seconds * 1e3:>11.2f} {peak}")
+        return "\n".join(lines)
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """Write a cProfile dump (``.prof``) or a speedscope profile (``.json``)."""
+        import json
+
+        path = Path(path)
+        if path.suffix == ".json":
+            path.write_text(json.dumps(self.speedscope()), encoding="utf-8")
+        elif self._cprofile is not None:
+            self._cprofile.dump_stats(str(path))
+        else:
+            raise ValueError("cProfile output needs a Profiler created with cprofile=True")
+        return path
+
+    def speedscope(self) -> dict:
+        """The recorded spans as an evented speedscope profile (times in milliseconds)."""
+        with self._lock:
+            frames = sorted(self._frames, key=self._frames.__getitem__)
+            events = [{"type": kind, "frame": frame, "at": at * 1e3} for kind, frame, at in self._events]
+        end = events[-1]["at"] if events else 0.0
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [
+                {
+                    "type": "evented",
+                    "name": "pytaxel",
+                    "unit": "milliseconds",
+                    "startValue": 0.0,
+                    "endValue": end,
+                    "events": events,
+                }
+            ],
+            "name": "pytaxel",
+            "exporter": "pytaxel.profiling",
+        }
+
+
+def _reset_peak(tracemalloc) -> None:
+    # tracemalloc.reset_peak() is Python 3.9+; on 3.8 peaks include earlier phases.
+    reset = getattr(tracemalloc, "reset_peak", None)
+    if reset is not None:
+        reset()
+
+
+def enable(memory: bool = True, cprofile: bool = False) -> Profiler:
+    """Start collecting spans process-wide and return the profiler."""
+    global _profiler
+    _profiler = Profiler(memory=memory, cprofile=cprofile)
+    return _profiler
+
+
+def disable() -> Optional[Profiler]:
+    """Stop collecting and return the profiler that was active, if any."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _profiler
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time the enclosed block as phase ``name`` (a no-op unless profiling is enabled)."""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of :func:`span` for whole functions."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _profiler
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with profiler.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
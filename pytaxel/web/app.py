@@ -2,16 +2,30 @@
 
 from __future__ import annotations
 
+import io
 import os
 import shutil
 import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 
-from pytaxel.ebilanz import extract_to_csv, generate_xml_from_csv
+from pytaxel.ebilanz import extract_to_csv, generate_xml_from_csv, load_template
+from pytaxel.eric import EricWorkerPool
+from pytaxel.eric.cache import ValidationCache, content_fingerprint, validate_with_cache
+from pytaxel.eric.logs import log_sink, write_latest
+from pytaxel.eric.registry import EricRegistry
+from pytaxel.eric.report import ValidationReport
+from pytaxel.web import metrics
+from pytaxel.web.executors import BoundedExecutor, ExecutorSaturated
+from pytaxel.web.jobs import JobRunner, JobStore, default_db_path
+from pytaxel.web.uploads import UploadLimitMiddleware, copy_upload, read_upload_text, spooling_route
 from eric_py.errors import EricError
 from eric_py.loader import EricLibraryLoadError
 
@@ -24,46 +38,320 @@ DEFAULT_TEMPLATE = (
     / "ebilanz.xml"
 )
 
-app = FastAPI(title="pytaxel API", version="0.1.0")
+ERIC_POOL_SIZE = int(os.environ.get("PYTAXEL_ERIC_POOL_SIZE", "1"))
+ERIC_MAX_JOBS = int(os.environ.get("PYTAXEL_ERIC_MAX_JOBS", "100"))
+# ERiC installations selectable by version (os.pathsep-separated homes).
+ERIC_HOMES = [home for home in os.environ.get("PYTAXEL_ERIC_HOMES", "").split(os.pathsep) if home]
+# ERiC workers across the configured installations (one pool each); the default for job workers.
+ERIC_THREADS = ERIC_POOL_SIZE * max(1, len(ERIC_HOMES))
+WEB_WORKERS = int(os.environ.get("PYTAXEL_WEB_WORKERS", str(min(4, os.cpu_count() or 1))))
+WEB_QUEUE = int(os.environ.get("PYTAXEL_WEB_QUEUE", "16"))
+ERIC_QUEUE = int(os.environ.get("PYTAXEL_ERIC_QUEUE", "8"))
+RETRY_AFTER = int(os.environ.get("PYTAXEL_RETRY_AFTER", "5"))
+CHUNK_SIZE = 64 * 1024
+VALIDATION_CACHE = os.environ.get("PYTAXEL_VALIDATION_CACHE", "1") != "0"
+JOB_DB = os.environ.get("PYTAXEL_JOB_DB")
+JOB_WORKERS = int(os.environ.get("PYTAXEL_JOB_WORKERS", str(ERIC_THREADS)))
+JOB_TTL = float(os.environ.get("PYTAXEL_JOB_TTL", str(7 * 24 * 3600)))
+# Request bodies above this are rejected with 413 (0: no limit); uploads stay in memory up to the spool size.
+UPLOAD_MAX_BYTES = int(float(os.environ.get("PYTAXEL_UPLOAD_MAX_MB", "64")) * 1024 * 1024)
+UPLOAD_SPOOL_BYTES = int(float(os.environ.get("PYTAXEL_UPLOAD_SPOOL_MB", "1")) * 1024 * 1024)
+# ``format`` of validation results: the raw ERiC XML or a parsed ValidationReport summary.
+RESPONSE_FORMATS = ("full", "summary")
+# Request metrics are labelled by these paths; anything else counts as "other".
+METRIC_ENDPOINTS = frozenset({"/", "/extract", "/generate", "/validate", "/send", "/metrics", "/jobs/validate"})
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Resume left-over background jobs on startup; stop them and the ERiC pools on shutdown."""
+    _resume_jobs()
+    try:
+        yield
+    finally:
+        _close_jobs()
+        _close_eric_pools()
+
+
+app = FastAPI(title="pytaxel API", version="0.1.0", lifespan=_lifespan)
+# Added before the metrics middleware, so rejected uploads are still counted (as 413).
+app.add_middleware(UploadLimitMiddleware, max_bytes=UPLOAD_MAX_BYTES)
+# Set before the routes are declared; applies to this app's requests only.
+app.router.route_class = spooling_route(UPLOAD_SPOOL_BYTES)
+
+# Generation/extraction run on a small thread pool; ERiC calls get an executor
+# per ERiC installation with one thread per worker of its pool, so they are
+# serialised per worker, never starve the CPU-bound endpoints, and a burst for
+# one installation queues (and is rejected) without blocking the others.
+_cpu_executor = BoundedExecutor("cpu", WEB_WORKERS, WEB_QUEUE, RETRY_AFTER)
+_eric_executors: Dict[Optional[str], BoundedExecutor] = {}
+_eric_executors_lock = threading.Lock()
+
+
+def _executors() -> Tuple[BoundedExecutor, ...]:
+    with _eric_executors_lock:
+        return (_cpu_executor, *_eric_executors.values())
+
+
+metrics.EXECUTOR_PENDING.set_function(lambda: {(e.name,): e.pending for e in _executors()})
+metrics.EXECUTOR_CAPACITY.set_function(lambda: {(e.name,): e.capacity for e in _executors()})
+
+# Validation results keyed by XML, datenart and ERiC version; /send is never cached.
+_validation_cache: Optional[ValidationCache] = ValidationCache() if VALIDATION_CACHE else None
+
+# Warm ERiC worker pools, one per ERiC installation. Requests name the
+# installation by eric_home or version; os.environ is never changed.
+_eric_registry = EricRegistry(ERIC_HOMES, size=ERIC_POOL_SIZE, max_jobs=ERIC_MAX_JOBS)
+
+
+def _eric_pool(eric_home: Optional[str]) -> EricWorkerPool:
+    return _eric_registry.pool(eric_home)
+
+
+def _eric_executor(eric_home: Optional[str]) -> BoundedExecutor:
+    """Executor for the installation at ``eric_home``, created on first use (``eric`` or ``eric:<path>``)."""
+    try:
+        path = _eric_registry.register(eric_home).path
+    except Exception:  # noqa: BLE001 - the request reports it when it loads ERiC
+        path = Path(eric_home) if eric_home else None
+    key = str(path) if path else None
+    with _eric_executors_lock:
+        executor = _eric_executors.get(key)
+        if executor is None:
+            name = f"eric:{key}" if key else "eric"
+            executor = _eric_executors[key] = BoundedExecutor(name, ERIC_POOL_SIZE, ERIC_QUEUE, RETRY_AFTER)
+        return executor
+
+
+def _eric_home(eric_home: Optional[str], eric_version: Optional[str]) -> Optional[str]:
+    """ERiC home serving a request: by version among the registered installations, else ``eric_home``/ERIC_HOME."""
+    if not eric_version:
+        return _env_or(eric_home, "ERIC_HOME")
+    try:
+        path = _eric_registry.resolve(eric_home, eric_version).path
+    except LookupError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return str(path) if path else None
+
+
+# Background validation jobs, started on first use (or at startup if jobs were left over).
+_jobs: Optional[JobRunner] = None
+_jobs_lock = threading.Lock()
+
+
+def _job_db() -> Path:
+    return Path(JOB_DB) if JOB_DB else default_db_path()
+
+
+def _job_runner() -> JobRunner:
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = JobRunner(
+                JobStore(_job_db()), {"validate": _run_validate_job}, workers=JOB_WORKERS, ttl=JOB_TTL
+            ).start()
+        return _jobs
+
+
+def _job_counts() -> Dict[Tuple[str, ...], float]:
+    runner = _jobs
+    if runner is None:
+        return {}
+    return {(status,): count for status, count in runner.store.counts().items()}
+
+
+metrics.JOBS.set_function(_job_counts)
+
+
+def _resume_jobs() -> None:
+    """Restart background jobs left over from a previous run."""
+    if _job_db().exists():
+        _job_runner()
+
+
+def _close_jobs() -> None:
+    global _jobs
+    with _jobs_lock:
+        runner, _jobs = _jobs, None
+    if runner is not None:
+        runner.close()
+        runner.store.close()
+
+
+def _close_eric_pools() -> None:
+    _eric_registry.close()
+
+
+@app.middleware("http")
+async def _record_request(request: Request, call_next):
+    path = request.url.path
+    if path in METRIC_ENDPOINTS:
+        endpoint = path
+    elif path.startswith("/jobs/"):
+        endpoint = "/jobs/{id}"
+    else:
+        endpoint = "other"
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        metrics.REQUESTS.inc(endpoint=endpoint, status=status)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def _saturated_handler(request, exc: ExecutorSaturated) -> JSONResponse:
+    metrics.EXECUTOR_REJECTED.inc(executor=exc.name)
+    return JSONResponse(
+        {"code": 503, "error": f"Server busy ({exc.name} queue full), retry later."},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 def _temp_file_from_upload(upload: UploadFile, suffix: str) -> Path:
-    """Persist an UploadFile to a temp file and return the path."""
+    """Persist an UploadFile to a temp file and return the path (for ERiC's certificate path)."""
     fd, tmp_path = tempfile.mkstemp(suffix=suffix)
     os.close(fd)
     path = Path(tmp_path)
     with path.open("wb") as f:
-        shutil.copyfileobj(upload.file, f)
+        copy_upload(upload.file, f)
     return path
 
 
+def _read_upload_text(upload: UploadFile) -> Tuple[str, str]:
+    """Decode an upload from its spooled buffer (universal newlines, like ``Path.read_text``).
+
+    Returns the text and the sha256 of the uploaded bytes, computed in the same pass.
+    """
+    return read_upload_text(upload.file, CHUNK_SIZE)
+
+
+def _iter_chunks(buffer: io.BytesIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the buffer's content in chunks (chunked transfer; the buffer still holds the whole output)."""
+    view = buffer.getbuffer()
+    try:
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])
+    finally:
+        view.release()
+
+
 def _env_or(value: Optional[str], env_key: str) -> Optional[str]:
     return value or os.environ.get(env_key)
 
 
-def _log_response(log_dir: Path, validation_response: str, server_response: str) -> None:
+def _eric_call(operation: str, call: Callable[[], T]) -> T:
+    """Run an ERiC pool call, recording its duration, in-flight count and error code."""
+    start = time.perf_counter()
+    metrics.ERIC_IN_FLIGHT.inc()
+    try:
+        return call()
+    except EricError as exc:
+        metrics.ERIC_ERRORS.inc(operation=operation, code=exc.code)
+        raise
+    except Exception as exc:  # noqa: BLE001
+        metrics.ERIC_ERRORS.inc(operation=operation, code=type(exc).__name__)
+        raise
+    finally:
+        metrics.ERIC_IN_FLIGHT.dec()
+        metrics.ERIC_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+def _validate_text(
+    xml_text: str,
+    dav: str,
+    home: Optional[str],
+    pdf_path: Optional[Path],
+    no_cache: bool,
+    source_digest: Optional[str] = None,
+    log_dir: Optional[Path] = None,
+    fingerprint: Optional[str] = None,
+) -> Tuple[Any, bool]:
+    """Validate through the cache and the warm ERiC pool; returns ``(result, cache_hit)``.
+
+    ``log_dir`` receives ERiC's session log for this validation (not for cache hits).
+    ``fingerprint`` is the XML's content fingerprint, if the caller computed it.
+    """
+    cache = None if no_cache else _validation_cache
+
+    def run() -> Any:
+        return _eric_pool(home).validate(xml_text, dav, pdf_path=pdf_path, log_dir=log_dir)
+
+    result, cache_hit = validate_with_cache(
+        cache,
+        xml_text,
+        dav,
+        home,
+        lambda: _eric_call("validate", run),
+        pdf_path,
+        source_digest,
+        fingerprint,
+    )
+    if cache is not None:
+        metrics.VALIDATION_CACHE.inc(result="hit" if cache_hit else "miss")
+    return result, cache_hit
+
+
+def _check_format(response_format: str) -> None:
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(RESPONSE_FORMATS)}")
+
+
+def _log_response(
+    log_dir: Path,
+    result: Any,
+    xml_text: str,
+    operation: str,
+    dav: str,
+    source_digest: Optional[str] = None,
+    archive: bool = True,
+    fingerprint: Optional[str] = None,
+) -> None:
+    """Write the responses to ``log_dir``; ``archive=False`` (a temporary dir) skips the run history."""
     log_dir.mkdir(parents=True, exist_ok=True)
-    val_path = log_dir / "validation_response.xml"
-    srv_path = log_dir / "server_response.xml"
-    val_path.write_text(validation_response, encoding="utf-8")
-    srv_path.write_text(server_response, encoding="utf-8")
+    if not archive:
+        write_latest(log_dir, result.validation_response, result.server_response)
+        return
+    log_sink(log_dir).write(
+        result.validation_response or "",
+        result.server_response or "",
+        xml_text=xml_text,
+        operation=operation,
+        code=result.code,
+        datenart_version=dav,
+        source_digest=source_digest,
+        fingerprint=fingerprint,
+    )
+
+
+def _fingerprint_for(xml_text: str, source_digest: Optional[str], no_cache: bool, archive: bool) -> Optional[str]:
+    """The fingerprint the cache and the run history would each compute, computed once (if either needs it)."""
+    if no_cache and not archive:
+        return None
+    return content_fingerprint(xml_text, source_digest)
 
 
 @app.get("/", response_class=HTMLResponse)
-def index() -> str:
+async def index() -> str:
     return """
     <h1>pytaxel API</h1>
     <h2>Extract</h2>
     <form action="/extract" method="post" enctype="multipart/form-data">
       XML: <input type="file" name="xml_file"/><br/>
-      Output CSV (optional): <input type="text" name="output_path" value=""/><br/>
+      Download name (optional): <input type="text" name="output_path" value=""/><br/>
       <button type="submit">Extract</button>
     </form>
     <h2>Generate</h2>
     <form action="/generate" method="post" enctype="multipart/form-data">
       CSV: <input type="file" name="csv_file"/><br/>
       Template (optional): <input type="text" name="template_path" value=""/> (defaults bundled)<br/>
-      Output XML (optional): <input type="text" name="output_path" value=""/><br/>
+      Download name (optional): <input type="text" name="output_path" value=""/><br/>
       <button type="submit">Generate</button>
     </form>
     <h2>Validate</h2>
@@ -73,8 +361,17 @@ def index() -> str:
       Tax version: <input type="text" name="tax_version" value="6.5"/><br/>
       Log dir (optional): <input type="text" name="log_dir" value=""/><br/>
       Print PDF path (optional): <input type="text" name="pdf_name" value=""/><br/>
+      Bypass cache: <input type="checkbox" name="no_cache" value="true"/><br/>
       <button type="submit">Validate</button>
     </form>
+    <h2>Validate in the background</h2>
+    <form action="/jobs/validate" method="post" enctype="multipart/form-data">
+      XML: <input type="file" name="xml_file"/><br/>
+      Tax type: <input type="text" name="tax_type" value="Bilanz"/><br/>
+      Tax version: <input type="text" name="tax_version" value="6.5"/><br/>
+      Callback URL (optional): <input type="text" name="callback_url" value=""/><br/>
+      <button type="submit">Submit job</button>
+    </form>
     <h2>Send</h2>
     <form action="/send" method="post" enctype="multipart/form-data">
       XML: <input type="file" name="xml_file"/><br/>
@@ -87,95 +384,111 @@ def index() -> str:
     """
 
 
-@app.post("/extract")
-def extract_endpoint(
-    xml_file: UploadFile = File(...),
-    output_path: Optional[str] = Form(None),
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@metrics.PHASE_SECONDS.time(phase="extract")
+def _extract(
+    xml_file: UploadFile,
+    output_path: Optional[str],
 ):
-    tmp_xml = None
-    tmp_csv = None
     try:
-        tmp_xml = _temp_file_from_upload(xml_file, suffix=".xml")
-        out = Path(output_path) if output_path else Path.cwd() / "output.csv"
-        extract_to_csv(tmp_xml, out)
-        csv_bytes = out.read_bytes()
-        headers = {"Content-Disposition": f'attachment; filename="{out.name}"'}
-        return StreamingResponse(iter([csv_bytes]), media_type="text/csv", headers=headers)
+        buffer = io.BytesIO()
+        text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+        extract_to_csv(xml_file.file, text)
+        text.flush()
+        text.detach()
+        filename = Path(output_path).name if output_path else "output.csv"
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        return StreamingResponse(_iter_chunks(buffer), media_type="text/csv", headers=headers)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    finally:
-        for path in (tmp_xml, tmp_csv):
-            if path and path.exists():
-                path.unlink()
 
 
-@app.post("/generate")
-def generate_endpoint(
-    csv_file: UploadFile | None = File(None),
-    template_path: Optional[str] = Form(None),
+@app.post("/extract")
+async def extract_endpoint(
+    xml_file: UploadFile = File(...),
     output_path: Optional[str] = Form(None),
 ):
-    tmp_csv = None
-    tmp_xml = None
+    return await _cpu_executor.run(_extract, xml_file, output_path)
+
+
+@metrics.PHASE_SECONDS.time(phase="generate")
+def _generate(
+    csv_file: UploadFile | None,
+    template_path: Optional[str],
+    output_path: Optional[str],
+):
+    csv_text = None
     try:
-        if csv_file is not None:
-            tmp_csv = _temp_file_from_upload(csv_file, suffix=".csv")
         template = Path(template_path) if template_path else DEFAULT_TEMPLATE
         if not template.exists():
             raise HTTPException(status_code=400, detail="Template file not found")
-        tmp_xml = Path(output_path) if output_path else Path.cwd() / "output.xml"
-        generate_xml_from_csv(tmp_csv, template, tmp_xml)
-        xml_bytes = tmp_xml.read_bytes()
-        headers = {"Content-Disposition": f'attachment; filename="{tmp_xml.name}"'}
-        return StreamingResponse(
-            iter([xml_bytes]), media_type="application/xml", headers=headers
-        )
+        if csv_file is not None:
+            csv_text = io.TextIOWrapper(csv_file.file, encoding="utf-8", newline="")
+        buffer = io.BytesIO()
+        generate_xml_from_csv(csv_text, load_template(template), buffer)
+        filename = Path(output_path).name if output_path else "output.xml"
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        return StreamingResponse(_iter_chunks(buffer), media_type="application/xml", headers=headers)
     except HTTPException:
         raise
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     finally:
-        if tmp_csv and tmp_csv.exists():
-            tmp_csv.unlink()
-        if tmp_xml and tmp_xml.exists():
-            tmp_xml.unlink()
+        if csv_text is not None:
+            # Leave the upload's own file open for Starlette to close.
+            csv_text.detach()
 
 
-@app.post("/validate")
-def validate_endpoint(
-    xml_file: UploadFile = File(...),
-    tax_type: str = Form("Bilanz"),
-    tax_version: str = Form("6.5"),
-    eric_home: Optional[str] = Form(None),
-    log_dir: Optional[str] = Form(None),
-    pdf_name: Optional[str] = Form(None),
+@app.post("/generate")
+async def generate_endpoint(
+    csv_file: UploadFile | None = File(None),
+    template_path: Optional[str] = Form(None),
+    output_path: Optional[str] = Form(None),
+):
+    return await _cpu_executor.run(_generate, csv_file, template_path, output_path)
+
+
+@metrics.PHASE_SECONDS.time(phase="validate")
+def _validate(
+    xml_file: UploadFile,
+    tax_type: str,
+    tax_version: str,
+    eric_home: Optional[str],
+    log_dir: Optional[str],
+    pdf_name: Optional[str],
+    no_cache: bool,
+    eric_version: Optional[str] = None,
+    response_format: str = "full",
 ):
-    tmp_xml = None
     tmp_log_dir = None
     pdf_path = None
     try:
-        tmp_xml = _temp_file_from_upload(xml_file, suffix=".xml")
+        xml_text, digest = _read_upload_text(xml_file)
         tmp_log_dir = Path(log_dir) if log_dir else Path(tempfile.mkdtemp(prefix="eric-log-"))
         if pdf_name:
             pdf_path = Path(pdf_name)
-        xml_text = tmp_xml.read_text(encoding="utf-8")
         dav = f"{tax_type}_{tax_version}"
-        
-        # Configure ERIC_HOME for this request if provided
-        if eric_home:
-            os.environ["ERIC_HOME"] = eric_home
-            
-        from eric_py.facade import EricClient
-
-        with EricClient(eric_home=_env_or(eric_home, "ERIC_HOME"), log_dir=tmp_log_dir) as client:
-            result = client.validate_xml(xml_text, dav, pdf_path=pdf_path)
-        _log_response(tmp_log_dir, result.validation_response, result.server_response)
-        payload = {
-            "code": result.code,
-            "validation_response": result.validation_response,
-            "server_response": result.server_response,
-            "log_dir": str(tmp_log_dir),
-        }
+        home = _eric_home(eric_home, eric_version)
+        fingerprint = _fingerprint_for(xml_text, digest, no_cache, bool(log_dir))
+        result, cache_hit = _validate_text(xml_text, dav, home, pdf_path, no_cache, digest, tmp_log_dir, fingerprint)
+        _log_response(
+            tmp_log_dir, result, xml_text, "validate", dav, digest, archive=bool(log_dir), fingerprint=fingerprint
+        )
+        if response_format == "summary":
+            payload = ValidationReport.from_result(result, cache_hit).summary()
+            payload["log_dir"] = str(tmp_log_dir)
+        else:
+            payload = {
+                "code": result.code,
+                "validation_response": result.validation_response,
+                "server_response": result.server_response,
+                "log_dir": str(tmp_log_dir),
+                "cached": cache_hit,
+            }
         if pdf_path and pdf_path.exists():
             pdf_bytes = pdf_path.read_bytes()
             headers = {"Content-Disposition": f'attachment; filename="{pdf_path.name}"'}
@@ -193,32 +506,158 @@ def validate_endpoint(
         return JSONResponse(
             {"code": exc.code, "error": str(exc)}, status_code=400
         )
+    except HTTPException:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     finally:
-        if tmp_xml and tmp_xml.exists():
-            tmp_xml.unlink()
         if tmp_log_dir and tmp_log_dir.exists() and not log_dir:
             shutil.rmtree(tmp_log_dir, ignore_errors=True)
 
 
-@app.post("/send")
-def send_endpoint(
+@app.post("/validate")
+async def validate_endpoint(
     xml_file: UploadFile = File(...),
-    certificate: UploadFile | None = File(None),
-    pin: Optional[str] = Form(None),
     tax_type: str = Form("Bilanz"),
     tax_version: str = Form("6.5"),
     eric_home: Optional[str] = Form(None),
+    log_dir: Optional[str] = Form(None),
     pdf_name: Optional[str] = Form(None),
+    no_cache: bool = Form(False),
+    eric_version: Optional[str] = Form(None),
+    response_format: str = Query("full", alias="format"),
+):
+    _check_format(response_format)
+    return await _eric_executor(_eric_home(eric_home, eric_version)).run(
+        _validate,
+        xml_file,
+        tax_type,
+        tax_version,
+        eric_home,
+        log_dir,
+        pdf_name,
+        no_cache,
+        eric_version,
+        response_format,
+    )
+
+
+@metrics.PHASE_SECONDS.time(phase="validate")
+def _run_validate_job(params: Dict[str, Any], xml_text: str) -> Dict[str, Any]:
+    """Job handler: the JSON body of ``/validate``, computed in a job worker."""
+    dav = f"{params['tax_type']}_{params['tax_version']}"
+    fingerprint = _fingerprint_for(
+        xml_text, params.get("sha256"), params.get("no_cache", False), bool(params.get("log_dir"))
+    )
+    try:
+        result, cache_hit = _validate_text(
+            xml_text,
+            dav,
+            params.get("eric_home"),
+            None,
+            params.get("no_cache", False),
+            params.get("sha256"),
+            Path(params["log_dir"]) if params.get("log_dir") else None,
+            fingerprint,
+        )
+    except (ImportError, EricLibraryLoadError) as exc:
+        raise RuntimeError(f"ERiC could not be initialized: {exc}. Check ERIC_HOME configuration.") from exc
+    payload = {
+        "code": result.code,
+        "validation_response": result.validation_response,
+        "server_response": result.server_response,
+        "cached": cache_hit,
+    }
+    if params.get("log_dir"):
+        _log_response(
+            Path(params["log_dir"]), result, xml_text, "validate", dav, params.get("sha256"), fingerprint=fingerprint
+        )
+        payload["log_dir"] = params["log_dir"]
+    return payload
+
+
+def _submit_validate_job(
+    xml_file: UploadFile,
+    tax_type: str,
+    tax_version: str,
+    eric_home: Optional[str],
+    log_dir: Optional[str],
+    no_cache: bool,
+    callback_url: Optional[str],
+    eric_version: Optional[str] = None,
+) -> JSONResponse:
+    if callback_url and urlparse(callback_url).scheme not in ("http", "https"):
+        raise HTTPException(status_code=400, detail="callback_url must be an http(s) URL")
+    xml_text, digest = _read_upload_text(xml_file)
+    params = {
+        "tax_type": tax_type,
+        "tax_version": tax_version,
+        # Resolved now: a job runs with the installation chosen at submission.
+        "eric_home": _eric_home(eric_home, eric_version),
+        "log_dir": log_dir,
+        "no_cache": no_cache,
+        "sha256": digest,
+    }
+    job = _job_runner().submit("validate", xml_text, params, callback_url)
+    url = f"/jobs/{job.id}"
+    return JSONResponse({"id": job.id, "status": job.status, "url": url}, status_code=202, headers={"Location": url})
+
+
+@app.post("/jobs/validate")
+async def submit_validate_job_endpoint(
+    xml_file: UploadFile = File(...),
+    tax_type: str = Form("Bilanz"),
+    tax_version: str = Form("6.5"),
+    eric_home: Optional[str] = Form(None),
     log_dir: Optional[str] = Form(None),
+    no_cache: bool = Form(False),
+    callback_url: Optional[str] = Form(None),
+    eric_version: Optional[str] = Form(None),
+):
+    return await _cpu_executor.run(
+        _submit_validate_job, xml_file, tax_type, tax_version, eric_home, log_dir, no_cache, callback_url, eric_version
+    )
+
+
+def _job_status(job_id: str, response_format: str) -> JSONResponse:
+    job = _job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    data = job.to_dict()
+    result = data["result"]
+    if response_format == "summary" and result and "validation_response" in result:
+        summary = ValidationReport(
+            result["code"], result["validation_response"], result["server_response"], result["cached"]
+        ).summary()
+        if "log_dir" in result:
+            summary["log_dir"] = result["log_dir"]
+        data["result"] = summary
+    return JSONResponse(data)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str, response_format: str = Query("full", alias="format")):
+    _check_format(response_format)
+    return await _cpu_executor.run(_job_status, job_id, response_format)
+
+
+@metrics.PHASE_SECONDS.time(phase="send")
+def _send(
+    xml_file: UploadFile,
+    certificate: UploadFile | None,
+    pin: Optional[str],
+    tax_type: str,
+    tax_version: str,
+    eric_home: Optional[str],
+    pdf_name: Optional[str],
+    log_dir: Optional[str],
+    eric_version: Optional[str] = None,
 ):
-    tmp_xml = None
     tmp_cert = None
     tmp_log_dir = None
     tmp_pdf = None
     try:
-        tmp_xml = _temp_file_from_upload(xml_file, suffix=".xml")
+        xml_text, digest = _read_upload_text(xml_file)
         cert_path = None
         if certificate is not None:
             tmp_cert = _temp_file_from_upload(certificate, suffix=".pfx")
@@ -232,28 +671,25 @@ def send_endpoint(
             raise HTTPException(status_code=400, detail="Certificate and PIN are required")
 
         tmp_log_dir = Path(log_dir) if log_dir else Path(tempfile.mkdtemp(prefix="eric-log-"))
-        xml_text = tmp_xml.read_text(encoding="utf-8")
         dav = f"{tax_type}_{tax_version}"
         pdf_path = None
         if pdf_name:
             tmp_pdf = Path(tempfile.mkstemp(suffix=".pdf")[1])
             pdf_path = tmp_pdf
 
-        # Configure ERIC_HOME for this request if provided
-        if eric_home:
-            os.environ["ERIC_HOME"] = eric_home
-
-        from eric_py.facade import EricClient
-
-        with EricClient(eric_home=_env_or(eric_home, "ERIC_HOME"), log_dir=tmp_log_dir) as client:
-            result = client.send_xml(
+        pool = _eric_pool(_eric_home(eric_home, eric_version))
+        result = _eric_call(
+            "send",
+            lambda: pool.send(
                 xml_text,
                 datenart_version=dav,
                 certificate_path=cert_path,
                 pin=pin_value,
                 pdf_path=pdf_path,
-            )
-        _log_response(tmp_log_dir, result.validation_response, result.server_response)
+                log_dir=tmp_log_dir,
+            ),
+        )
+        _log_response(tmp_log_dir, result, xml_text, "send", dav, digest, archive=bool(log_dir))
         response_payload = {
             "code": result.code,
             "validation_response": result.validation_response,
@@ -280,16 +716,35 @@ def send_endpoint(
         )
     except EricError as exc:
         return JSONResponse({"code": exc.code, "error": str(exc)}, status_code=400)
+    except HTTPException:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     finally:
-        for path in (tmp_xml, tmp_cert, tmp_pdf):
+        for path in (tmp_cert, tmp_pdf):
             if path and Path(path).exists():
                 Path(path).unlink()
         if tmp_log_dir and tmp_log_dir.exists() and not log_dir:
             shutil.rmtree(tmp_log_dir, ignore_errors=True)
 
 
+@app.post("/send")
+async def send_endpoint(
+    xml_file: UploadFile = File(...),
+    certificate: UploadFile | None = File(None),
+    pin: Optional[str] = Form(None),
+    tax_type: str = Form("Bilanz"),
+    tax_version: str = Form("6.5"),
+    eric_home: Optional[str] = Form(None),
+    pdf_name: Optional[str] = Form(None),
+    log_dir: Optional[str] = Form(None),
+    eric_version: Optional[str] = Form(None),
+):
+    return await _eric_executor(_eric_home(eric_home, eric_version)).run(
+        _send, xml_file, certificate, pin, tax_type, tax_version, eric_home, pdf_name, log_dir, eric_version
+    )
+
+
 if __name__ == "__main__":  # pragma: no cover
     try:
         import uvicorn
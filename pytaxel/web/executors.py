@@ -0,0 +1,63 @@
+"""Bounded executors keeping blocking work off the web event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when an executor already holds as much work as it may queue."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} executor is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Thread pool that rejects new work once ``max_workers + max_queue`` jobs are pending.
+
+    Rejecting early keeps queueing delay, and with it tail latency, bounded
+    instead of letting requests pile up behind a busy pool.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 5):
+        self.name = name
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pytaxel-{name}")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        return self._pending
+
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise ExecutorSaturated(self.name, self.retry_after)
+            self._pending += 1
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the job really finishes, even if the request is cancelled.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
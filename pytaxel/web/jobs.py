@@ -0,0 +1,428 @@
+"""Persistent job queue for validations that outlive an HTTP request.
+
+Jobs are rows in a SQLite database: submitting one returns at once, worker
+threads claim queued jobs and store the result, and clients poll for it or
+receive it at a callback URL. Because the queue is on disk, jobs queued or
+running when the server stops are picked up again after a restart. A claimed
+job holds a lease recorded with its owner (host, pid and a per-store token),
+which the runner renews while the handler runs. A job whose lease runs out
+(its process died) is claimed again, up to ``max_attempts`` times; on start,
+a runner expires at once the leases of dead processes on the same host, so
+jobs interrupted by a restart do not wait for that. Several processes may
+share a database.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Handler for one job kind: (params, payload) -> JSON-serialisable result.
+JobHandler = Callable[[Dict[str, Any], str], Dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    payload TEXT,
+    callback_url TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    lease_until REAL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    callback_status TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+
+def default_db_path() -> Path:
+    env = os.environ.get("PYTAXEL_CACHE_DIR")
+    if env:
+        return Path(env) / "jobs.sqlite3"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pytaxel" / "jobs.sqlite3"
+
+
+def _default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_gone(owner: str, current: str) -> bool:
+    """Whether ``owner`` is a process on this host that no longer runs."""
+    host, pid, _ = owner.rsplit(":", 2)
+    if host != current.rsplit(":", 2)[0] or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner != current  # an earlier store of a process that reused our pid
+    if os.name != "posix":
+        return False  # no safe liveness probe; the lease runs out instead
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    created: float
+    params: Dict[str, Any] = field(default_factory=dict)
+    callback_url: Optional[str] = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    attempts: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    callback_status: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("created", "started", "finished"):
+            data[key] = _timestamp(data[key])
+        return data
+
+
+_COLUMNS = (
+    "id, kind, status, created, params, callback_url, started, finished, attempts, result, error, callback_status"
+)
+
+
+def _job(row: Tuple[Any, ...]) -> Job:
+    job = Job(*row)
+    job.params = json.loads(row[4])
+    job.result = json.loads(row[9]) if row[9] is not None else None
+    return job
+
+
+class JobStore:
+    """Jobs and their payloads in a SQLite database at ``path``.
+
+    ``owner`` identifies this store's leases; it defaults to
+    ``<host>:<pid>:<token>``.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        owner: Optional[str] = None,
+    ):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = owner or _default_owner()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if "owner" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")  # databases from before leases had owners
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode (transactions are explicit)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def submit(self, kind: str, payload: str, params: Dict[str, Any], callback_url: Optional[str] = None) -> Job:
+        job = Job(uuid.uuid4().hex, kind, QUEUED, time.time(), params, callback_url)
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, status, params, payload, callback_url, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.id, kind, QUEUED, json.dumps(params), payload, callback_url, job.created),
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._conn().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def claim(self, kinds: Tuple[str, ...]) -> Optional[Tuple[Job, str]]:
+        """Mark the oldest runnable job of one of ``kinds`` as running and return it with its payload.
+
+        Runnable are queued jobs and running jobs whose lease expired; the
+        latter fail for good once they were claimed ``max_attempts`` times.
+        """
+        now = time.time()
+        marks = ", ".join("?" * len(kinds))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, payload = NULL, error = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, f"abandoned after {self.max_attempts} attempts", RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                f"SELECT id, payload FROM jobs WHERE kind IN ({marks}) "
+                "AND (status = ? OR (status = ? AND lease_until < ?)) ORDER BY created LIMIT 1",
+                (*kinds, QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started = ?, lease_until = ?, owner = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (RUNNING, now, now + self.lease_seconds, self.owner, row[0]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        job = self.get(row[0])
+        assert job is not None
+        return job, row[1]
+
+    def renew(self) -> int:
+        """Extend the leases of the jobs this store is running; returns how many."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET lease_until = ? WHERE status = ? AND owner = ?",
+            (time.time() + self.lease_seconds, RUNNING, self.owner),
+        )
+        return cursor.rowcount
+
+    def expire_orphans(self) -> int:
+        """Expire the leases of running jobs whose owner process on this host is gone.
+
+        :meth:`claim` then picks them up (or fails them once their attempts
+        are used up) without waiting for the lease to run out. Returns how
+        many were expired.
+        """
+        conn = self._conn()
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status = ? AND owner IS NOT NULL", (RUNNING,)).fetchall()
+        orphans = [(job_id, owner) for job_id, owner in rows if _owner_gone(owner, self.owner)]
+        for job_id, owner in orphans:
+            conn.execute(
+                "UPDATE jobs SET lease_until = 0 WHERE id = ? AND status = ? AND owner = ?", (job_id, RUNNING, owner)
+            )
+        return len(orphans)
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Store the outcome; the payload is dropped since it is not needed any more."""
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, finished = ?, lease_until = NULL, payload = NULL, result = ?, error = ? "
+            "WHERE id = ?",
+            (
+                FAILED if error is not None else DONE,
+                time.time(),
+                json.dumps(result) if result is not None else None,
+                error,
+                job_id,
+            ),
+        )
+
+    def set_callback_status(self, job_id: str, status: str) -> None:
+        self._conn().execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (status, job_id))
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that finished more than ``older_than`` seconds ago."""
+        cursor = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?", (DONE, FAILED, time.time() - older_than)
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class JobRunner:
+    """Worker threads running the jobs of a :class:`JobStore` with one handler per kind.
+
+    A further thread renews the leases of running jobs every third of the
+    lease time and, with ``ttl`` set, purges jobs finished more than ``ttl``
+    seconds ago once every ``purge_interval`` seconds. Callbacks are posted
+    from a separate thread pool, so slow callback URLs do not delay jobs.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, JobHandler],
+        workers: int = 1,
+        poll_interval: float = 1.0,
+        callback_timeout: float = 10.0,
+        callback_attempts: int = 3,
+        ttl: Optional[float] = None,
+        purge_interval: float = 3600.0,
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.callback_timeout = callback_timeout
+        self.callback_attempts = callback_attempts
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._maintainer: Optional[threading.Thread] = None
+        self._callbacks = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pytaxel-job-callback")
+
+    def start(self) -> "JobRunner":
+        try:
+            self.store.expire_orphans()
+        except sqlite3.Error:
+            logger.exception("Expiring the leases of interrupted jobs failed")
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"pytaxel-job-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._maintainer = threading.Thread(target=self._maintain, name="pytaxel-job-leases", daemon=True)
+        self._maintainer.start()
+        return self
+
+    def submit(self, kind: str, payload: str, params: Dict[str, Any], callback_url: Optional[str] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        job = self.store.submit(kind, payload, params, callback_url)
+        self._wakeup.set()
+        return job
+
+    def close(self, wait: bool = True) -> None:
+        """Stop claiming jobs; running jobs finish first when ``wait`` is set."""
+        self._stopping.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+        self._callbacks.shutdown(wait=wait)
+        # Leases are renewed until the jobs finished (or, without ``wait``, are abandoned).
+        self._stopped.set()
+        if wait and self._maintainer is not None:
+            self._maintainer.join()
+        self._maintainer = None
+
+    def _maintain(self) -> None:
+        interval = self.store.lease_seconds / 3 or self.poll_interval
+        last_purge: Optional[float] = None
+        while True:
+            try:
+                self.store.renew()
+                now = time.monotonic()
+                if self.ttl is not None and (last_purge is None or now - last_purge >= self.purge_interval):
+                    last_purge = now
+                    self.store.purge(self.ttl)
+            except sqlite3.Error:
+                logger.exception("Renewing job leases failed")
+            if self._stopped.wait(interval):
+                return
+
+    def _loop(self) -> None:
+        kinds = tuple(self.handlers)
+        while not self._stopping.is_set():
+            try:
+                claimed = self.store.claim(kinds)
+            except sqlite3.Error:
+                logger.exception("Claiming a job failed")
+                claimed = None
+            if claimed is None:
+                # Also poll, for jobs submitted by other processes sharing the database.
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                self._run(*claimed)
+            except Exception:  # noqa: BLE001
+                # E.g. the database stayed locked: the lease runs out and the job is claimed again.
+                logger.exception("Finishing job %s failed", claimed[0].id)
+
+    def _run(self, job: Job, payload: str) -> None:
+        try:
+            result = self.handlers[job.kind](job.params, payload)
+        except Exception as exc:  # noqa: BLE001
+            code = getattr(exc, "code", None)
+            self.store.finish(job.id, {"code": code} if code is not None else None, str(exc) or type(exc).__name__)
+        else:
+            self.store.finish(job.id, result)
+        if job.callback_url:
+            # Retries back off for seconds; they must not hold up the next job.
+            self._callbacks.submit(self._deliver, job.id, job.callback_url)
+
+    def _deliver(self, job_id: str, url: str) -> None:
+        try:
+            self._post_status(job_id, url)
+        except Exception:  # noqa: BLE001
+            logger.exception("Delivering the callback of job %s failed", job_id)
+
+    def _post_status(self, job_id: str, url: str) -> None:
+        """POST the finished job's status document to its callback URL."""
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        body = json.dumps(job.to_dict()).encode("utf-8")
+        status = "failed"
+        for attempt in range(self.callback_attempts):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+            request = urllib.request.Request(url, body, {"Content-Type": "application/json"}, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=self.callback_timeout) as response:
+                    status = f"delivered ({response.status})"
+                break
+            except Exception as exc:  # noqa: BLE001
+                status = f"failed: {exc}"
+        self.store.set_callback_status(job_id, status)
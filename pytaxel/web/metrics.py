@@ -0,0 +1,291 @@
+"""In-process metrics for the web API, rendered in the Prometheus text format.
+
+Counters, gauges and histograms are kept in memory and exposed by ``/metrics``
+(text exposition format 0.0.4), so any Prometheus-compatible scraper can read
+them without an extra server or client library. Values are per process; run
+one scrape target per uvicorn worker.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from pytaxel.ebilanz import template_cache_info
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Union[float, Mapping[LabelValues, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name!r} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Mapping[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class _Value(_Metric):
+    """Shared storage for counters and gauges: one float per label combination."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Unlabelled metrics are exported as 0 before their first update.
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+        self._function: Optional[Callable[[], Sample]] = None
+
+    def set_function(self, function: Callable[[], Sample]) -> None:
+        """Read the value(s) from ``function`` at scrape time instead of storing them.
+
+        ``function`` returns a number, or for labelled metrics a mapping from
+        label-value tuples to numbers.
+        """
+        self._function = function
+
+    def _add(self, amount: float, labels: Mapping[str, object]) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        if self._function is not None:
+            current = self._function()
+            values = dict(current) if isinstance(current, Mapping) else {(): float(current)}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_Value):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._add(amount, labels)
+
+
+class Gauge(_Value):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self._add(-amount, labels)
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextlib.contextmanager
+    def track_inprogress(self, **labels: object) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets (seconds by convention)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [count per bucket (+Inf last), sum].
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the duration of the block; also usable as a decorator."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: object) -> int:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_label_text(names, key + (_format_value(bound),))} {cumulative}"
+            labels = _label_text(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REQUEST_SECONDS = Histogram(
+    "pytaxel_request_duration_seconds",
+    "HTTP request latency including executor queueing, by endpoint.",
+    ["endpoint"],
+)
+REQUESTS = Counter(
+    "pytaxel_requests_total",
+    "HTTP requests by endpoint and status code.",
+    ["endpoint", "status"],
+)
+PHASE_SECONDS = Histogram(
+    "pytaxel_phase_duration_seconds",
+    "Time spent in the generate, extract, validate and send work itself (excluding queueing).",
+    ["phase"],
+)
+ERIC_SECONDS = Histogram(
+    "pytaxel_eric_call_duration_seconds",
+    "Duration of ERiC validate/send calls in the worker pool (cache hits excluded).",
+    ["operation"],
+)
+ERIC_ERRORS = Counter(
+    "pytaxel_eric_errors_total",
+    "Failed ERiC calls by operation and EricError code (exception name for other failures).",
+    ["operation", "code"],
+)
+ERIC_IN_FLIGHT = Gauge("pytaxel_eric_in_flight", "ERiC validate/send calls currently in progress.")
+VALIDATION_CACHE = Counter(
+    "pytaxel_validation_cache_requests_total",
+    "Validation cache lookups by result (hit or miss).",
+    ["result"],
+)
+EXECUTOR_PENDING = Gauge(
+    "pytaxel_executor_pending",
+    "Jobs queued or running per executor.",
+    ["executor"],
+)
+EXECUTOR_CAPACITY = Gauge(
+    "pytaxel_executor_capacity",
+    "Jobs an executor accepts before answering 503.",
+    ["executor"],
+)
+EXECUTOR_REJECTED = Counter(
+    "pytaxel_executor_rejected_total",
+    "Requests rejected with 503 because the executor queue was full.",
+    ["executor"],
+)
+TEMPLATE_CACHE = Counter(
+    "pytaxel_template_cache_lookups_total",
+    "Compiled template cache lookups by result (hit or miss).",
+    ["result"],
+)
+TEMPLATE_CACHE_ENTRIES = Gauge("pytaxel_template_cache_entries", "Compiled templates currently cached.")
+JOBS = Gauge("pytaxel_jobs", "Background validation jobs in the job store by status.", ["status"])
+
+
+def _template_cache_lookups() -> Dict[LabelValues, float]:
+    info = template_cache_info()
+    return {("hit",): info.hits, ("miss",): info.misses}
+
+
+TEMPLATE_CACHE.set_function(_template_cache_lookups)
+TEMPLATE_CACHE_ENTRIES.set_function(lambda: template_cache_info().currsize)
@@ -0,0 +1,130 @@
+"""Upload size limits and single-pass reading of uploaded files.
+
+Starlette spools each uploaded file into a ``SpooledTemporaryFile`` that
+stays in memory up to a threshold and moves to disk beyond it; routes of
+:func:`spooling_route` set that threshold for their own requests only.
+:class:`UploadLimitMiddleware` caps the request body: a ``Content-Length``
+over the limit is answered with 413 before anything is read, and a body
+without one (chunked transfer) is counted while it arrives and cut off with
+413 as soon as it passes the limit. :func:`read_upload_text` then decodes a
+spooled upload chunk by chunk while hashing its bytes, so the text and its
+sha256 come from one pass over the buffer.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import io
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Tuple, Type
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+CHUNK_SIZE = 64 * 1024
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"Request body exceeds the upload limit of {max_bytes} bytes"
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware rejecting request bodies larger than ``max_bytes`` with 413."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or ())
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse({"detail": _too_large(self.max_bytes)}, status_code=413)
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the response.
+                    raise HTTPException(status_code=413, detail=_too_large(self.max_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def read_upload_text(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, str]:
+    """Decode a UTF-8 upload and hash it in one pass; returns ``(text, sha256 hex)``.
+
+    Newlines are translated like ``Path.read_text`` does; the digest is over
+    the raw bytes.
+    """
+    digest = hashlib.sha256()
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    parts = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts), digest.hexdigest()
+
+
+def copy_upload(file: BinaryIO, target: BinaryIO, chunk_size: int = CHUNK_SIZE) -> str:
+    """Copy an upload to ``target`` in chunks; returns the sha256 hex of the bytes copied."""
+    digest = hashlib.sha256()
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest()
+
+
+def spooling_route(spool_max_size: int) -> Type[APIRoute]:
+    """Route class whose requests keep uploaded files in memory up to ``spool_max_size`` bytes.
+
+    Starlette only offers a process-wide ``MultiPartParser.spool_max_size``;
+    this parses the form with a subclass instead, leaving other apps alone.
+    """
+    from starlette.formparsers import MultiPartException, MultiPartParser
+
+    parser_class = type("SpoolingMultiPartParser", (MultiPartParser,), {"spool_max_size": spool_max_size})
+
+    class SpoolingRequest(Request):
+        async def _get_form(self, **limits: Any) -> Any:
+            content_type = self.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+            if self._form is None and content_type == "multipart/form-data":
+                try:
+                    self._form = await parser_class(self.headers, self.stream(), **limits).parse()
+                except MultiPartException as exc:
+                    raise HTTPException(status_code=400, detail=exc.message) from exc
+            return await super()._get_form(**limits)
+
+    class SpoolingRoute(APIRoute):
+        def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+            handler = super().get_route_handler()
+
+            async def spooling_handler(request: Request) -> Response:
+                return await handler(SpoolingRequest(request.scope, request.receive))
+
+            return spooling_handler
+
+    return SpoolingRoute
@@ -0,0 +1,53 @@
+"""Smoke test for the offline benchmark harness."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+PYTHON = sys.executable
+
+
+def test_benchmark_harness_writes_json(tmp_path: Path):
+    output = tmp_path / "bench.json"
+    stages = "parse_csv,render_ebilanz,tree_write,extract_to_csv"
+    command = [
+        PYTHON,
+        str(REPO_ROOT / "benchmarks" / "run.py"),
+        "--sizes",
+        "10,20",
+        "--stages",
+        stages,
+        "--repeat",
+        "1",
+        "--min-time",
+        "0",
+    ]
+
+    result = subprocess.run(command + ["--output", str(output)], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert [(r["stage"], r["positions"]) for r in report["results"]] == [
+        (stage, size) for size in (10, 20) for stage in stages.split(",")
+    ]
+    assert all(r["median"] > 0 for r in report["results"])
+
+    # Comparing against itself with a generous threshold reports no regression.
+    result = subprocess.run(
+        command + ["--compare", str(output), "--threshold", "1000"], cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert "vs baseline" in result.stdout
+
+
+def test_importtime_benchmark_finds_no_forbidden_imports():
+    # A generous budget: this only checks that no scenario imports the ERiC layer.
+    result = subprocess.run(
+        [PYTHON, str(REPO_ROOT / "benchmarks" / "bench_importtime.py"), "--repeat", "1", "--budget-ms", "10000"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "generate" in result.stdout
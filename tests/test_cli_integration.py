@@ -1,5 +1,6 @@
 """CLI integration tests using subprocess."""
 
+import json
 import os
 import subprocess
 import sys
@@ -45,6 +46,51 @@ def test_generate_cli(tmp_path: Path):
     assert result.returncode == 0, result.stderr
     assert output.exists()
 
+
+def test_generate_batch_cli(tmp_path: Path):
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template = (
+        REPO_ROOT
+        / "taxel"
+        / "templates"
+        / "elster_v11"
+        / "taxonomy_v6.5"
+        / "ebilanz.xml"
+    )
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    for name in ("client_a", "client_b"):
+        (inputs / f"{name}.csv").write_bytes(csv_file.read_bytes())
+    (inputs / "broken.csv").write_text("tag,value\nunknown:tag,1\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    result = subprocess.run(
+        [
+            PYTHON,
+            "-m",
+            "pytaxel.cli.main",
+            "generate-batch",
+            str(inputs),
+            "--template-file",
+            str(template),
+            "--output-dir",
+            str(out_dir),
+            "--jobs",
+            "2",
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": str(REPO_ROOT), **os.environ},
+    )
+
+    assert result.returncode == 1
+    assert (out_dir / "client_a.xml").exists()
+    assert (out_dir / "client_b.xml").exists()
+    assert "FAIL" in result.stdout and "broken.csv" in result.stdout
+    assert "2 succeeded, 1 failed" in result.stdout
+
+
 def test_extract_cli(tmp_path: Path):
     xml_file = (
         REPO_ROOT
@@ -151,3 +197,206 @@ def test_eric_check_without_eric_home():
 
     assert result.returncode != 0
     assert "ERIC_HOME is not set" in result.stderr
+
+
+def test_generate_cli_incremental(tmp_path: Path):
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template = (
+        REPO_ROOT
+        / "taxel"
+        / "templates"
+        / "elster_v11"
+        / "taxonomy_v6.5"
+        / "ebilanz.xml"
+    )
+    edited_csv = tmp_path / "input.csv"
+    edited_csv.write_bytes(csv_file.read_bytes())
+    output = tmp_path / "out.xml"
+    full_output = tmp_path / "full.xml"
+
+    def generate(*extra: str, target: Path = output) -> None:
+        result = subprocess.run(
+            [
+                PYTHON,
+                "-m",
+                "pytaxel.cli.main",
+                "generate",
+                "--csv-file",
+                str(edited_csv),
+                "--template-file",
+                str(template),
+                "--output-file",
+                str(target),
+                *extra,
+            ],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+    generate("--incremental")
+    assert (tmp_path / "out.xml.state.json").exists()
+
+    rows = edited_csv.read_text(encoding="utf-8").splitlines()
+    rows[-1] = rows[-1].rsplit(",", 2)[0] + ",123.45," + rows[-1].rsplit(",", 1)[1]
+    rows.append("ebilanz:incrementalCheck,1.00,context1")
+    edited_csv.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    generate("--incremental")
+    generate(target=full_output)
+    assert output.read_bytes() == full_output.read_bytes()
+
+
+def test_generate_cli_profile(tmp_path: Path):
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template = (
+        REPO_ROOT
+        / "taxel"
+        / "templates"
+        / "elster_v11"
+        / "taxonomy_v6.5"
+        / "ebilanz.xml"
+    )
+    profile = tmp_path / "profile.json"
+
+    result = subprocess.run(
+        [
+            PYTHON,
+            "-m",
+            "pytaxel.cli.main",
+            "--profile",
+            "--profile-output",
+            str(profile),
+            "generate",
+            "--csv-file",
+            str(csv_file),
+            "--template-file",
+            str(template),
+            "--output-file",
+            str(tmp_path / "out.xml"),
+        ],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    for phase in ("pytaxel generate", "parse_csv", "render", "serialize"):
+        assert phase in result.stderr
+    speedscope = json.loads(profile.read_text(encoding="utf-8"))
+    frames = [frame["name"] for frame in speedscope["shared"]["frames"]]
+    assert "render" in frames
+    assert speedscope["profiles"][0]["events"]
+
+
+def test_generate_cli_prof_output_does_not_trace_memory(tmp_path: Path, monkeypatch, capsys):
+    import tracemalloc
+
+    from pytaxel.cli.main import main
+
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template = REPO_ROOT / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+    started = []
+    monkeypatch.setattr(tracemalloc, "start", lambda *args: started.append(args))
+    argv = ["generate", "--csv-file", str(csv_file), "--template-file", str(template)]
+    argv += ["--output-file", str(tmp_path / "out.xml")]
+
+    assert main(["--profile-output", str(tmp_path / "out.prof"), *argv]) == 0
+    assert (tmp_path / "out.prof").stat().st_size > 0
+    assert started == []
+    assert main(["--profile", *argv]) == 0
+    assert len(started) == 1
+    assert "peak [MiB]" in capsys.readouterr().err
+
+
+def test_extract_and_generate_do_not_import_eric(tmp_path: Path):
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template = (
+        REPO_ROOT
+        / "taxel"
+        / "templates"
+        / "elster_v11"
+        / "taxonomy_v6.5"
+        / "ebilanz.xml"
+    )
+    xml_file = tmp_path / "out.xml"
+    # Record any attempt to import the ERiC layer, whether or not eric-py is installed.
+    script = f"""
+import sys
+
+attempted = []
+
+
+class Blocker:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] == "eric_py" or name.startswith("pytaxel.eric"):
+            attempted.append(name)
+        return None
+
+
+sys.meta_path.insert(0, Blocker())
+from pytaxel.cli.main import main
+
+assert main(["generate", "--csv-file", {str(csv_file)!r}, "--template-file", {str(template)!r},
+             "--output-file", {str(xml_file)!r}]) == 0
+assert main(["extract", "--xml-file", {str(xml_file)!r}, "--output-file", {str(tmp_path / "out.csv")!r}]) == 0
+assert not attempted, attempted
+"""
+
+    result = subprocess.run(
+        [PYTHON, "-c", script],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT)},
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_check_cli_rejects_unknown_tags(tmp_path: Path):
+    csv_file = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    schema = tmp_path / "ebilanz.xsd"
+    elements = "".join(f'<xs:element name="bilanz.pos{n}"/>' for n in range(50) if n != 7)
+    schema.write_text(
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"'
+        ' targetNamespace="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema">'
+        f'<xs:element name="stichtag"/>{elements}</xs:schema>',
+        encoding="utf-8",
+    )
+    env = {**os.environ, "PYTAXEL_CACHE_DIR": str(tmp_path / "cache")}
+
+    def pytaxel(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [PYTHON, "-m", "pytaxel.cli.main", *args],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+
+    result = pytaxel("check", "--csv-file", str(csv_file), "--taxonomy", str(schema))
+    assert result.returncode == 1, result.stderr
+    assert "UNKNOWN  ebilanz:bilanz.pos7" in result.stdout
+    assert "1 unknown tag(s)" in result.stdout
+    assert list((tmp_path / "cache" / "taxonomy").glob("*.tags"))
+
+    result = pytaxel("check", "--taxonomy", str(schema), "--complete", "ebilanz:bilanz.pos4", "--limit", "3")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["ebilanz:bilanz.pos4", "ebilanz:bilanz.pos40", "ebilanz:bilanz.pos41"]
+
+    result = pytaxel(
+        "generate",
+        "--csv-file",
+        str(csv_file),
+        "--template-file",
+        str(REPO_ROOT / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"),
+        "--output-file",
+        str(tmp_path / "out.xml"),
+        "--taxonomy",
+        str(schema),
+    )
+    assert result.returncode == 1
+    assert "ebilanz:bilanz.pos7" in result.stderr
+    assert not (tmp_path / "out.xml").exists()
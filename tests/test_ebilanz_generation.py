@@ -1,12 +1,36 @@
+import dataclasses
+import io
 import sys
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+import pytest
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from pytaxel.ebilanz import parse_csv, render_ebilanz  # noqa: E402
+from pytaxel.ebilanz import (  # noqa: E402
+    EBilanz,
+    MasterData,
+    Position,
+    PositionTable,
+    UnknownTagError,
+    clear_template_cache,
+    extract_to_csv,
+    fingerprint,
+    generate_xml_from_csv,
+    iter_extracted_rows,
+    load_mapping,
+    load_taxonomy,
+    load_template,
+    parse_csv,
+    regenerate,
+    render_ebilanz,
+    stream_ebilanz,
+    template_cache_info,
+)
+from pytaxel.ebilanz.taxonomy import clear_taxonomy_cache  # noqa: E402
 
 
 def normalize_xml(path: Path) -> str:
@@ -41,3 +65,358 @@ def test_generate_xml_matches_expected(tmp_path: Path):
     expected = normalize_xml(expected_path)
 
     assert generated == expected
+
+
+def test_compiled_template_is_cached_and_isolated():
+    repo_root = Path(__file__).resolve().parents[1]
+    csv_path = repo_root / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+
+    clear_template_cache()
+    model = parse_csv(csv_path)
+    first = ET.tostring(render_ebilanz(model, template_path).getroot())
+    second = ET.tostring(render_ebilanz(model, load_template(template_path)).getroot())
+    empty = ET.tostring(render_ebilanz(EBilanz(master=MasterData(stichtag="", identifier="")), template_path).getroot())
+
+    assert first == second
+    assert empty != first
+    info = template_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 1)
+
+
+def test_stream_render_matches_tree_render(tmp_path: Path):
+    repo_root = Path(__file__).resolve().parents[1]
+    csv_path = repo_root / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+
+    model = parse_csv(csv_path)
+    tree_output = tmp_path / "tree.xml"
+    render_ebilanz(model, template_path).write(tree_output, encoding="utf-8", xml_declaration=True)
+    stream_output = tmp_path / "stream.xml"
+    compiled = load_template(template_path)
+    before = ET.tostring(compiled.root)
+    with stream_output.open("w", encoding="utf-8") as f:
+        stream_ebilanz(model, template_path, f)
+
+    assert stream_output.read_bytes() == tree_output.read_bytes()
+    # The cached template is serialised in place, never modified.
+    assert ET.tostring(compiled.root) == before
+
+
+def test_iter_extracted_rows_follows_document_order():
+    repo_root = Path(__file__).resolve().parents[1]
+    expected_path = repo_root / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample_expected.xml"
+
+    rows = list(iter_extracted_rows(expected_path))
+    root = ET.parse(expected_path).getroot()
+    texts = [elem.text.strip() for elem in root.iter() if elem.text and elem.text.strip()]
+
+    assert [row["value"] for row in rows] == texts
+    assert any(row["tag"] == "ebilanz:stichtag" for row in rows)
+
+
+def test_extract_to_csv_leaves_no_output_for_broken_xml(tmp_path: Path):
+    output = tmp_path / "out.csv"
+    broken = io.BytesIO(b"<Elster><ebilanz>1</ebilanz><truncated>")
+    with pytest.raises(ET.ParseError):
+        extract_to_csv(broken, output)
+    assert list(tmp_path.iterdir()) == []
+
+    output.write_text("previous\n", encoding="utf-8")
+    with pytest.raises(ET.ParseError):
+        extract_to_csv(io.BytesIO(b"<Elster><a>1</a><b>"), output)
+    assert output.read_text(encoding="utf-8") == "previous\n"
+    assert list(tmp_path.iterdir()) == [output]
+
+
+def test_fingerprint_ignores_cosmetic_differences():
+    compact = (
+        '<Elster xmlns="http://www.elster.de/elsterxml/schema/v11">'
+        '<ebilanz:EBilanz xmlns:ebilanz="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema" a="1" b="2">'
+        "<ebilanz:stichtag>20231231</ebilanz:stichtag></ebilanz:EBilanz></Elster>"
+    )
+    cosmetic = (
+        "<?xml version='1.0' encoding='utf-8'?>\n"
+        '<e:Elster xmlns:e="http://www.elster.de/elsterxml/schema/v11">\n'
+        "  <!-- reformatted -->\n"
+        '  <eb:EBilanz b="2" a="1" xmlns:eb="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema">\n'
+        "    <eb:stichtag>20231231</eb:stichtag>\n"
+        "  </eb:EBilanz>\n"
+        "</e:Elster>\n"
+    )
+    changed = compact.replace("20231231", "20221231")
+
+    assert fingerprint(compact) == fingerprint(cosmetic.encode("utf-8"))
+    assert fingerprint(compact) == fingerprint(ET.fromstring(cosmetic))
+    assert fingerprint(compact) != fingerprint(changed)
+    # Whitespace inside a value is part of it.
+    assert fingerprint(compact) != fingerprint(compact.replace(">20231231<", "> 20231231 <"))
+
+
+def test_columnar_positions_render_like_list():
+    repo_root = Path(__file__).resolve().parents[1]
+    csv_path = repo_root / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+
+    listed = parse_csv(csv_path)
+    columnar = parse_csv(csv_path, columnar=True)
+
+    assert isinstance(columnar.positions, PositionTable)
+    assert columnar.positions == listed.positions
+    assert list(columnar.positions) == listed.positions
+    assert columnar.positions[-1] == listed.positions[-1]
+    assert not hasattr(listed.positions[0], "__dict__")
+    assert ET.tostring(render_ebilanz(columnar, template_path).getroot()) == ET.tostring(
+        render_ebilanz(listed, template_path).getroot()
+    )
+
+
+def test_position_table_interns_tags_and_contexts():
+    table = PositionTable([Position("ebilanz:a", "1", "context1"), ("ebilanz:b", "2", None)])
+    table.append("ebilanz:a", "3", "context1")
+
+    assert len(table) == 3
+    assert table.tags == ["ebilanz:a", "ebilanz:b"]
+    assert table.contexts == ["context1"]
+    assert list(table.iter_rows()) == [
+        ("ebilanz:a", "1", "context1"),
+        ("ebilanz:b", "2", None),
+        ("ebilanz:a", "3", "context1"),
+    ]
+    assert table[1:] == [Position("ebilanz:b", "2"), Position("ebilanz:a", "3", "context1")]
+    # Position stays a dataclass (slotted where supported).
+    assert dataclasses.asdict(table[0]) == {"tag": "ebilanz:a", "value": "1", "context": "context1"}
+    assert dataclasses.replace(table[0], value="2") == Position("ebilanz:a", "2", "context1")
+
+
+def test_fast_parse_matches_dict_reader():
+    repo_root = Path(__file__).resolve().parents[1]
+    fixtures = sorted((repo_root / "taxel" / "test_data").rglob("*.csv"))
+    assert fixtures
+    edge_cases = (
+        "context,value,tag,extra\n"
+        "\n"
+        ", 20231231 ,ebilanz:stichtag,x\n"
+        "context1, 1.00 , ebilanz:a \n"
+        ",,\n"
+        "context2,2.00\n"
+        '"context1","3,5","ebilanz:b","y","z"\n'
+        ",DE,unit\n"
+        " , 4 ,ebilanz:a\n"
+    )
+    sources = [lambda path=path: path for path in fixtures] + [lambda: io.StringIO(edge_cases)]
+
+    for source in sources:
+        for columnar in (False, True):
+            expected = parse_csv(source(), columnar=columnar)
+            actual = parse_csv(source(), columnar=columnar, fast=True)
+            assert actual == expected
+
+
+def test_incremental_regenerate_matches_full_render(tmp_path: Path):
+    repo_root = Path(__file__).resolve().parents[1]
+    csv_path = repo_root / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+    output = tmp_path / "out.xml"
+
+    def full_render(model: EBilanz) -> bytes:
+        buffer = io.BytesIO()
+        render_ebilanz(model, template_path).write(buffer, encoding="utf-8", xml_declaration=True)
+        return buffer.getvalue()
+
+    model = parse_csv(csv_path)
+    assert regenerate(model, template_path, output) == "full"
+    assert (tmp_path / "out.xml.state.json").exists()
+    assert regenerate(model, template_path, output) == "unchanged"
+
+    edits = [
+        lambda positions: positions[0].__setattr__("value", "4711 & more"),
+        lambda positions: positions.append(Position("ebilanz:neuePosition", "1.00", "context1")),
+        lambda positions: positions.pop(0),
+        lambda positions: positions.pop(),
+    ]
+    for edit in edits:
+        edit(model.positions)
+        model.master.stichtag = "20240101" if model.master.stichtag != "20240101" else "20231231"
+        assert regenerate(model, template_path, output) == "patched"
+        assert output.read_bytes() == full_render(model)
+
+    output.write_bytes(output.read_bytes().replace(b"?>", b"?> ", 1))
+    assert regenerate(model, template_path, output) == "full"
+    assert output.read_bytes() == full_render(model)
+
+
+def test_incremental_regenerate_falls_back_when_a_removed_span_is_not_found(tmp_path: Path):
+    # An unprefixed CSV tag serialises like the template's default-namespace child <Plain>,
+    # so the scan cannot tell which element to remove.
+    template_path = tmp_path / "template.xml"
+    template_path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Elster xmlns="http://www.elster.de/elsterxml/schema/v11"><Nutzdaten>'
+        '<ebilanz:EBilanz xmlns:ebilanz="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema">'
+        "<ebilanz:stichtag>20000101</ebilanz:stichtag><Plain>x</Plain></ebilanz:EBilanz></Nutzdaten></Elster>\n",
+        encoding="utf-8",
+    )
+    csv_path = tmp_path / "input.csv"
+    output = tmp_path / "out.xml"
+    expected = tmp_path / "expected.xml"
+    for rows in ("Plain,1\n", ""):
+        csv_path.write_text(f"tag,value\nebilanz:stichtag,20231231\n{rows}", encoding="utf-8")
+        generate_xml_from_csv(csv_path, template_path, output, incremental=True)
+        generate_xml_from_csv(csv_path, template_path, expected)
+        assert output.read_bytes() == expected.read_bytes()
+
+
+def test_mapping_renders_contexts_and_units(tmp_path: Path):
+    repo_root = Path(__file__).resolve().parents[1]
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+    mapping_path = tmp_path / "mapping.csv"
+    mapping_path.write_text(
+        "tag,period,unit,decimals\n"
+        "ebilanz:bilanz.summeAktiva,instant,monetary,\n"
+        "ebilanz:guv.jahresergebnis,duration,monetary,0\n"
+        "ebilanz:anzahlMitarbeiter,instant,,\n",
+        encoding="utf-8",
+    )
+    positions = [
+        Position("ebilanz:bilanz.summeAktiva", "1000.00", "AJ"),
+        Position("ebilanz:guv.jahresergebnis", "100", None),
+        Position("ebilanz:anzahlMitarbeiter", "12", "AJ"),
+        # Further contexts are placed after the tag's first fact, not at the end.
+        Position("ebilanz:bilanz.summeAktiva", "900.00", "VJ"),
+    ]
+    model = EBilanz(MasterData(stichtag="20240229", identifier="DE123"), positions)
+    xbrli = "{http://www.xbrl.org/2003/instance}"
+
+    root = render_ebilanz(model, template_path, mapping_path).getroot()
+    facts = [elem for elem in root.iter() if elem.get("contextRef")]
+    assert [(elem.tag.split("}")[1], elem.text, elem.get("contextRef")) for elem in facts] == [
+        ("bilanz.summeAktiva", "1000.00", "I-AJ"),
+        ("bilanz.summeAktiva", "900.00", "I-VJ"),
+        ("guv.jahresergebnis", "100", "D-AJ"),
+        ("anzahlMitarbeiter", "12", "I-AJ"),
+    ]
+    assert [(elem.get("unitRef"), elem.get("decimals")) for elem in facts] == [
+        ("EUR", "2"),
+        ("EUR", "2"),
+        ("EUR", "0"),
+        (None, None),
+    ]
+    periods = {
+        context.get("id"): [elem.text for elem in context.find(f"{xbrli}period")]
+        for context in root.iter(f"{xbrli}context")
+    }
+    assert periods == {"I-AJ": ["2024-02-29"], "I-VJ": ["2023-02-28"], "D-AJ": ["2023-03-01", "2024-02-29"]}
+    assert [unit.findtext(f"{xbrli}measure") for unit in root.iter(f"{xbrli}unit")] == ["iso4217:EUR"]
+
+    buffer = io.BytesIO()
+    ET.ElementTree(root).write(buffer, encoding="utf-8")
+    assert b'xmlns:iso4217="http://www.xbrl.org/2003/iso4217"' in buffer.getvalue()
+    buffer.seek(0)
+    rows = [row for row in iter_extracted_rows(buffer) if row["context"]]
+    assert [(row["tag"], row["context"]) for row in rows] == [
+        ("ebilanz:bilanz.summeAktiva", "I-AJ"),
+        ("ebilanz:bilanz.summeAktiva", "I-VJ"),
+        ("ebilanz:guv.jahresergebnis", "D-AJ"),
+        ("ebilanz:anzahlMitarbeiter", "I-AJ"),
+    ]
+
+    # Extracted context ids render back to the same facts.
+    extracted = EBilanz(model.master, [Position(row["tag"], row["value"], row["context"]) for row in rows])
+    assert ET.tostring(render_ebilanz(extracted, template_path, load_mapping(mapping_path)).getroot()) == ET.tostring(
+        root
+    )
+    assert not any(elem.get("contextRef") for elem in render_ebilanz(model, template_path).getroot().iter())
+
+    model.positions.append(Position("ebilanz:nichtGemappt", "1", "AJ"))
+    with pytest.raises(ValueError, match="nichtGemappt"):
+        render_ebilanz(model, template_path, mapping_path)
+
+
+def test_taxonomy_index_is_cached_until_the_schema_changes(tmp_path: Path):
+    schema_dir = tmp_path / "schema"
+    schema_dir.mkdir()
+    schema = schema_dir / "ebilanz.xsd"
+
+    def write_schema(*names: str) -> None:
+        elements = "".join(f'<xs:element name="{name}"><xs:annotation/></xs:element>' for name in names)
+        schema.write_text(
+            '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"'
+            ' targetNamespace="http://rzf.fin-nrw.de/RMS/EBilanz/2016/XMLSchema">'
+            f"{elements}</xs:schema>",
+            encoding="utf-8",
+        )
+
+    write_schema("stichtag", "bilanz.summeAktiva", "bilanz.summePassiva")
+    (schema_dir / "other.xsd").write_text(
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:gcd="urn:gcd" targetNamespace="urn:gcd">'
+        '<xs:element name="genInfo"/></xs:schema>',
+        encoding="utf-8",
+    )
+    cache_dir = tmp_path / "cache"
+
+    index = load_taxonomy(schema_dir, cache_dir)
+    assert index.tags == (
+        "ebilanz:bilanz.summeAktiva",
+        "ebilanz:bilanz.summePassiva",
+        "ebilanz:stichtag",
+        "gcd:genInfo",
+    )
+    assert load_taxonomy(schema_dir, cache_dir) is index
+    assert len(list(cache_dir.glob("*.tags"))) == 1
+    clear_taxonomy_cache()
+    assert load_taxonomy(schema_dir, cache_dir).tags == index.tags  # read back from disk
+    assert index.complete("ebilanz:bilanz.") == ["ebilanz:bilanz.summeAktiva", "ebilanz:bilanz.summePassiva"]
+    assert index.suggest("ebilanz:bilanz.sumeAktiva")[0] == "ebilanz:bilanz.summeAktiva"
+
+    csv_text = "tag,value\nebilanz:stichtag,20231231\nebilanz:bilanz.summeAktiva,1\nebilanz:bilanz.sumePassiva,1\n"
+    with pytest.raises(UnknownTagError, match="did you mean ebilanz:bilanz.summePassiva") as excinfo:
+        parse_csv(io.StringIO(csv_text), taxonomy=index)
+    assert excinfo.value.tags == ["ebilanz:bilanz.sumePassiva"]
+    assert excinfo.value.suggestions()["ebilanz:bilanz.sumePassiva"][0] == "ebilanz:bilanz.summePassiva"
+
+    write_schema("stichtag", "bilanz.summeAktiva", "bilanz.sumePassiva")
+    rebuilt = load_taxonomy(schema_dir, cache_dir)
+    assert "ebilanz:bilanz.sumePassiva" in rebuilt
+    assert len(parse_csv(io.StringIO(csv_text), columnar=True, fast=True, taxonomy=rebuilt).positions) == 2
+
+
+def test_generate_batch_reports_files_lost_with_a_broken_worker_pool(tmp_path: Path, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    from pytaxel.ebilanz import batch
+
+    class KilledAfterFirst:
+        """Stands in for a process pool whose worker is killed (e.g. OOM) after the first file."""
+
+        def __init__(self, **_kwargs):
+            self.calls = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def submit(self, fn, *args):
+            future: Future = Future()
+            self.calls += 1
+            if self.calls == 1:
+                future.set_result(fn(*args))
+            else:
+                future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+            return future
+
+    repo_root = Path(__file__).resolve().parents[1]
+    template_path = repo_root / "taxel" / "templates" / "elster_v11" / "taxonomy_v6.5" / "ebilanz.xml"
+    csv_files = []
+    for name in ("a", "b"):
+        csv_files.append(tmp_path / f"{name}.csv")
+        csv_files[-1].write_text("tag,value\nebilanz:stichtag,20231231\n", encoding="utf-8")
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", KilledAfterFirst)
+
+    first, second = batch.generate_batch(csv_files, template_path, tmp_path / "out", jobs=2)
+
+    assert first.ok and (tmp_path / "out" / "a.xml").exists()
+    assert not second.ok and second.error.startswith("BrokenProcessPool")
@@ -0,0 +1,140 @@
+"""ERiC worker pool tests using the fake ERiC client (no ERiC libs required)."""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from pytaxel.eric import EricWorkerCrashed, EricWorkerPool, ValidationCache, validate_batch  # noqa: E402
+from pytaxel.eric import registry  # noqa: E402
+from pytaxel.eric.registry import EricInstallation, EricRegistry  # noqa: E402
+from pytaxel.eric.testing import CRASH_MARKER, ERIC_ERROR_CODE, ERIC_ERROR_MARKER, ERROR_MARKER  # noqa: E402
+
+FAKE_CLIENT = "pytaxel.eric.testing:FakeEricClient"
+XML = "<Elster/>"
+
+
+def _worker_pid(result) -> str:
+    return re.search(r"fake ERiC worker (\d+)", result.validation_response).group(1)
+
+
+def test_pool_reuses_worker_and_writes_pdf(tmp_path: Path):
+    pdf = tmp_path / "preview.pdf"
+    with EricWorkerPool(size=1, client_factory=FAKE_CLIENT, log_dir=tmp_path) as pool:
+        first = pool.validate(XML, "Bilanz_6.5", pdf_path=pdf)
+        second = pool.send(XML, "Bilanz_6.5", certificate_path="cert.pfx", pin="123456")
+
+    assert first.code == 0
+    assert pdf.exists()
+    assert second.transfer_handle == 1
+    assert _worker_pid(first) == _worker_pid(second)
+
+
+def test_pool_recycles_worker_after_max_jobs(tmp_path: Path):
+    with EricWorkerPool(size=1, max_jobs=2, client_factory=FAKE_CLIENT, log_dir=tmp_path) as pool:
+        pids = [_worker_pid(pool.validate(XML, "Bilanz_6.5")) for _ in range(4)]
+
+    assert pids[0] == pids[1]
+    assert pids[2] == pids[3]
+    assert pids[1] != pids[2]
+
+
+def test_pool_survives_worker_crash_and_job_errors(tmp_path: Path):
+    with EricWorkerPool(size=1, client_factory=FAKE_CLIENT, log_dir=tmp_path) as pool:
+        with pytest.raises(EricWorkerCrashed):
+            pool.validate(CRASH_MARKER, "Bilanz_6.5")
+        with pytest.raises(RuntimeError, match="fake ERiC error"):
+            pool.validate(ERROR_MARKER, "Bilanz_6.5")
+        assert pool.validate(XML, "Bilanz_6.5").code == 0
+
+
+def test_pool_ships_eric_errors_and_session_log_excerpts(tmp_path: Path):
+    from eric_py.errors import EricError
+
+    pool = EricWorkerPool(size=1, client_factory=FAKE_CLIENT)
+    try:
+        with pytest.raises(EricError) as raised:
+            pool.validate(ERIC_ERROR_MARKER, "Bilanz_6.5", log_dir=tmp_path / "first")
+        assert raised.value.code == ERIC_ERROR_CODE
+        pool.validate(XML, "Bilanz_6.5", log_dir=tmp_path / "second")
+        session_log = pool.log_dir / "worker-0" / "eric.log"
+        assert len(session_log.read_text(encoding="utf-8").splitlines()) == 2
+    finally:
+        pool.close()
+
+    # Each job's log dir holds only the lines written while it ran.
+    for name in ("first", "second"):
+        assert len((tmp_path / name / "eric.log").read_text(encoding="utf-8").splitlines()) == 1
+    # The pool's own temporary log dir is removed on close.
+    assert not pool.log_dir.exists()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_validate_batch_logs_per_file_and_summary(tmp_path: Path, jobs: int):
+    inputs = tmp_path / "inputs"
+    for name, text in {
+        "a/ebilanz.xml": XML,
+        "b/ebilanz.xml": "<Elster>b</Elster>",
+        "broken.xml": f"<Elster>broken{ERROR_MARKER}</Elster>",
+    }.items():
+        (inputs / name).parent.mkdir(parents=True, exist_ok=True)
+        (inputs / name).write_text(text, encoding="utf-8")
+    files = [inputs / "a" / "ebilanz.xml", inputs / "b" / "ebilanz.xml", inputs / "broken.xml"]
+    if jobs > 1:
+        # Only a worker process can survive a crash.
+        (inputs / "crash.xml").write_text(f"<Elster>crash{CRASH_MARKER}</Elster>", encoding="utf-8")
+        files.append(inputs / "crash.xml")
+    cache = ValidationCache(tmp_path / "cache")
+    logs = tmp_path / "logs"
+
+    results = validate_batch(files, "Bilanz_6.5", logs, jobs=jobs, cache=cache, client_factory=FAKE_CLIENT)
+
+    assert [r.ok for r in results] == [True, True] + [False] * (len(files) - 2)
+    assert [r.log_dir.name for r in results[:3]] == ["ebilanz-1", "ebilanz-2", "broken"]
+    assert (logs / "ebilanz-1" / "validation_response.xml").exists()
+    assert "fake ERiC error" in results[2].error
+    summary = json.loads((logs / "summary.json").read_text(encoding="utf-8"))
+    assert (summary["total"], summary["failed"], summary["codes"]) == (len(files), len(files) - 2, {"0": 2})
+    if jobs == 1:
+        # One in-process ERiC session answered every file.
+        response = (logs / "ebilanz-2" / "validation_response.xml").read_text(encoding="utf-8")
+        assert f"fake ERiC worker {os.getpid()}" in response
+
+    rerun = validate_batch(files[:2], "Bilanz_6.5", logs, jobs=jobs, cache=cache, client_factory=FAKE_CLIENT)
+    assert all(r.cached and r.ok for r in rerun)
+
+
+def test_registry_routes_by_home_and_version_without_touching_environ(tmp_path: Path, monkeypatch):
+    homes = {str(tmp_path / "eric-41"): "41.6.2.0", str(tmp_path / "eric-40"): "40.3.8.0"}
+    monkeypatch.setattr(registry, "locate_installation", lambda home: EricInstallation(Path(home), homes.get(home)))
+    monkeypatch.delenv("ERIC_HOME", raising=False)
+    eric = EricRegistry(homes, client_factory=FAKE_CLIENT)
+    try:
+        new = eric.pool(version="41.6.2.0")
+        old = eric.pool(version="40.3.8.0")
+        assert new is not old
+        assert eric.pool(str(tmp_path / "eric-41")) is new
+        assert sorted(i.version for i in eric.installations()) == ["40.3.8.0", "41.6.2.0"]
+        with pytest.raises(LookupError, match="registered: 40.3.8.0, 41.6.2.0"):
+            eric.pool(version="39.0.0.0")
+        with pytest.raises(LookupError):
+            eric.pool(str(tmp_path / "eric-40"), version="41.6.2.0")
+
+        # Both installations validate at the same time, each in its own worker.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(pool.validate, XML, "Bilanz_6.5") for pool in (new, old, new, old)]
+            results = [future.result() for future in futures]
+    finally:
+        eric.close()
+    for result, name in zip(results, ["eric-41", "eric-40", "eric-41", "eric-40"]):
+        assert f"fake ERiC home {tmp_path / name}" in result.validation_response
+    assert _worker_pid(results[0]) != _worker_pid(results[1])
+    assert "ERIC_HOME" not in os.environ
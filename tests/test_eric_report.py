@@ -0,0 +1,71 @@
+"""Parsing of ERiC validation responses into ValidationReport findings."""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from pytaxel.eric import ValidationReport  # noqa: E402
+from pytaxel.eric.report import parse_findings  # noqa: E402
+
+RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<EricBearbeiteVorgang xmlns="http://www.elster.de/EricXML/1.0/EricBearbeiteVorgang">
+  <FehlerRegelpruefung>
+    <Nutzdatenticket>1</Nutzdatenticket>
+    <Feldidentifikator>de-gaap-ci:bs.ass.fixAss</Feldidentifikator>
+    <Mehrfachzeilenindex>2</Mehrfachzeilenindex>
+    <LfdNrVordruck>1</LfdNrVordruck>
+    <VordruckZeilennummer/>
+    <FachlicheFehlerId>100170</FachlicheFehlerId>
+    <Text>Die Summe der Positionen stimmt nicht mit dem Summenwert überein.</Text>
+  </FehlerRegelpruefung>
+  <Hinweis>
+    <Nutzdatenticket>1</Nutzdatenticket>
+    <Feldidentifikator>genInfo.report.id.accordingTo</Feldidentifikator>
+    <FachlicheHinweisId>200001</FachlicheHinweisId>
+    <Text>Bitte prüfen Sie die Angabe.</Text>
+  </Hinweis>
+  <FehlerRegelpruefung>
+    <Text>Zweiter Fehler</Text>
+  </FehlerRegelpruefung>
+</EricBearbeiteVorgang>
+"""
+
+
+def test_report_parses_findings_lazily():
+    report = ValidationReport(610301202, RESPONSE, "<Server/>")
+
+    assert "findings" not in vars(report)
+    assert not report.ok
+    assert [finding.kind for finding in report.findings] == ["error", "hint", "error"]
+    assert report.errors[0].to_dict() == {
+        "kind": "error",
+        "text": "Die Summe der Positionen stimmt nicht mit dem Summenwert überein.",
+        "field": "de-gaap-ci:bs.ass.fixAss",
+        "rule_id": "100170",
+        "ticket": "1",
+        "row": "2",
+    }
+    assert report.hints[0].field == "genInfo.report.id.accordingTo"
+
+    summary = report.summary(limit=2)
+    assert (summary["errors"], summary["hints"], summary["omitted"]) == (2, 1, 1)
+    assert [finding["kind"] for finding in summary["findings"]] == ["error", "error"]
+    assert "validation_response" not in summary
+
+
+def test_parse_findings_tolerates_empty_and_truncated_responses():
+    assert parse_findings("") == []
+    truncated = RESPONSE[: RESPONSE.index("<FehlerRegelpruefung>\n    <Text>")]
+    assert [finding.kind for finding in parse_findings(truncated)] == ["error", "hint"]
+    assert ValidationReport(0, "").summary() == {
+        "code": 0,
+        "ok": True,
+        "cached": False,
+        "errors": 0,
+        "hints": 0,
+        "findings": [],
+        "omitted": 0,
+    }
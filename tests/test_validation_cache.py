@@ -0,0 +1,115 @@
+"""Validation result cache tests (no ERiC required)."""
+
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from pytaxel.eric.cache import ValidationCache, cache_key, validate_with_cache  # noqa: E402
+
+
+def test_validate_with_cache_reuses_result_and_pdf(tmp_path: Path):
+    cache = ValidationCache(tmp_path / "cache")
+    calls = []
+
+    def run():
+        calls.append(1)
+        (tmp_path / "preview.pdf").write_bytes(b"%PDF-1.4 first run")
+        return SimpleNamespace(code=0, validation_response="<ok/>", server_response="")
+
+    first, hit_first = validate_with_cache(cache, "<xml/>", "Bilanz_6.5", None, run, tmp_path / "preview.pdf")
+    (tmp_path / "preview.pdf").unlink()
+    second, hit_second = validate_with_cache(cache, "<xml/>", "Bilanz_6.5", None, run, tmp_path / "preview.pdf")
+    _, hit_other_version = validate_with_cache(cache, "<xml/>", "Bilanz_6.6", None, run)
+
+    assert (hit_first, hit_second, hit_other_version) == (False, True, False)
+    assert len(calls) == 2
+    assert second.validation_response == first.validation_response
+    assert (tmp_path / "preview.pdf").read_bytes() == b"%PDF-1.4 first run"
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = ValidationCache(tmp_path, max_bytes=10_000)
+    scans = []
+    evict = cache.evict
+    cache.evict = lambda: scans.append(1) or evict()
+    keys = [cache_key(f"<xml n='{i}'/>", "Bilanz_6.5", "41.6.2.0") for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, 0, "x" * 3000, "")
+        entry = next(tmp_path.glob(f"*/{key}.json"))
+        os.utime(entry, (1_000_000 + age, 1_000_000 + age))
+    assert cache.get(keys[0]) is not None  # refreshes keys[0]
+
+    cache.put(cache_key("<xml n='3'/>", "Bilanz_6.5", "41.6.2.0"), 0, "x" * 3000, "")
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    # Only the put that went over the budget scanned the cache.
+    assert len(scans) == 1
+    assert cache.size() == cache._total <= 10_000
+
+
+def test_log_sink_archives_compressed_runs_and_prunes_old_ones(tmp_path: Path):
+    import json
+
+    from pytaxel.eric.cache import content_fingerprint
+    from pytaxel.eric.logs import LogSink
+
+    sink = LogSink(tmp_path, max_bytes=None, max_age=3600)
+    first = sink.write("<v n='1'/>", "", xml_text="<xml n='1'/>", code=0, datenart_version="Bilanz_6.5")
+    second = sink.write("<v n='2'/>", "<s/>", xml_text="<xml n='2'/>", operation="send", code=1)
+
+    assert sorted(p.name for p in first.iterdir()) == ["server_response.xml.gz", "validation_response.xml.gz"]
+    assert (tmp_path / "validation_response.xml").read_text(encoding="utf-8") == "<v n='2'/>"
+    fingerprint = content_fingerprint("<xml n='1'/>")
+    assert first.name.endswith(fingerprint[:12])
+    [found] = sink.find(fingerprint=fingerprint)
+    assert (found["operation"], found["code"], found["datenart_version"]) == ("validate", 0, "Bilanz_6.5")
+    assert sink.read(found["run"]) == "<v n='1'/>"
+    assert [entry["run"] for entry in sink.find()] == [second.name, first.name]
+
+    # Age the first run beyond max_age and shrink the size budget: the next write keeps only itself.
+    index = sink.index_path.read_text(encoding="utf-8").splitlines()
+    entry = json.loads(index[0])
+    entry["time"] = "2000-01-01T00:00:00+00:00"
+    sink.index_path.write_text("\n".join([json.dumps(entry)] + index[1:]) + "\n", encoding="utf-8")
+    sink = LogSink(tmp_path, max_bytes=1, max_age=3600)
+    third = sink.write("<v n='3'/>", "", xml_text="<xml n='3'/>")
+
+    assert not first.exists() and not second.exists() and third.exists()
+    assert [entry["run"] for entry in sink.find()] == [third.name]
+
+    # Another process's sink appended meanwhile: pruning merges its entries instead of orphaning its runs.
+    other = LogSink(tmp_path, max_bytes=None, max_age=3600)
+    fourth = other.write("<v n='4'/>", "", xml_text="<xml n='4'/>")
+    fifth = sink.write("<v n='5'/>", "", xml_text="<xml n='5'/>")
+    assert not third.exists() and not fourth.exists() and fifth.exists()
+    assert [entry["run"] for entry in other.find()] == [fifth.name]
+
+
+def test_validated_and_logged_xml_is_canonicalised_once(tmp_path: Path, monkeypatch):
+    from pytaxel.eric import cache as cache_module
+    from pytaxel.eric.logs import LogSink
+
+    canonicalised = []
+    original = cache_module._content_fingerprint
+    monkeypatch.setattr(cache_module, "_content_fingerprint", lambda xml: canonicalised.append(xml) or original(xml))
+    fingerprint = cache_module.content_fingerprint("<xml n='1'/>")
+
+    def run():
+        return SimpleNamespace(code=0, validation_response="<ok/>", server_response="")
+
+    result, _ = validate_with_cache(
+        ValidationCache(tmp_path / "cache"), "<xml n='1'/>", "Bilanz_6.5", None, run, fingerprint=fingerprint
+    )
+    run_dir = LogSink(tmp_path / "logs").write(
+        result.validation_response, result.server_response, xml_text="<xml n='1'/>", fingerprint=fingerprint
+    )
+
+    assert len(canonicalised) == 1
+    assert run_dir.name.endswith(fingerprint[:12])
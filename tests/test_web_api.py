@@ -1,4 +1,12 @@
+import importlib
+import json
+import os
+import socket
+import sqlite3
 import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
 from fastapi.testclient import TestClient
@@ -7,7 +15,15 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from pytaxel.ebilanz import generate_xml_from_csv  # noqa: E402
+from pytaxel.eric import EricWorkerPool, ValidationCache  # noqa: E402
+from pytaxel.eric.testing import ERIC_ERROR_CODE, ERIC_ERROR_MARKER, ERROR_MARKER  # noqa: E402
+from pytaxel.web import metrics  # noqa: E402
 from pytaxel.web.app import app  # noqa: E402
+from pytaxel.web.jobs import JobRunner, JobStore  # noqa: E402
+
+# ``pytaxel.web.app`` the attribute is the FastAPI instance; fetch the module itself.
+web_app = importlib.import_module("pytaxel.web.app")
 
 client = TestClient(app)
 
@@ -67,3 +83,353 @@ def test_web_validate_logs(tmp_path: Path):
     assert resp.status_code == 200
     assert (tmp_path / "validation_response.xml").exists()
     assert (tmp_path / "server_response.xml").exists()
+
+
+def test_web_validate_uses_worker_pool(tmp_path: Path, monkeypatch):
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", ValidationCache(tmp_path / "cache"))
+    cached = []
+    try:
+        for no_cache in ("true", "false", "false"):
+            resp = client.post(
+                "/validate",
+                files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")},
+                data={"tax_type": "Bilanz", "tax_version": "6.5", "log_dir": str(tmp_path), "no_cache": no_cache},
+            )
+            assert resp.status_code == 200
+            assert resp.json()["code"] == 0
+            cached.append(resp.json()["cached"])
+    finally:
+        pool.close()
+    assert cached == [False, False, True]
+    assert (tmp_path / "validation_response.xml").exists()
+    # ERiC's session log of the two uncached runs went to the request's log dir.
+    assert len((tmp_path / "eric.log").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_web_validate_without_log_dir_skips_the_run_archive(tmp_path: Path, monkeypatch):
+    from collections import OrderedDict
+
+    from pytaxel.eric import logs
+
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", None)
+    monkeypatch.setattr(logs, "_sinks", OrderedDict())
+    try:
+        resp = client.post("/validate", files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")})
+    finally:
+        pool.close()
+    assert resp.status_code == 200
+    assert resp.json()["validation_response"]
+    # The temporary log dir is removed after the request, so nothing is archived or indexed for it.
+    assert not logs._sinks
+    assert not Path(resp.json()["log_dir"]).exists()
+
+
+def test_web_validate_reports_eric_errors_with_their_code(tmp_path: Path, monkeypatch):
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", None)
+    try:
+        xml = f"<Elster>{ERIC_ERROR_MARKER}</Elster>".encode("utf-8")
+        resp = client.post(
+            "/validate", files={"xml_file": ("input.xml", xml, "application/xml")}, data={"log_dir": str(tmp_path)}
+        )
+    finally:
+        pool.close()
+    assert resp.status_code == 400
+    assert resp.json()["code"] == ERIC_ERROR_CODE
+
+
+def test_web_rejects_with_503_when_queue_is_full(monkeypatch):
+    executor = web_app._cpu_executor
+    monkeypatch.setattr(executor, "_pending", executor.capacity)
+
+    resp = client.post("/generate", data={})
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(executor.retry_after)
+
+
+def test_web_generate_in_memory(tmp_path: Path, monkeypatch):
+    csv_path = REPO_ROOT / "taxel" / "test_data" / "taxonomy" / "v6.5" / "sample.csv"
+    template_path = (
+        REPO_ROOT
+        / "taxel"
+        / "templates"
+        / "elster_v11"
+        / "taxonomy_v6.5"
+        / "ebilanz.xml"
+    )
+    expected = tmp_path / "expected.xml"
+    generate_xml_from_csv(csv_path, template_path, expected)
+    monkeypatch.chdir(tmp_path)
+
+    with csv_path.open("rb") as f:
+        resp = client.post(
+            "/generate",
+            files={"csv_file": ("sample.csv", f, "text/csv")},
+            data={"template_path": str(template_path)},
+        )
+
+    assert resp.status_code == 200
+    assert resp.content == expected.read_bytes()
+    assert 'filename="output.xml"' in resp.headers["Content-Disposition"]
+    assert not (tmp_path / "output.xml").exists()
+
+
+def test_web_metrics_endpoint(tmp_path: Path, monkeypatch):
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", ValidationCache(tmp_path / "cache"))
+    validations = metrics.PHASE_SECONDS.count(phase="validate")
+    eric_calls = metrics.ERIC_SECONDS.count(operation="validate")
+    try:
+        for _ in range(2):
+            resp = client.post(
+                "/validate",
+                files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")},
+                data={"tax_type": "Bilanz", "tax_version": "6.5", "log_dir": str(tmp_path)},
+            )
+            assert resp.status_code == 200
+    finally:
+        pool.close()
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metrics.PHASE_SECONDS.count(phase="validate") == validations + 2
+    # The second request is answered from the validation cache without an ERiC call.
+    assert metrics.ERIC_SECONDS.count(operation="validate") == eric_calls + 1
+    text = resp.text
+    assert "# TYPE pytaxel_phase_duration_seconds histogram" in text
+    assert 'pytaxel_phase_duration_seconds_bucket{phase="validate",le="+Inf"}' in text
+    assert 'pytaxel_requests_total{endpoint="/validate",status="200"}' in text
+    assert 'pytaxel_validation_cache_requests_total{result="hit"}' in text
+    assert "pytaxel_eric_in_flight 0" in text
+    # Labelled "eric" or "eric:<path>", depending on whether ERIC_HOME resolves to an installation.
+    executor = web_app._eric_executor(web_app._eric_home(None, None))
+    assert f'pytaxel_executor_pending{{executor="{executor.name}"}} 0' in text
+    assert 'pytaxel_template_cache_lookups_total{result="hit"}' in text
+
+
+def test_job_store_survives_restart_and_reclaims_expired_leases(tmp_path: Path):
+    db = tmp_path / "jobs.sqlite3"
+    store = JobStore(db, lease_seconds=0.0, max_attempts=2)
+    job = store.submit("validate", "<Elster/>", {"tax_type": "Bilanz"})
+    store.close()
+
+    store = JobStore(db, lease_seconds=0.0, max_attempts=2)
+    claimed, payload = store.claim(("validate",))
+    assert (claimed.id, claimed.status, claimed.attempts, payload) == (job.id, "running", 1, "<Elster/>")
+    # The worker died: its lease has expired, so the job is claimed again ...
+    time.sleep(0.01)
+    assert store.claim(("validate",))[0].attempts == 2
+    # ... until it has used up its attempts.
+    time.sleep(0.01)
+    assert store.claim(("validate",)) is None
+    assert store.get(job.id).status == "failed"
+    assert store.counts()["failed"] == 1
+    store.close()
+
+    # An earlier store of this process left a job running: its lease is expired at once, not waited out.
+    old = JobStore(db, owner=f"{socket.gethostname()}:{os.getpid()}:old")
+    job = old.submit("validate", "<Elster/>", {})
+    old.claim(("validate",))
+    assert old.renew() == 1
+    old.close()
+    store = JobStore(db)
+    assert store.claim(("validate",)) is None
+    assert store.expire_orphans() == 1
+    claimed, _ = store.claim(("validate",))
+    assert (claimed.id, claimed.attempts) == (job.id, 2)
+    assert store.expire_orphans() == 0  # now leased by a live store
+    store.close()
+
+
+def test_job_runner_keeps_running_when_storing_a_result_fails(tmp_path: Path):
+    class LockedOnce(JobStore):
+        failures = 1
+
+        def finish(self, job_id, result=None, error=None):
+            if self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            super().finish(job_id, result, error)
+
+    store = LockedOnce(tmp_path / "jobs.sqlite3")
+    runner = JobRunner(store, {"echo": lambda params, payload: {"payload": payload}}, poll_interval=0.01).start()
+    try:
+        first = runner.submit("echo", "a", {})
+        second = runner.submit("echo", "b", {})
+        deadline = time.monotonic() + 10
+        while store.get(second.id).status != "done" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # The first job's result was lost; it stays leased until the lease runs out.
+        assert (store.get(first.id).status, store.get(second.id).result) == ("running", {"payload": "b"})
+    finally:
+        runner.close()
+        store.close()
+
+
+def test_web_validate_job_polling_and_callback(tmp_path: Path, monkeypatch):
+    received = []
+
+    class CallbackHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), CallbackHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", None)
+    monkeypatch.setattr(web_app, "JOB_DB", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(web_app, "_jobs", None)
+    callback = f"http://127.0.0.1:{server.server_port}/done"
+    try:
+        submitted = []
+        for xml in (b"<Elster/>", f"<Elster>{ERROR_MARKER}</Elster>".encode("utf-8")):
+            resp = client.post(
+                "/jobs/validate",
+                files={"xml_file": ("input.xml", xml, "application/xml")},
+                data={"log_dir": str(tmp_path / "logs"), "callback_url": callback},
+            )
+            assert resp.status_code == 202
+            assert resp.headers["Location"] == resp.json()["url"]
+            submitted.append(resp.json()["url"])
+
+        jobs = []
+        for url in submitted:
+            deadline = time.monotonic() + 30
+            while True:
+                job = client.get(url).json()
+                if job["status"] in ("done", "failed") and job["callback_status"] or time.monotonic() > deadline:
+                    break
+                time.sleep(0.05)
+            jobs.append(job)
+        assert client.get("/jobs/unknown").status_code == 404
+        summary = client.get(submitted[0], params={"format": "summary"}).json()["result"]
+        text = client.get("/metrics").text
+    finally:
+        web_app._close_jobs()
+        pool.close()
+        server.shutdown()
+
+    ok, failed = jobs
+    assert ok["status"] == "done"
+    assert ok["result"]["code"] == 0
+    assert ok["result"]["cached"] is False
+    assert (summary["code"], summary["hints"], summary["log_dir"]) == (0, 2, str(tmp_path / "logs"))
+    assert "validation_response" not in summary
+    assert (tmp_path / "logs" / "validation_response.xml").exists()
+    assert failed["status"] == "failed"
+    assert "fake ERiC error" in failed["error"]
+    assert ok["callback_status"].startswith("delivered")
+    assert sorted(job["id"] for job in received) == sorted([ok["id"], failed["id"]])
+    assert 'pytaxel_jobs{status="done"} 1' in text
+    assert 'pytaxel_requests_total{endpoint="/jobs/{id}",status="404"} 1' in text
+
+
+def test_web_validate_routes_eric_home_without_setting_environ(tmp_path: Path, monkeypatch):
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    homes = []
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: homes.append(eric_home) or pool)
+    monkeypatch.setattr(web_app, "_validation_cache", None)
+    monkeypatch.delenv("ERIC_HOME", raising=False)
+    try:
+        resp = client.post(
+            "/validate",
+            files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")},
+            data={"eric_home": str(tmp_path / "ERiC-41.6.2.0"), "log_dir": str(tmp_path)},
+        )
+        assert resp.status_code == 200
+        resp = client.post(
+            "/validate",
+            files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")},
+            data={"eric_version": "0.0.0.1", "log_dir": str(tmp_path)},
+        )
+    finally:
+        pool.close()
+    assert resp.status_code == 400
+    assert "0.0.0.1" in resp.json()["detail"]
+    assert homes == [str(tmp_path / "ERiC-41.6.2.0")]
+    assert "ERIC_HOME" not in os.environ
+    # Each installation has its own executor, so a burst for one does not queue behind the other.
+    executor = web_app._eric_executor(str(tmp_path / "ERiC-41.6.2.0"))
+    assert executor is not web_app._eric_executor(None)
+    assert executor.name == f"eric:{(tmp_path / 'ERiC-41.6.2.0').resolve()}"
+    assert executor.capacity == web_app.ERIC_POOL_SIZE + web_app.ERIC_QUEUE
+
+
+def test_web_validate_summary_format(tmp_path: Path, monkeypatch):
+    pool = EricWorkerPool(client_factory="pytaxel.eric.testing:FakeEricClient", log_dir=tmp_path / "eric")
+    monkeypatch.setattr(web_app, "_eric_pool", lambda eric_home: pool)
+    monkeypatch.setattr(web_app, "_validation_cache", None)
+    try:
+        resp = client.post(
+            "/validate?format=summary",
+            files={"xml_file": ("input.xml", b"<Elster/>", "application/xml")},
+            data={"log_dir": str(tmp_path)},
+        )
+    finally:
+        pool.close()
+
+    assert resp.status_code == 200
+    summary = resp.json()
+    assert (summary["code"], summary["ok"], summary["errors"], summary["hints"]) == (0, True, 0, 2)
+    assert summary["findings"][0]["text"].startswith("fake ERiC worker")
+    assert "validation_response" not in summary
+    assert (tmp_path / "validation_response.xml").exists()
+    assert client.post("/validate?format=xml", files={"xml_file": ("a.xml", b"<a/>")}).status_code == 400
+
+
+def test_upload_limit_rejects_large_bodies_early_and_hashes_while_reading():
+    import hashlib
+    import io
+
+    from fastapi import FastAPI, File, UploadFile
+
+    from starlette.formparsers import MultiPartParser
+
+    from pytaxel.web.uploads import UploadLimitMiddleware, read_upload_text, spooling_route
+
+    upload_app = FastAPI()
+    upload_app.add_middleware(UploadLimitMiddleware, max_bytes=4096)
+    upload_app.router.route_class = spooling_route(16)
+
+    @upload_app.post("/upload")
+    def upload(xml_file: UploadFile = File(...)):
+        text, digest = read_upload_text(xml_file.file, chunk_size=7)
+        return {"text": text, "sha256": digest, "on_disk": xml_file.file._rolled}
+
+    upload_client = TestClient(upload_app)
+    data = "<a>\r\nÄrger €</a>\n".encode("utf-8")
+    resp = upload_client.post("/upload", files={"xml_file": ("a.xml", data, "application/xml")})
+    assert resp.status_code == 200
+    assert resp.json() == {"text": "<a>\nÄrger €</a>\n", "sha256": hashlib.sha256(data).hexdigest(), "on_disk": True}
+    # The spool size is the route's own; Starlette's process-wide default is untouched.
+    assert MultiPartParser.spool_max_size == 1024 * 1024
+
+    big = b"x" * 8192
+    resp = upload_client.post("/upload", files={"xml_file": ("big.xml", big, "application/xml")})
+    assert resp.status_code == 413
+
+    # Without Content-Length the body is counted as it arrives.
+    resp = upload_client.post(
+        "/upload",
+        content=(big[i : i + 1024] for i in range(0, len(big), 1024)),
+        headers={"Content-Type": "multipart/form-data; boundary=x"},
+    )
+    assert resp.status_code == 413
+    assert "upload limit" in resp.json()["detail"]
+
+    assert read_upload_text(io.BytesIO(b""))[0] == ""